@@ -4,20 +4,47 @@ import random
 
 # Third-party imports
 from mesa import Agent
+import numpy as np
 
 # Local imports
 from components.settings.ProbVento import Ignicaoprob
 
+# Estados possíveis de um patch e respetivos códigos na grelha do modelo
+PATCH_STATES = (
+    "empty", "forested", "burning", "burned",
+    "road", "river", "firebreak", "dangered",
+)
+STATE_CODES = {name: code for code, name in enumerate(PATCH_STATES)}
+
+# Coeficientes da propagação (PatchAgent.step) e da queda das fagulhas
+# (FragulhaAgent.step); cada modelo pode mudá-los com spread_coefficients
+SPREAD_COEFFICIENTS = {
+    "alfa_altitude": 0.025,
+    "alfa_humidade": 0.3,
+    "alfa_precip": 0.3,
+    "alfa_vento": 0.05,
+    "alfa_altura": 0.025,
+    "alfa_temperatura": 0.3,
+    "alfa_fragulha_humidade": 0.35,
+    "alfa_fragulha_precip": 0.35,
+    "alfa_fragulha_queda": 0.3,
+}
+
+
+def new_state_grid(width, height):
+    """Cria a grelha (width, height) de códigos de estado, indexada por [x, y]."""
+    return np.zeros((width, height), dtype=np.int8)
+
+
 class FragulhaAgent(Agent):
     def __init__(self, unique_id, model, origin_pos):
         super().__init__(model)
         self.unique_id = unique_id
         self.model = model
         
-        # Posição inicial e trajetória
+        # Posição inicial (a trajetória fica reduzida a origem e queda)
         self.origin_pos = origin_pos
         self.pos = origin_pos
-        self.path = [origin_pos]  # Guarda histórico de posições
 
         self.pcolor = 105
         self.new_pos = self.compute_target_position()
@@ -37,12 +64,12 @@ class FragulhaAgent(Agent):
         # Move-se para a new_pos
         x, y = self.new_pos
         self.pos = (x, y)
-        self.path.append((x, y))  # Registra no histórico
 
         # Probabilidade de incendiar o patch se ele estiver florestado
-        alfahumidade = 0.35
-        alfaprecip = 0.35
-        alfafragulhaqueda = 0.3
+        coefficients = self.model.spread_coefficients
+        alfahumidade = coefficients["alfa_fragulha_humidade"]
+        alfaprecip = coefficients["alfa_fragulha_precip"]
+        alfafragulhaqueda = coefficients["alfa_fragulha_queda"]
         ignition_chance = (
             alfafragulhaqueda
             + (1 - self.model.rain_level) * alfaprecip
@@ -50,33 +77,43 @@ class FragulhaAgent(Agent):
         )
 
         # Verifica o patch onde caiu
-        patches = self.model.grid.get_cell_list_contents((x, y))
-        for patch in patches:
-            # Se for floresta, há probabilidade de incendiar
-            if getattr(patch, "state", None) == "forested":
-                if random.random() < ignition_chance:
-                    patch.state = "burning"
-                    patch.pcolor = 15
-                    patch.burn_time = None
-                # senão, não incendeia
-                break  # Basta afetar um PatchAgent na célula
-
-        # Salva o trajeto final da fagulha no dicionário do modelo
-        self.model.fragulha_history[self.unique_id] = self.path
-
-        # Remove a fagulha do scheduler e da grelha
-        if self in self.model.schedule:
-            try:
-                self.model.schedule.remove(self)
-            except ValueError:
-                pass
+        patch = self.model.patch_at((x, y))
+        # Se for floresta, há probabilidade de incendiar
+        if patch.state == "forested":
+            if random.random() < ignition_chance:
+                patch.state = "burning"
+                patch.pcolor = 15
+                patch.burn_time = None
+            # senão, não incendeia
+
+        # Regista origem e queda no histórico compacto do modelo
+        self.model.fragulha_history.record(
+            self.origin_pos, self.pos, self.model.current_iteration
+        )
+
+        # Remove a fagulha do scheduler
         try:
-            self.model.grid.remove_agent(self)
+            self.model.schedule.remove(self)
         except ValueError:
             pass
 
 
 class PatchAgent(Agent):
+    # Cada escrita em ``state`` é espelhada em model.state_grid, para que as
+    # equipas e o planeador de rotas possam ler o terreno em bloco.
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, value):
+        self._state = value
+        self.model.state_grid[self.pos] = STATE_CODES[value]
+        if self.model.tile_size is not None:
+            self.model.tiles.touch(self.pos)
+            if value == "burning":
+                self.model.note_burning(self.pos)
+
     def __init__(self, unique_id, model, pos):
         super().__init__(model)
         self.unique_id = unique_id
@@ -146,12 +183,15 @@ class PatchAgent(Agent):
             min_y = max(0, cy - raio)
             max_y = min(self.model.world_height - 1, cy + raio)
 
-            alfaaltitude = 0.025
-            alfahumidade = 0.3
-            alfaprecip = 0.3
-            alfavento = 0.05
-            alfaaltura = 0.025
-            alfatemperature = 0.3
+            coefficients = self.model.spread_coefficients
+            alfaaltitude = coefficients["alfa_altitude"]
+            alfahumidade = coefficients["alfa_humidade"]
+            alfaprecip = coefficients["alfa_precip"]
+            alfavento = coefficients["alfa_vento"]
+            alfaaltura = coefficients["alfa_altura"]
+            alfatemperature = coefficients["alfa_temperatura"]
+            # Temperatura local (campo de calor) em vez do valor global
+            temperatura_local = self.model.heat.temperature_at(self.pos)
 
             for x in range(min_x, max_x + 1):
                 for y in range(min_y, max_y + 1):
@@ -186,7 +226,7 @@ class PatchAgent(Agent):
                             self.model.wind_direction
                         ) * alfavento
 
-                        temperatura_factor = self.model.temperature * alfatemperature
+                        temperatura_factor = temperatura_local * alfatemperature
 
                         combined_factor = (
                             altitude_factor
@@ -198,16 +238,15 @@ class PatchAgent(Agent):
                         )
                         final_prob = base_prob * combined_factor * self.factor_type_tree
 
-                        patches = self.model.grid.get_cell_list_contents((x, y))
-                        for patch in patches:
-                            if getattr(patch, "state", None) in ("forested", "dangered"):
-                                if random.random() < final_prob:
-                                    patch.state = "burning"
-                                    patch.pcolor = 15
-                                    patch.burn_time = None
-                                else:
-                                    patch.state = "dangered"
-                                    patch.pcolor = 45
+                        patch = self.model.patch_at((x, y))
+                        if patch.state in ("forested", "dangered"):
+                            if random.random() < final_prob:
+                                patch.state = "burning"
+                                patch.pcolor = 15
+                                patch.burn_time = None
+                            else:
+                                patch.state = "dangered"
+                                patch.pcolor = 45
 
             # Chance de gerar nova fagulha
             if random.random() < 0.20:
@@ -218,7 +257,6 @@ class PatchAgent(Agent):
                 )
                 self.model.agent_id_counter += 1
                 self.model.schedule.append(new_f)
-                self.model.grid.place_agent(new_f, self.pos)
 
             # Reduz burn_time
             self.burn_time -= 1
@@ -238,9 +276,12 @@ class AirAgent(Agent):
 
     def step(self):
         """A cada passo, ajusta a qualidade do ar conforme a quantidade de fogo."""
-        burning = sum(
-            1 for agent in self.model.schedule
-            if getattr(agent, "state", None) == "burning"
+        burning_cells = self.model.burning_cells()
+        burning = len(burning_cells)
+
+        # Campo espacial de poluentes (transporte pelo vento + difusão)
+        self.model.pollution.update(
+            burning_cells, self.model.wind_direction, self.model.wind_speed
         )
 
         # Ajuste simples de poluentes
@@ -257,8 +298,13 @@ class AirAgent(Agent):
         self.pm10_level += (target_pm10 - self.pm10_level) * decay
         self.o2_level += (target_o2 - self.o2_level) * decay
 
-    def get_air_status(self):
-        """Retorna 'Perigo' se a qualidade do ar estiver ruim; caso contrário, 'Seguro'."""
+    def get_air_status(self, pos=None):
+        """
+        Retorna 'Perigo' se a qualidade do ar estiver ruim; caso contrário, 'Seguro'.
+        Com ``pos`` avalia o campo de poluentes nessa célula em vez do valor global.
+        """
+        if pos is not None:
+            return self.model.pollution.status_at(pos)
         if (
             self.o2_level <= 15000
             or self.co_level >= 20
@@ -0,0 +1,109 @@
+# dispatcher.py
+
+# Third-party imports
+import numpy as np
+from scipy import ndimage
+from scipy.optimize import linear_sum_assignment
+
+# Local imports
+from Agents.agentes import STATE_CODES
+from Agents.firefighter_fleet import WATER
+
+
+BURNING = STATE_CODES["burning"]
+FUEL_STATES = (STATE_CODES["forested"], STATE_CODES["dangered"])
+
+
+class FireDispatcher:
+    """
+    Central de despacho das equipas de água.
+
+    A cada ``interval`` passos resolve, de uma só vez, a atribuição de todas
+    as equipas de água a alvos na frente de fogo (células a arder com
+    combustível à volta), por emparelhamento de custo mínimo
+    (``linear_sum_assignment``) sobre uma amostra espacial da frente. Cada
+    equipa limita-se a seguir o alvo que lhe foi atribuído.
+    """
+
+    def __init__(self, model, interval=1, max_targets=64):
+        self.model = model
+        self.interval = interval
+        self.max_targets = max_targets
+        self.assignments = {}   # unique_id do bombeiro -> célula alvo
+        self.targets = np.empty((0, 2), dtype=np.int64)  # Por índice da frota (-1 sem alvo)
+        self._solved_at = None
+
+    def _refresh(self):
+        if (self._solved_at is None
+                or self.model.steps - self._solved_at >= self.interval):
+            self.solve()
+
+    def target_for(self, agent):
+        """Alvo atribuído a ``agent`` nesta iteração (None se não houver)."""
+        self._refresh()
+        return self.assignments.get(agent.unique_id)
+
+    def targets_for(self, indices):
+        """Alvos (N, 2) das equipas da frota ``indices`` (-1 nas sem alvo)."""
+        self._refresh()
+        indices = np.asarray(indices, dtype=np.int64)
+        result = np.full((len(indices), 2), -1, dtype=np.int64)
+        known = indices < len(self.targets)
+        result[known] = self.targets[indices[known]]
+        return result
+
+    def fire_front(self):
+        """Células (N, 2) a arder que ainda têm combustível na vizinhança."""
+        x0, x1, y0, y1 = self.model.active_window()
+        state = self.model.state_grid[x0:x1, y0:y1]
+        fuel = np.isin(state, FUEL_STATES)
+        near_fuel = ndimage.binary_dilation(fuel, structure=np.ones((3, 3), bool))
+        return np.argwhere((state == BURNING) & near_fuel) + (x0, y0)
+
+    def sample_front(self, front):
+        """Amostra espacialmente uniforme da frente (no máximo ``max_targets``)."""
+        if len(front) <= self.max_targets:
+            return front
+        # Agrupa em blocos e fica com uma célula por bloco, para cobrir os flancos
+        block = 1
+        while True:
+            keys = front // block
+            _, first = np.unique(keys, axis=0, return_index=True)
+            if len(first) <= self.max_targets:
+                return front[np.sort(first)]
+            block *= 2
+
+    def solve(self):
+        """Atribui todas as equipas de água à frente de fogo num único passo."""
+        self._solved_at = self.model.steps
+        self.assignments = {}
+        fleet = self.model.fleet
+        self.targets = np.full((fleet.size, 2), -1, dtype=np.int64)
+
+        crews = np.flatnonzero(
+            fleet.alive[:fleet.size] & (fleet.techniques[:fleet.size] == WATER)
+        )
+        if len(crews) == 0:
+            return
+        front = self.fire_front()
+        if len(front) == 0:
+            front = self.model.burning_cells()
+        if len(front) == 0:
+            return
+        targets = self.sample_front(front)
+
+        # Custo = passos até ao alvo (distância de Chebyshev)
+        positions = fleet.positions[crews]
+        cost = np.abs(positions[:, None, :] - targets[None, :, :]).max(axis=2)
+
+        # Com mais equipas do que alvos, os alvos repetem-se com penalização
+        # crescente: cada alvo recebe uma equipa antes de algum receber duas
+        copies = -(-len(crews) // len(targets))
+        penalty = cost.max() + 1
+        tiled = np.concatenate([cost + k * penalty for k in range(copies)], axis=1)
+
+        rows, cols = linear_sum_assignment(tiled)
+        chosen = targets[cols % len(targets)]
+        self.targets[crews[rows]] = chosen
+        for row, (tx, ty) in zip(rows, chosen.tolist()):
+            self.assignments[fleet.agents[crews[row]].unique_id] = (tx, ty)
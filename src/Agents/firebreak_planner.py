@@ -0,0 +1,81 @@
+# firebreak_planner.py
+
+# Standard library imports
+import math
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from Agents.agentes import STATE_CODES
+
+
+# Estados onde não se pode abrir linha de corte
+BLOCKED_STATES = np.array([
+    STATE_CODES["burning"], STATE_CODES["river"], STATE_CODES["firebreak"]
+])
+
+
+def bresenham(x0, y0, x1, y1):
+    """Células (N, 2) do segmento entre (x0, y0) e (x1, y1), extremos incluídos."""
+    dx, dy = abs(x1 - x0), -abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    err = dx + dy
+    cells = []
+    while True:
+        cells.append((x0, y0))
+        if x0 == x1 and y0 == y1:
+            break
+        e2 = 2 * err
+        if e2 >= dy:
+            err += dy
+            x0 += sx
+        if e2 <= dx:
+            err += dx
+            y0 += sy
+    return np.array(cells, dtype=np.int64)
+
+
+def rasterize_line(center, angle, length, width, grid_width, grid_height):
+    """
+    Rasteriza a linha de corte inteira de uma só vez.
+
+    A linha parte de ``center`` com o ângulo dado e tem ``length`` células no
+    eixo principal; cada célula é repetida ``width`` vezes na perpendicular
+    (no eixo menor do segmento). Devolve a lista de trabalho ordenada (N, 2),
+    apenas com células dentro da grelha e sem repetições.
+    """
+    x0, y0 = round(center[0]), round(center[1])
+    x1 = round(center[0] + (length - 1) * math.cos(angle))
+    y1 = round(center[1] + (length - 1) * math.sin(angle))
+    spine = bresenham(x0, y0, x1, y1)
+
+    # Espessura: desloca no eixo menor para que a linha não tenha falhas
+    if abs(x1 - x0) >= abs(y1 - y0):
+        shift = np.array([0, 1])
+    else:
+        shift = np.array([1, 0])
+    layers = [spine + k * shift for k in range(max(1, width))]
+    cells = np.stack(layers, axis=1).reshape(-1, 2)
+
+    inside = ((0 <= cells[:, 0]) & (cells[:, 0] < grid_width) &
+              (0 <= cells[:, 1]) & (cells[:, 1] < grid_height))
+    cells = cells[inside]
+    _, first = np.unique(cells, axis=0, return_index=True)
+    return cells[np.sort(first)]
+
+
+def suitable_cells(cells, state_grid):
+    """Máscara das células onde ainda se pode abrir linha (validação em bloco)."""
+    if len(cells) == 0:
+        return np.zeros(0, dtype=bool)
+    states = state_grid[cells[:, 0], cells[:, 1]]
+    return ~np.isin(states, BLOCKED_STATES)
+
+
+def plan_firebreak(center, angle, length, width, state_grid):
+    """Lista de trabalho (N, 2) da linha, já filtrada pelo estado atual do terreno."""
+    grid_width, grid_height = state_grid.shape
+    cells = rasterize_line(center, angle, length, width, grid_width, grid_height)
+    return cells[suitable_cells(cells, state_grid)]
@@ -0,0 +1,218 @@
+# firefighter_fleet.py
+
+# Standard library imports
+import math
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from Agents.agentes import STATE_CODES
+
+
+BURNING = STATE_CODES["burning"]
+
+# Códigos das técnicas
+TECHNIQUE_CODES = {"water": 0, "alternative": 1}
+WATER = TECHNIQUE_CODES["water"]
+ALTERNATIVE = TECHNIQUE_CODES["alternative"]
+
+# Células contra o vento do ponto de encontro das equipas de água
+SAFE_DISTANCE = 3
+
+# Células do início de cada rota validadas a cada passo; um corte mais à
+# frente só obriga a re-planear quando a equipa se aproxima dele
+ROUTE_HORIZON = 8
+
+
+class FirefighterFleet:
+    """
+    Estado de todas as equipas em arrays: posição, modo, técnica, se está
+    viva e capacidade de extinção.
+
+    Os FirefighterAgent continuam a existir (interface gráfica, gráficos,
+    decisões das equipas técnicas), mas ``pos`` e ``mode`` escrevem nestes
+    arrays. A verificação de morte, a extinção nas células vizinhas e o
+    movimento das equipas de água são feitos em bloco para toda a frota.
+
+    Toda a frota avança na vez do primeiro FirefighterAgent no scheduler
+    (ver EnvironmentModel.step), e não cada equipa na sua vez; as equipas
+    técnicas decidem depois das de água.
+    """
+
+    def __init__(self, model, capacity=4):
+        self.model = model
+        self.width = model.world_width
+        self.height = model.world_height
+        self.size = 0
+        self.agents = []
+        capacity = max(1, capacity)
+        self.positions = np.zeros((capacity, 2), dtype=np.int64)
+        self.modes = np.zeros(capacity, dtype=np.int8)
+        self.techniques = np.zeros(capacity, dtype=np.int8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.capacity = np.zeros(capacity, dtype=np.uint8)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, agent, technique, extinguish_capacity):
+        """Regista uma equipa e devolve o seu índice na frota."""
+        if self.size == len(self.alive):
+            self._grow(2 * self.size)
+        i = self.size
+        self.size += 1
+        self.agents.append(agent)
+        self.techniques[i] = TECHNIQUE_CODES[technique]
+        self.capacity[i] = extinguish_capacity
+        self.alive[i] = True
+        return i
+
+    def _grow(self, capacity):
+        self.positions = np.resize(self.positions, (capacity, 2))
+        self.modes = np.resize(self.modes, capacity)
+        self.techniques = np.resize(self.techniques, capacity)
+        self.alive = np.resize(self.alive, capacity)
+        self.capacity = np.resize(self.capacity, capacity)
+
+    def step(self, indices=None):
+        """Executa um passo das equipas ``indices`` (todas as vivas por omissão)."""
+        model = self.model
+        if indices is None:
+            idx = np.flatnonzero(self.alive[:self.size])
+        else:
+            idx = np.asarray(indices, dtype=np.int64)
+            idx = idx[self.alive[idx]]
+        if len(idx) == 0:
+            return
+
+        if model.decision_log.enabled:
+            for i in idx:
+                agent = self.agents[i]
+                agent._log("status", mode=agent.mode, pos=agent.pos,
+                           last_action=agent.last_action)
+
+        # 1) Equipas sobre células a arder "morrem"
+        pos = self.positions[idx]
+        lost = model.state_grid[pos[:, 0], pos[:, 1]] == BURNING
+        for i in idx[lost]:
+            self._lose(i)
+        idx = idx[~lost]
+
+        # 2) Ações do passo
+        field = model.get_fire_field()
+        if field.burning_count == 0:
+            for i in idx:
+                self.agents[i]._act_without_fire()
+        else:
+            water = idx[self.techniques[idx] == WATER]
+            hit = self.extinguish(water)
+            for i in water[hit]:
+                agent = self.agents[i]
+                agent.mode = "direct_attack"
+                agent.last_action = "direct_attack"
+
+            movers = water[~hit]
+            for i in movers:
+                agent = self.agents[i]
+                agent.mode = "navigating"
+                agent.last_action = "moving_to_fire"
+            self.navigate(movers, field)
+
+            for i in idx[self.techniques[idx] == ALTERNATIVE]:
+                self.agents[i]._act_alternative(field)
+
+        for i in idx:
+            agent = self.agents[i]
+            agent.trajectory.append(agent.pos, agent.mode)
+
+        # No modo em blocos, os blocos onde as equipas entram passam a existir
+        self.model.ensure_tiles(self.positions[idx])
+
+    def _lose(self, i):
+        """Retira do modelo uma equipa apanhada pelo fogo."""
+        agent = self.agents[i]
+        if self.model.decision_log.enabled:
+            agent._log("lost_in_fire", pos=agent.pos)
+        self.alive[i] = False
+        try:
+            self.model.schedule.remove(agent)
+        except ValueError:
+            pass
+
+    def fire_goals(self, indices, field):
+        """
+        Alvo (N, 2) de cada equipa de água ``indices``: o atribuído pela
+        central de despacho (ou, se já não arde, o foco mais próximo), ou o
+        ponto SAFE_DISTANCE células contra o vento dele, se esse ponto
+        estiver mais perto da equipa (chegada pelo lado oposto ao vento).
+        """
+        model = self.model
+        pos = self.positions[indices]
+        targets = model.dispatcher.targets_for(indices)
+        valid = targets[:, 0] >= 0
+        valid[valid] = model.state_grid[targets[valid, 0], targets[valid, 1]] == BURNING
+        if not valid.all():
+            targets[~valid] = field.nearest_fires(pos[~valid])
+
+        # vector do vento (para onde o vento sopra)
+        rad = math.radians(model.wind_direction)
+        wind = np.array([round(math.sin(rad)), -round(math.cos(rad))], dtype=np.int64)
+        upwind = np.clip(targets - wind * SAFE_DISTANCE, 0, [self.width - 1, self.height - 1])
+        closer = (np.hypot(*(pos - upwind).T) < np.hypot(*(pos - targets).T))
+        return np.where(closer[:, None], upwind, targets)
+
+    def navigate(self, indices, field):
+        """
+        Avança em bloco as equipas de água ``indices`` uma célula rumo ao
+        alvo (ver fire_goals), contornando o fogo e os rios. Cada equipa
+        segue a sua rota A* em cache; o início das rotas (ROUTE_HORIZON
+        células) é validado de uma vez (RoutePlanner.routes_clear) e só as
+        rotas cortadas, esgotadas ou com o alvo deslocado são re-planeadas.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) == 0:
+            return
+        goals = self.fire_goals(indices, field)
+        agents = [self.agents[i] for i in indices.tolist()]
+        clear = self.model.route_planner.routes_clear(
+            [agent.route for agent in agents], horizon=ROUTE_HORIZON
+        )
+        cells = np.full((len(indices), 2), -1, dtype=np.int64)
+        for k, agent in enumerate(agents):
+            cell = agent._next_route_cell(tuple(goals[k].tolist()), clear=bool(clear[k]))
+            if cell is not None:
+                cells[k] = cell
+        moved = cells[:, 0] >= 0
+        self.move(indices[moved], cells[moved])
+
+    def move(self, indices, cells):
+        """Move em bloco as equipas ``indices`` para as células ``cells``."""
+        if len(indices) == 0:
+            return
+        indices = np.asarray(indices, dtype=np.int64)
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        self.positions[indices] = cells
+        for i, (x, y) in zip(indices, cells.tolist()):
+            self.agents[i]._pos = (x, y)
+
+    def extinguish(self, indices):
+        """
+        Extinção em bloco nas células vizinhas (raio 1) das equipas ``indices``.
+
+        O esforço de todas as equipas é somado no campo de supressão do
+        modelo (``model.suppression``), que decide que células ficam apagadas.
+        Devolve a máscara das equipas que apagaram pelo menos uma célula.
+        """
+        if len(indices) == 0:
+            return np.zeros(0, dtype=bool)
+        rates = 1.0 / self.capacity[indices].astype(np.float32)
+        hit, cells = self.model.suppression.apply(
+            self.positions[indices], rates, self.model.state_grid
+        )
+        for x, y in cells.tolist():
+            patch = self.model.patch_at((x, y))
+            patch.state = "burned"
+            patch.pcolor = 5
+            patch.burn_time = None
+        return hit
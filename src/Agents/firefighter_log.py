@@ -0,0 +1,80 @@
+# firefighter_log.py
+
+# Third-party imports
+import numpy as np
+
+
+# Códigos compactos dos modos do FirefighterAgent
+MODE_CODES = {
+    "idle": 0,
+    "navigating": 1,
+    "direct_attack": 2,
+    "firebreak": 3,
+    "evacuated": 4,
+    "returning_home": 5,
+}
+MODE_NAMES = {code: name for name, code in MODE_CODES.items()}
+
+
+class TrajectoryBuffer:
+    """
+    Trajetória de uma equipa em arrays pré-alocados: posição (x, y) e código
+    do modo em cada passo. A capacidade duplica quando se esgota.
+    """
+
+    def __init__(self, capacity=256):
+        self._positions = np.empty((capacity, 2), dtype=np.int32)
+        self._modes = np.empty(capacity, dtype=np.int8)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, pos, mode):
+        if self._size == len(self._modes):
+            capacity = 2 * len(self._modes)
+            self._positions = np.resize(self._positions, (capacity, 2))
+            self._modes = np.resize(self._modes, capacity)
+        self._positions[self._size] = pos
+        self._modes[self._size] = MODE_CODES.get(mode, -1)
+        self._size += 1
+
+    @property
+    def positions(self):
+        """Array (N, 2) com as posições registadas."""
+        return self._positions[:self._size]
+
+    @property
+    def modes(self):
+        """Array (N,) com os códigos de modo (ver MODE_CODES)."""
+        return self._modes[:self._size]
+
+
+class DecisionLog:
+    """
+    Registo estruturado das decisões dos bombeiros.
+
+    Cada evento é um tuplo (iteração, id do bombeiro, evento, detalhes).
+    Desligado (``enabled=False``) não guarda nem imprime nada; com
+    ``echo=True`` também escreve cada evento na consola.
+    """
+
+    def __init__(self, enabled=False, echo=False):
+        self.enabled = enabled
+        self.echo = echo
+        self.events = []
+
+    def log(self, step, agent_id, event, **details):
+        if not self.enabled:
+            return
+        self.events.append((step, agent_id, event, details))
+        if self.echo:
+            info = ", ".join(f"{k}={v}" for k, v in details.items())
+            print(f"[{step}] Bombeiro {agent_id}: {event} {info}")
+
+    def events_for(self, agent_id):
+        """Eventos de um único bombeiro, pela ordem em que ocorreram."""
+        return [e for e in self.events if e[1] == agent_id]
+
+    def clear(self):
+        self.events = []
@@ -0,0 +1,276 @@
+# route_planner.py
+
+# Standard library imports
+import heapq
+import math
+
+# Third-party imports
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+# Local imports
+from Agents.agentes import PATCH_STATES
+
+
+# Custo de entrar numa célula, por estado (inf = intransponível)
+TERRAIN_COST = {
+    "empty": 1.0,
+    "forested": 1.0,
+    "burning": math.inf,   # Fogo ativo bloqueia a passagem
+    "burned": 1.0,
+    "road": 0.5,           # Estradas são o caminho mais rápido
+    "river": math.inf,     # Rios são intransponíveis
+    "firebreak": 1.0,
+    "dangered": 1.5,
+}
+COST_LUT = np.array([TERRAIN_COST[name] for name in PATCH_STATES])
+_COST_BY_CODE = COST_LUT.tolist()
+MIN_COST = min(TERRAIN_COST.values())
+
+NEIGHBOR_OFFSETS = (
+    (-1, -1), (-1, 0), (-1, 1), (0, -1),
+    (0, 1), (1, -1), (1, 0), (1, 1),
+)
+_OFFSETS = np.array(NEIGHBOR_OFFSETS, dtype=np.int64)
+
+# Rotas até esta distância (Chebyshev) usam A*; as mais longas, em que um
+# obstáculo grande esgota o orçamento do A*, usam um Dijkstra numa janela com
+# DETOUR_MARGIN células de folga à volta da equipa e do alvo (ver plan)
+ASTAR_DISTANCE = 16
+DETOUR_MARGIN = 16
+
+
+class _LazyCost:
+    """
+    Custos lidos célula a célula de ``state_grid`` (índice x * altura + y),
+    sem copiar a grelha: uma pesquisa só lê as células que expande.
+    """
+
+    def __init__(self, state_grid):
+        self._flat = state_grid.reshape(-1)
+
+    def __getitem__(self, index):
+        return _COST_BY_CODE[self._flat[index]]
+
+
+class RoutePlanner:
+    """
+    Planeador A* partilhado pelos bombeiros, sobre uma grelha de custos
+    derivada de ``model.state_grid`` (vizinhança de Moore, um passo por célula).
+
+    - Os custos são lidos a pedido do ``state_grid``, só nas células
+      expandidas; o trabalho de cada pesquisa não depende do tamanho do mapa.
+    - As rotas curtas (até ASTAR_DISTANCE) usam A* e cada pesquisa expande
+      no máximo ``max_expansions`` células. As longas, e as que esgotam o
+      orçamento (um obstáculo grande no caminho, como a frente de fogo),
+      são calculadas de uma vez com um Dijkstra numa janela que cobre a
+      equipa e o alvo; se o alvo não for alcançável na janela, a rota vai
+      até à célula explorada pelo A* mais próxima dele.
+    - As rotas ficam em cache por alvo: uma equipa que já esteja sobre uma
+      rota válida para o mesmo alvo reutiliza o resto dessa rota.
+    - ``routes_clear`` valida de uma vez as rotas de muitas equipas; só as
+      que o fogo cortou são re-planeadas.
+    """
+
+    def __init__(self, model, max_expansions=2000, heuristic_weight=2.0,
+                 max_routes_per_goal=8):
+        self.model = model
+        self.max_expansions = max_expansions
+        self.heuristic_weight = heuristic_weight
+        self.max_routes_per_goal = max_routes_per_goal
+        self._cost = None
+        self._cost_tick = None
+        self._routes = {}  # alvo -> lista de (rota, {célula: índice})
+
+    def _cost_list(self):
+        """Custos (índice x * altura + y) da iteração atual, lidos a pedido."""
+        tick = self.model.steps
+        if self._cost is None or self._cost_tick != tick:
+            # O state_grid pode ser substituído (p.ex. ao criar blocos)
+            self._cost = _LazyCost(self.model.state_grid)
+            self._cost_tick = tick
+        return self._cost
+
+    def route_is_clear(self, route):
+        """True se nenhuma célula da rota estiver bloqueada (fogo ou rio)."""
+        if len(route) == 0:
+            return True
+        costs = COST_LUT[self.model.state_grid[route[:, 0], route[:, 1]]]
+        return bool(np.isfinite(costs).all())
+
+    def routes_clear(self, routes, horizon=None):
+        """
+        route_is_clear de várias rotas com uma só leitura do state_grid. Com
+        ``horizon`` só as primeiras ``horizon`` células de cada rota contam.
+        """
+        if horizon is not None:
+            routes = [route[:horizon] for route in routes]
+        lengths = np.array([len(route) for route in routes], dtype=np.int64)
+        clear = np.ones(len(routes), dtype=bool)
+        if lengths.sum() == 0:
+            return clear
+        cells = np.concatenate([route for route in routes if len(route)])
+        blocked = ~np.isfinite(COST_LUT[self.model.state_grid[cells[:, 0], cells[:, 1]]])
+        first = np.cumsum(lengths) - lengths
+        nonempty = lengths > 0
+        clear[nonempty] = np.add.reduceat(blocked, first[nonempty]) == 0
+        return clear
+
+    def plan(self, start, goal):
+        """
+        Devolve a rota de ``start`` até ``goal`` como array (N, 2) de células,
+        sem incluir ``start``. Se o alvo estiver bloqueado (p.ex. a arder), a
+        rota termina na célula vizinha do alvo. Devolve array vazio se não há
+        progresso possível.
+        """
+        start = tuple(start)
+        goal = tuple(goal)
+        cached = self._cached_route(start, goal)
+        if cached is not None:
+            return cached
+
+        route, reached = None, False
+        if max(abs(start[0] - goal[0]), abs(start[1] - goal[1])) <= ASTAR_DISTANCE:
+            route, reached = self._astar(start, goal)
+        if not reached:
+            detour = self._dijkstra_route(start, goal)
+            if detour is not None:
+                route = detour
+            elif route is None:
+                # Sem caminho na janela: a melhor aproximação do A*
+                route, _ = self._astar(start, goal)
+        if len(route):
+            self._remember(goal, route)
+        return route
+
+    def _cached_route(self, start, goal):
+        entries = self._routes.get(goal)
+        if not entries:
+            return None
+        # Descarta as rotas que o fogo entretanto cortou
+        entries[:] = [entry for entry in entries if self.route_is_clear(entry[0])]
+        for route, index in entries:
+            i = index.get(start)
+            if i is not None:
+                return route[i + 1:]
+        return None
+
+    def _remember(self, goal, route):
+        entries = self._routes.setdefault(goal, [])
+        index = {(int(x), int(y)): i for i, (x, y) in enumerate(route)}
+        entries.append((route, index))
+        if len(entries) > self.max_routes_per_goal:
+            entries.pop(0)
+
+    def _astar(self, start, goal):
+        width = self.model.world_width
+        height = self.model.world_height
+        cost = self._cost_list()
+        gx, gy = goal
+        goal_idx = gx * height + gy
+        start_idx = start[0] * height + start[1]
+        h_scale = MIN_COST * self.heuristic_weight
+
+        def heuristic(x, y):
+            return max(abs(x - gx), abs(y - gy)) * h_scale
+
+        g_score = {start_idx: 0.0}
+        came_from = {}
+        best_idx = start_idx
+        best_h = heuristic(*start)
+        open_heap = [(best_h, start_idx)]
+        closed = set()
+        expansions = 0
+
+        while open_heap and expansions < self.max_expansions:
+            _, current = heapq.heappop(open_heap)
+            if current in closed:
+                continue
+            if current == goal_idx:
+                best_idx = current
+                break
+            closed.add(current)
+            expansions += 1
+
+            cx, cy = divmod(current, height)
+            h = heuristic(cx, cy)
+            if h < best_h:
+                best_h, best_idx = h, current
+
+            base = g_score[current]
+            for dx, dy in NEIGHBOR_OFFSETS:
+                nx, ny = cx + dx, cy + dy
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                n_idx = nx * height + ny
+                step_cost = cost[n_idx]
+                if step_cost == math.inf:
+                    if n_idx != goal_idx:
+                        continue
+                    step_cost = 0.0  # Alvo bloqueado: basta chegar ao lado
+                tentative = base + step_cost
+                if tentative < g_score.get(n_idx, math.inf):
+                    g_score[n_idx] = tentative
+                    came_from[n_idx] = current
+                    heapq.heappush(
+                        open_heap, (tentative + heuristic(nx, ny), n_idx)
+                    )
+
+        # Reconstrói a rota (até ao alvo ou até à melhor célula explorada)
+        cells = []
+        node = best_idx
+        while node != start_idx:
+            cells.append(divmod(node, height))
+            node = came_from[node]
+        cells.reverse()
+        if cells and cells[-1] == goal and cost[goal_idx] == math.inf:
+            cells.pop()
+        return np.array(cells, dtype=np.int32).reshape(-1, 2), best_idx == goal_idx
+
+    def _dijkstra_route(self, start, goal):
+        """
+        Rota de custo mínimo de ``start`` até ``goal`` (ou até ao lado dele,
+        se estiver bloqueado) numa janela com DETOUR_MARGIN células de folga,
+        ou None se o alvo não for alcançável dentro da janela.
+        """
+        width, height = self.model.world_width, self.model.world_height
+        x0 = max(0, min(start[0], goal[0]) - DETOUR_MARGIN)
+        x1 = min(width, max(start[0], goal[0]) + DETOUR_MARGIN + 1)
+        y0 = max(0, min(start[1], goal[1]) - DETOUR_MARGIN)
+        y1 = min(height, max(start[1], goal[1]) + DETOUR_MARGIN + 1)
+        w, h = x1 - x0, y1 - y0
+        cost = COST_LUT[self.model.state_grid[x0:x1, y0:y1]]
+        flat = cost.ravel()
+        gx, gy = goal[0] - x0, goal[1] - y0
+        blocked_goal = not np.isfinite(cost[gx, gy])
+
+        # Arestas u -> v com o custo de entrar em v (só para v transitável);
+        # a grelha é regular, por isso as linhas CSR (u) já saem ordenadas
+        ux, uy = np.divmod(np.arange(w * h), h)
+        vx = ux[:, None] + _OFFSETS[:, 0]
+        vy = uy[:, None] + _OFFSETS[:, 1]
+        edges = (vx >= 0) & (vx < w) & (vy >= 0) & (vy < h)
+        v = np.where(edges, vx * h + vy, 0)
+        edges &= np.isfinite(flat[v])
+        indptr = np.zeros(w * h + 1, dtype=np.int64)
+        np.cumsum(edges.sum(axis=1), out=indptr[1:])
+        graph = csr_matrix((flat[v[edges]], v[edges], indptr), shape=(w * h, w * h))
+
+        source = (start[0] - x0) * h + (start[1] - y0)
+        distance, previous = dijkstra(graph, indices=source, return_predecessors=True)
+        if blocked_goal:
+            near = _OFFSETS + (gx, gy)
+            near = near[(near[:, 0] >= 0) & (near[:, 0] < w) & (near[:, 1] >= 0) & (near[:, 1] < h)]
+            near = near[:, 0] * h + near[:, 1]
+            node = int(near[distance[near].argmin()])
+        else:
+            node = gx * h + gy
+        if not np.isfinite(distance[node]):
+            return None
+        cells = []
+        while node != source:
+            cells.append(divmod(node, h))
+            node = previous[node]
+        cells.reverse()
+        return (np.array(cells, dtype=np.int32).reshape(-1, 2) + (x0, y0)).astype(np.int32)
@@ -6,63 +6,166 @@ import random
 # Third-party imports
 from mesa import Model
 from mesa.space import MultiGrid
+import numpy as np
 
 # Local imports
-from Agents.agentes import AirAgent, PatchAgent
+from Agents.agentes import (
+    AirAgent, PATCH_STATES, PatchAgent, SPREAD_COEFFICIENTS, STATE_CODES, new_state_grid,
+)
+from Agents.dispatcher import FireDispatcher
 from Agents.firefighter_agent import FirefighterAgent
+from Agents.firefighter_fleet import FirefighterFleet
+from Agents.firefighter_log import DecisionLog
+from Agents.route_planner import RoutePlanner
+from Environment.arrival_time import ArrivalTimePredictor
+from Environment.fire_field import FireField
+from Environment.fragulha_history import FragulhaHistory
+from Environment.heat import HeatField
+from Environment.parallel_spread import ParallelSpread
+from Environment.pollution import PollutionField
+from Environment.spread_engine import (
+    STATE_COLORS, PatchSpreadEngine, SequentialSpread, SpreadEngine,
+)
+from Environment.suppression import SuppressionField
+from Environment.terrain import FUEL_FACTORS, FUEL_TYPES, SPECIES_CODES
+from Environment.tiles import TileSet
+
+
+# Motores de propagação do fogo (ver Environment.spread_engine)
+SPREAD_ENGINES = {
+    "patches": PatchSpreadEngine,
+    "sequential": SequentialSpread,
+    "parallel": ParallelSpread,
+}
 
 
 class EnvironmentModel(Model):
     def __init__(self, width, height, density=0.8, eucalyptus_percentage=0.5,
-                 env_type="only_trees", num_firefighters=4, water_ratio=0.5):
+                 env_type="only_trees", num_firefighters=4, water_ratio=0.5,
+                 fragulha_retention="all", fragulha_sample_size=5000,
+                 fragulha_spill_dir=None, log_decisions=False,
+                 arrival_update_interval=1, dispatch_interval=1,
+                 pollution_resolution=4, air_sensors=(), heat_resolution=4,
+                 landscape=None, tile_size=None, spread_workers=None,
+                 spread_backend=None, spread_engine=None, spread_seed=None,
+                 spread_coefficients=None):
         super().__init__()
         self.world_width = width
         self.world_height = height
         self.running = True
-        self.grid = MultiGrid(width, height, torus=False)
+        # Com tile_size o terreno é criado em blocos, só onde o fogo ou as
+        # equipas chegam; sem ele é criado todo de início (modo denso)
+        self.tile_size = tile_size
+        self.grid = None
+        self.state_grid = new_state_grid(width, height)
         self.schedule = []
         self.fire_start_iter = {}  
-        
+        self.current_iteration = 0
+
+        # Coeficientes da propagação e das fagulhas (os de SPREAD_COEFFICIENTS
+        # com os valores dados em spread_coefficients)
+        unknown = set(spread_coefficients or {}) - set(SPREAD_COEFFICIENTS)
+        if unknown:
+            raise ValueError(
+                f"Coeficientes desconhecidos: {sorted(unknown)} "
+                f"(esperado de {tuple(SPREAD_COEFFICIENTS)})"
+            )
+        self.spread_coefficients = dict(SPREAD_COEFFICIENTS, **(spread_coefficients or {}))
+
+        # Registo estruturado das decisões dos bombeiros (desligado por omissão)
+        self.decision_log = DecisionLog(enabled=log_decisions)
 
         # Contador para IDs únicos
         self.agent_id_counter = 0
 
-        # Histórico das fagulhas
-        self.fragulha_history = {}
+        # Linhas de corte: camada raster + posições pela ordem de criação
+        self.firebreak_mask = np.zeros((width, height), dtype=bool)
+        self.firebreak_history = []
+
+        # Histórico das fagulhas (origem, queda e iteração)
+        self.fragulha_history = FragulhaHistory(
+            retention=fragulha_retention,
+            sample_size=fragulha_sample_size,
+            spill_dir=fragulha_spill_dir,
+        )
 
         # ------------------------------------------------------------------
         # Cria patches (floresta / estrada / rio)
         # ------------------------------------------------------------------
         self.env_type = env_type
-        road_y = height // 2
-        river_y = height // 3
-
-        for x in range(width):
-            for y in range(height):
-                patch = PatchAgent(self.agent_id_counter, self, (x, y))
-                self.agent_id_counter += 1
-
-                if self.env_type == "road_trees":
-                    if abs(y - road_y) <= 1:
-                        patch.state = "road"
-                        patch.pcolor = 85
-                        patch.altitude = 0
-                    else:
-                        self._make_forest_patch(patch, density, eucalyptus_percentage)
-
-                elif self.env_type == "river_trees":
-                    if abs(y - river_y) <= 1:
-                        patch.state = "river"
-                        patch.pcolor = 95
-                        patch.altitude = 0
-                    else:
-                        self._make_forest_patch(patch, density, eucalyptus_percentage)
-
-                else:  # only_trees
-                    self._make_forest_patch(patch, density, eucalyptus_percentage)
-
-                self.schedule.append(patch)
-                self.grid.place_agent(patch, (x, y))
+        # Terreno real (Environment.terrain.Landscape) em vez do procedural
+        self.landscape = landscape
+        if landscape is not None and landscape.shape != (width, height):
+            raise ValueError(
+                f"Terreno com forma {landscape.shape}, esperava {(width, height)}"
+            )
+        self._density = density
+        self._eucalyptus_percentage = eucalyptus_percentage
+        # Camadas estáticas do terreno em arrays (lidas em bloco pelos campos).
+        # Arrays a zeros só ocupam memória nas páginas escritas, por isso no
+        # modo em blocos a memória acompanha os blocos criados.
+        self.altitude_grid = np.zeros((width, height))
+        self.tree_height_grid = np.zeros((width, height))
+        self.fuel_grid = np.zeros((width, height))
+        self.species_grid = np.zeros((width, height), dtype=np.uint8)
+        self._landscape_grids = False
+
+        # Motor da propagação: os PatchAgent (referência) ou uma versão em
+        # arrays; com spread_workers, por omissão, a sequencial com o mapa
+        # dividido em faixas (ver Environment.parallel_spread)
+        if spread_engine is None:
+            spread_engine = "patches" if spread_workers is None else "parallel"
+        engine = SPREAD_ENGINES.get(spread_engine, spread_engine)
+        if not (isinstance(engine, type) and issubclass(engine, SpreadEngine)):
+            raise ValueError(
+                f"Motor de propagação desconhecido: {spread_engine!r} "
+                f"(esperado uma de {tuple(SPREAD_ENGINES)})"
+            )
+        # Nem todos os motores sabem trabalhar só nos blocos com fogo
+        if tile_size is not None and not engine.supports_tiles:
+            raise ValueError(f"O motor {spread_engine!r} não é compatível com tile_size")
+        spread_options = {}
+        if spread_workers is not None:
+            spread_options["workers"] = spread_workers
+        if spread_backend is not None:
+            spread_options["backend"] = spread_backend
+        # Semente dos sorteios dos motores em arrays (por omissão ao acaso)
+        if spread_seed is not None:
+            spread_options["seed"] = spread_seed
+        if engine.uses_patches and spread_options:
+            raise ValueError(
+                "spread_workers, spread_backend e spread_seed só se aplicam aos motores em arrays"
+            )
+
+        # Com um motor em arrays e as camadas do terreno usadas tal e qual, o
+        # estado inicial sai das camadas e os patches só são criados quando
+        # alguém os pede (ver patch_at): cada modelo fica só com o seu estado
+        self.lazy_patches = False
+        if tile_size is None:
+            block = landscape.window(0, width, 0, height) if landscape is not None else None
+            if block is not None:
+                self._use_landscape_grids(block)
+            self.lazy_patches = not engine.uses_patches and self._landscape_grids
+        if self.lazy_patches:
+            self.patch_grid = {}
+            self.state_grid[...] = self._landscape_states(block)
+        elif tile_size is None:
+            # Acesso direto ao patch de cada célula: patch_grid[x][y]
+            self.grid = MultiGrid(width, height, torus=False)
+            self.patch_grid = [[None] * height for _ in range(width)]
+            for x in range(width):
+                for y in range(height):
+                    patch = self._create_patch(x, y, block, x, y)
+                    if engine.uses_patches:
+                        self.schedule.append(patch)
+                    self.grid.place_agent(patch, (x, y))
+        else:
+            # Patches por célula e por bloco, criados a pedido (ver patch_at)
+            self.patch_grid = {}
+            self.tiles = TileSet(width, height, tile_size)
+            self.tile_patches = {}
+            # Caixa (x0, x1, y0, y1) que contém todas as células a arder
+            self.fire_box = None
 
         # ------------------------------------------------------------------
         # Agente do ar + Bombeiros
@@ -72,6 +175,34 @@ class EnvironmentModel(Model):
         self.agent_id_counter += 1
         self.schedule.append(self.air_agent)
 
+        # Temperatura local numa grelha grossa, aquecida pelas células a arder
+        self.heat = HeatField(width, height, resolution=heat_resolution)
+
+        # Campo de poluentes numa grelha grossa, com sensores pontuais
+        self.pollution = PollutionField(
+            width, height, resolution=pollution_resolution, sensors=air_sensors
+        )
+
+        # Campo de distância ao fogo, recalculado uma vez por passo
+        self.fire_field = FireField(width, height)
+        self._fire_field_tick = None
+
+        # Tempo previsto de chegada do fogo, recalculado a cada k passos
+        self.arrival_predictor = ArrivalTimePredictor(width, height)
+        self.arrival_update_interval = arrival_update_interval
+        self._arrival_tick = None
+
+        # Planeador de rotas partilhado pelas equipas
+        self.route_planner = RoutePlanner(self)
+
+        # Central de despacho: atribui alvos às equipas de água a cada k passos
+        self.dispatcher = FireDispatcher(self, interval=dispatch_interval)
+        self.firefighters = []
+        # Estado das equipas em arrays (posição, modo, técnica, extinção)
+        self.fleet = FirefighterFleet(self, capacity=num_firefighters)
+        # Esforço de supressão somado entre equipas (e acumulado para análise)
+        self.suppression = SuppressionField(width, height)
+
         # Bombeiros inseridos dinamicamente conforme sliders:
         border_positions = []
         # coleta todas as posições na borda do grid (células seguras nas extremidades)
@@ -89,19 +220,23 @@ class EnvironmentModel(Model):
             technique = "water" if idx < water_count else "alternative"
             firefighter = FirefighterAgent(self.agent_id_counter, self, (fx, fy), technique=technique)
             self.agent_id_counter += 1
+            self.firefighters.append(firefighter)
             self.schedule.append(firefighter)
-            self.grid.place_agent(firefighter, (fx, fy))
+        self.ensure_tiles(selected_positions)
 
         # ------------------------------------------------------------------
         # Parâmetros ambientais
         # ------------------------------------------------------------------
-        self.temperature = 25.0
+        self.temperature = 25.0          # Temperatura global (sobe com o fogo)
+        self.ambient_temperature = 25.0  # Ambiente do slider/tempo, base do campo de calor
         self.wind_direction = 0
         self.wind_speed = 2
         self.rain_level = 0
         self.humidity = 0
         self.itsrain_ = False
 
+        self.spread = engine(self, **spread_options)
+
     def _make_forest_patch(self, patch, density, eucalyptus_percentage):
         if random.random() > density:
             patch.state = "empty"
@@ -119,29 +254,290 @@ class EnvironmentModel(Model):
                 patch.pcolor = 55
                 patch.factor_type_tree = 0.5
 
+    def _create_patch(self, x, y, block, bx, by):
+        """
+        Cria o patch da célula (x, y). ``block`` é a janela do terreno real
+        que contém a célula, na posição local (bx, by), ou None.
+        """
+        patch = PatchAgent(self.agent_id_counter, self, (x, y))
+        self.agent_id_counter += 1
+        density = self._density
+        eucalyptus_percentage = self._eucalyptus_percentage
+
+        if block is not None:
+            self._make_landscape_patch(patch, block, bx, by)
+
+        elif self.env_type == "road_trees":
+            if abs(y - self.world_height // 2) <= 1:
+                patch.state = "road"
+                patch.pcolor = 85
+                patch.altitude = 0
+            else:
+                self._make_forest_patch(patch, density, eucalyptus_percentage)
+
+        elif self.env_type == "river_trees":
+            if abs(y - self.world_height // 3) <= 1:
+                patch.state = "river"
+                patch.pcolor = 95
+                patch.altitude = 0
+            else:
+                self._make_forest_patch(patch, density, eucalyptus_percentage)
+
+        else:  # only_trees
+            self._make_forest_patch(patch, density, eucalyptus_percentage)
+
+        if not self._landscape_grids:
+            self.altitude_grid[x, y] = patch.altitude
+            self.tree_height_grid[x, y] = patch.tree_height
+            self.fuel_grid[x, y] = patch.factor_type_tree
+            self.species_grid[x, y] = SPECIES_CODES[patch.tree_type]
+        if isinstance(self.patch_grid, dict):
+            self.patch_grid[(x, y)] = patch
+        else:
+            self.patch_grid[x][y] = patch
+        return patch
+
+    def _landscape_states(self, landscape):
+        """Códigos de estado iniciais das células de ``landscape`` (como _make_landscape_patch)."""
+        state = np.where(FUEL_FACTORS[landscape.fuel] > 0,
+                         STATE_CODES["forested"], STATE_CODES["empty"]).astype(np.int8)
+        if landscape.road is not None:
+            state[landscape.road] = STATE_CODES["road"]
+        if landscape.water is not None:
+            state[landscape.water] = STATE_CODES["river"]
+        return state
+
+    def _use_landscape_grids(self, landscape):
+        """
+        Usa as camadas do terreno como grelhas estáticas do modelo, sem as
+        copiar, quando já estão na forma final (combustível e altura dadas,
+        altitude e combustível a zero na água e na estrada). Assim vários
+        modelos podem ler o mesmo terreno em memória partilhada.
+        """
+        if landscape.fuel is None or landscape.tree_height is None:
+            return
+        if landscape.altitude.dtype != float or landscape.tree_height.dtype != float:
+            return
+        fuel = landscape.fuel
+        if fuel.dtype != np.uint8 or (fuel.size and fuel.max() >= len(FUEL_FACTORS)):
+            return
+        blocked = np.zeros(fuel.shape, dtype=bool)
+        for mask in (landscape.water, landscape.road):
+            if mask is not None:
+                blocked |= mask
+        if (landscape.altitude[blocked] != 0).any() or (fuel[blocked] != 0).any():
+            return
+        self.altitude_grid = landscape.altitude
+        self.tree_height_grid = landscape.tree_height
+        self.species_grid = fuel
+        self.fuel_grid = FUEL_FACTORS[fuel]
+        self._landscape_grids = True
+
+    def _materialize_tile(self, tile):
+        """Cria os patches de um bloco (gerador procedural ou terreno real)."""
+        x0, x1, y0, y1 = self.tiles.cell_bounds(tile)
+        block = None
+        if self.landscape is not None:
+            block = self.landscape.window(x0, x1, y0, y1)
+        patches = []
+        for x in range(x0, x1):
+            for y in range(y0, y1):
+                patches.append(self._create_patch(x, y, block, x - x0, y - y0))
+        self.tile_patches[tile] = patches
+        self.tiles.add(tile)
+
+    def ensure_tiles(self, cells):
+        """Garante que os blocos das células (N, 2) existem (só no modo em blocos)."""
+        if self.tile_size is None:
+            return
+        for tile in self.tiles.tiles_of(cells):
+            if tile not in self.tiles:
+                self._materialize_tile(tile)
+
+    def ensure_window(self, window):
+        """Garante que os blocos que tocam a janela (x0, x1, y0, y1) existem (só no modo em blocos)."""
+        if self.tile_size is None:
+            return
+        for tile in self.tiles.tiles_in(window):
+            if tile not in self.tiles:
+                self._materialize_tile(tile)
+
+    def note_burning(self, pos):
+        """Alarga a caixa do fogo com uma célula que passou a arder."""
+        x, y = pos
+        if self.fire_box is None:
+            self.fire_box = (x, x + 1, y, y + 1)
+        else:
+            x0, x1, y0, y1 = self.fire_box
+            self.fire_box = (min(x0, x), max(x1, x + 1), min(y0, y), max(y1, y + 1))
+
+    def _shrink_fire_box(self):
+        """Encolhe a caixa do fogo às células que ainda estão a arder."""
+        if self.fire_box is None:
+            return
+        x0, x1, y0, y1 = self.fire_box
+        burning = np.argwhere(self.state_grid[x0:x1, y0:y1] == STATE_CODES["burning"])
+        if len(burning) == 0:
+            self.fire_box = None
+            return
+        self.fire_box = (x0 + int(burning[:, 0].min()), x0 + int(burning[:, 0].max()) + 1,
+                         y0 + int(burning[:, 1].min()), y0 + int(burning[:, 1].max()) + 1)
+
+    def active_window(self):
+        """
+        Janela (x0, x1, y0, y1) onde correm os cálculos em bloco: o mapa
+        inteiro no modo denso; no modo em blocos, a caixa do fogo alargada
+        em um bloco para cada lado (vazia sem fogo).
+        """
+        if self.tile_size is None:
+            return (0, self.world_width, 0, self.world_height)
+        if self.fire_box is None:
+            return (0, 0, 0, 0)
+        x0, x1, y0, y1 = self.fire_box
+        m = self.tile_size
+        return (max(0, x0 - m), min(self.world_width, x1 + m),
+                max(0, y0 - m), min(self.world_height, y1 + m))
+
+    def _make_landscape_patch(self, patch, landscape, x, y):
+        """Preenche o patch a partir da janela ``landscape`` (posição local x, y)."""
+        patch.altitude = landscape.altitude[x, y]
+
+        if landscape.water is not None and landscape.water[x, y]:
+            patch.state = "river"
+            patch.pcolor = 95
+            patch.altitude = 0
+        elif landscape.road is not None and landscape.road[x, y]:
+            patch.state = "road"
+            patch.pcolor = 85
+            patch.altitude = 0
+        elif landscape.fuel is not None:
+            tree_type, factor, color = FUEL_TYPES.get(int(landscape.fuel[x, y]), FUEL_TYPES[0])
+            patch.state = "forested" if factor > 0 else "empty"
+            patch.tree_type = tree_type
+            patch.factor_type_tree = factor
+            patch.pcolor = color
+        else:
+            self._make_forest_patch(patch, self._density, self._eucalyptus_percentage)
+
+        if landscape.tree_height is not None:
+            patch.tree_height = landscape.tree_height[x, y]
+
+    def burning_cells(self):
+        """Células (N, 2) a arder dentro da janela ativa."""
+        x0, x1, y0, y1 = self.active_window()
+        burning = self.state_grid[x0:x1, y0:y1] == STATE_CODES["burning"]
+        return np.argwhere(burning) + (x0, y0)
+
     def step(self):
+        if self.tile_size is not None:
+            self._shrink_fire_box()
+
+        # Temperatura local: ambiente (valor do slider) + calor do fogo. Não
+        # usa self.temperature, que já inclui o aquecimento global do fogo
+        self.heat.update(self.burning_cells(), self.ambient_temperature)
+
+        # Propagação do fogo (no modo denso os PatchAgent avançam na sua vez)
+        self.spread.step()
+
+        # As equipas avançam todas juntas, na sua vez no scheduler
+        fleet_stepped = False
         for agent in self.schedule[:]:
+            if isinstance(agent, FirefighterAgent):
+                if not fleet_stepped:
+                    self.fleet.step()
+                    fleet_stepped = True
+                continue
             agent.step()
+        self.spread.end_step()
 
-        burning = sum(
-            1 for a in self.schedule if getattr(a, "state", None) == "burning"
-        )
+        burning = len(self.burning_cells())
         target_temp = 25.0 + burning * 0.5
         self.temperature += (target_temp - self.temperature) * 0.1
 
+    def fire_active(self):
+        """Ainda há fogo: células a arder ou fagulhas no ar."""
+        return len(self.burning_cells()) > 0 or self.spread.fragulhas_in_flight()
+
+    def close(self):
+        """
+        Liberta os recursos da propagação (processos e memória partilhada) e
+        apaga as fagulhas escritas em disco.
+        """
+        self.spread.close()
+        self.fragulha_history.close()
+
+    def patch_at(self, pos):
+        """Devolve o PatchAgent da célula ``pos`` (criando-o, ou o bloco, se preciso)."""
+        if not isinstance(self.patch_grid, dict):
+            return self.patch_grid[pos[0]][pos[1]]
+        patch = self.patch_grid.get(pos)
+        if patch is None:
+            if self.lazy_patches:
+                return self._create_lazy_patch(pos)
+            self._materialize_tile(self.tiles.tile_of(pos))
+            patch = self.patch_grid[pos]
+        return patch
+
+    def created_patch(self, pos):
+        """O PatchAgent da célula ``pos`` se já existir, senão None (não o cria)."""
+        if not isinstance(self.patch_grid, dict):
+            return self.patch_grid[pos[0]][pos[1]]
+        return self.patch_grid.get(pos)
+
+    def _create_lazy_patch(self, pos):
+        """Cria o patch de uma célula a partir do terreno, com o estado atual da grelha."""
+        x, y = pos
+        code = self.state_grid[x, y]
+        patch = self._create_patch(x, y, self.landscape.window(x, x + 1, y, y + 1), 0, 0)
+        name = PATCH_STATES[code]
+        if patch.state != name:
+            # A propagação já mudou a célula: o patch passa a ter esse estado
+            patch.state = name
+            patch.pcolor = STATE_COLORS.get(name, patch.pcolor)
+        return patch
+
+    def record_firebreak(self, pos):
+        """Regista uma célula de linha de corte (sem duplicados, em O(1))."""
+        if not self.firebreak_mask[pos]:
+            self.firebreak_mask[pos] = True
+            self.firebreak_history.append(pos)
+
+    def get_fire_field(self):
+        """Devolve o campo de distância ao fogo da iteração atual."""
+        if self._fire_field_tick != self.steps:
+            self.fire_field.update(self.state_grid, self.active_window())
+            self._fire_field_tick = self.steps
+        return self.fire_field
+
+    def get_arrival_field(self):
+        """Devolve o preditor de chegada do fogo, atualizado a cada k passos."""
+        if (self._arrival_tick is None
+                or self.steps - self._arrival_tick >= self.arrival_update_interval):
+            self.arrival_predictor.update(self)
+            self._arrival_tick = self.steps
+        return self.arrival_predictor
+
     def start_fire(self):
-        forested = [
-            a for a in self.schedule if getattr(a, "state", None) == "forested"
-        ]
-        if forested:
-            chosen = random.choice(forested)
+        if self.tile_size is not None:
+            # Ponto ao acaso em todo o mapa; o seu bloco passa a existir
+            pos = (random.randrange(self.world_width), random.randrange(self.world_height))
+            self.ensure_tiles([pos])
+            x0, x1, y0, y1 = self.tiles.cell_bounds(self.tiles.tile_of(pos))
+        else:
+            x0, x1, y0, y1 = self.active_window()
+        forested = np.argwhere(
+            self.state_grid[x0:x1, y0:y1] == STATE_CODES["forested"]
+        ) + (x0, y0)
+        if len(forested):
+            x, y = forested[random.randrange(len(forested))].tolist()
+            chosen = self.patch_at((x, y))
             chosen.state = "burning"
             chosen.pcolor = 15
             if chosen.pos not in self.fire_start_iter:
                 self.fire_start_iter[chosen.pos] = self.current_iteration
 
     def stop_fire(self):
-        for agent in self.schedule:
-            if getattr(agent, "state", None) == "burning":
-                agent.state = "burned"
-                agent.pcolor = 5
+        for x, y in self.burning_cells().tolist():
+            patch = self.patch_at((x, y))
+            patch.state = "burned"
+            patch.pcolor = 5
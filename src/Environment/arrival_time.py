@@ -0,0 +1,130 @@
+# arrival_time.py
+
+# Standard library imports
+import math
+
+# Third-party imports
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+# Local imports
+from Agents.agentes import STATE_CODES
+
+
+BURNING = STATE_CODES["burning"]
+# Estados que o fogo ainda pode atravessar
+FUEL_STATES = (STATE_CODES["forested"], STATE_CODES["dangered"])
+
+NEIGHBOR_OFFSETS = (
+    (-1, -1), (-1, 0), (-1, 1), (0, -1),
+    (0, 1), (1, -1), (1, 0), (1, 1),
+)
+
+
+class ArrivalTimePredictor:
+    """
+    Estimativa do tempo (em iterações) até o fogo chegar a cada célula.
+
+    Constrói um grafo dirigido entre vizinhos de Moore em que o peso de
+    u -> v é o tempo esperado de ignição de v a partir de u em chamas
+    (1 / probabilidade por passo, com a mesma fórmula de PatchAgent.step:
+    vento, combustível, altitude, altura, humidade, chuva e temperatura) e
+    corre um Dijkstra com múltiplas fontes a partir das células a arder,
+    na janela ativa do modelo. Células sem combustível (ou fora da janela)
+    ficam com tempo infinito.
+    """
+
+    def __init__(self, width, height, min_probability=0.02):
+        self.width = width
+        self.height = height
+        self.min_probability = min_probability
+        self.window = (0, 0, 0, 0)  # Janela onde o campo foi calculado
+        self.arrival = np.empty((0, 0))
+        self.computed_at = 0  # Iteração em que o campo foi calculado
+        self._edges_shape = None
+        self._edges = []
+
+    def _build_edges(self, width, height):
+        """Pares (origem, destino) de cada direção para uma janela width x height."""
+        if self._edges_shape == (width, height):
+            return self._edges
+        index = np.arange(width * height).reshape(width, height)
+        self._edges = []
+        for dx, dy in NEIGHBOR_OFFSETS:
+            src = index[max(0, -dx):width - max(0, dx), max(0, -dy):height - max(0, dy)]
+            dst = index[max(0, dx):width - max(0, -dx), max(0, dy):height - max(0, -dy)]
+            self._edges.append((dx, dy, src.ravel(), dst.ravel()))
+        self._edges_shape = (width, height)
+        return self._edges
+
+    def eta(self, cells, step):
+        """Tempo previsto, a partir da iteração ``step``, até o fogo chegar a ``cells`` (N, 2)."""
+        cells = np.asarray(cells)
+        x0, x1, y0, y1 = self.window
+        inside = ((cells[:, 0] >= x0) & (cells[:, 0] < x1) &
+                  (cells[:, 1] >= y0) & (cells[:, 1] < y1))
+        times = np.full(len(cells), np.inf)
+        local = cells[inside]
+        times[inside] = self.arrival[local[:, 0] - x0, local[:, 1] - y0]
+        return times - (step - self.computed_at)
+
+    def update(self, model):
+        """Recalcula o campo de chegada na janela ativa do modelo."""
+        self.computed_at = model.steps
+        self.window = model.active_window()
+        x0, x1, y0, y1 = self.window
+        width, height = x1 - x0, y1 - y0
+        window = (slice(x0, x1), slice(y0, y1))
+        state = model.state_grid[window].ravel()
+        sources = np.flatnonzero(state == BURNING)
+        if len(sources) == 0:
+            self.arrival = np.full((width, height), np.inf)
+            return self.arrival
+
+        fuel = np.isin(state, FUEL_STATES)
+        spreads = fuel | (state == BURNING)
+
+        # Parte do fator combinado que depende apenas da célula em chamas
+        coefficients = model.spread_coefficients
+        alfa_altitude = coefficients["alfa_altitude"]
+        altitude = model.altitude_grid[window].ravel()
+        altitude_factor = np.where(
+            altitude <= 0, alfa_altitude,
+            alfa_altitude / np.maximum(altitude, 1e-9)
+        )
+        precip_factor = 0.0 if model.itsrain_ else 0.5 * coefficients["alfa_precip"]
+        humidity_factor = coefficients["alfa_humidade"] / max(model.humidity, 1)
+        base_factor = (
+            altitude_factor
+            + precip_factor
+            + model.tree_height_grid[window].ravel() * coefficients["alfa_altura"]
+            + humidity_factor
+            + model.heat.temperature_map(self.window).ravel() * coefficients["alfa_temperatura"]
+        )
+        fuel_factor = model.fuel_grid[window].ravel()
+
+        # Raio de propagação por passo (como em PatchAgent.step)
+        reach = 1 + round(model.wind_speed / 10)
+        wind_r = model.wind_speed * 0.0666667 * coefficients["alfa_vento"]
+        math_wind_angle = math.radians(90 - model.wind_direction)
+
+        rows, cols, weights = [], [], []
+        for dx, dy, src, dst in self._build_edges(width, height):
+            keep = spreads[src] & fuel[dst]
+            s, d = src[keep], dst[keep]
+            wind_factor = math.cos(math.atan2(dy, dx) - math_wind_angle) * wind_r
+            prob = (base_factor[s] + wind_factor) * fuel_factor[s] / math.hypot(dx, dy)
+            prob = np.clip(prob, self.min_probability, 1.0)
+            rows.append(s)
+            cols.append(d)
+            weights.append(1.0 / (prob * reach))
+
+        n = width * height
+        graph = csr_matrix(
+            (np.concatenate(weights), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(n, n),
+        )
+        times = dijkstra(graph, directed=True, indices=sources, min_only=True)
+        self.arrival = times.reshape(width, height)
+        return self.arrival
@@ -0,0 +1,245 @@
+# batch_ensemble.py
+"""
+Conjuntos de Monte Carlo da propagação livre do fogo (sem equipas), com as
+réplicas de cada lote avançadas em conjunto numa pilha (R, W, H) de estados.
+
+Responde a uma pergunta diferente da de ensemble.run_ensemble: lá cada
+réplica tem o seu terreno procedural (o da sua semente) e as equipas do
+cenário combatem o fogo; aqui as réplicas de um lote partilham o terreno da
+primeira semente do lote e não há equipas. Com um ``landscape`` o terreno é
+o mesmo nos dois casos e fica só a diferença das equipas.
+
+    ensemble = BatchedEnsemble(make_scenario(model={"num_firefighters": 0}), range(64))
+    mapa = ensemble.run().aggregate()
+"""
+
+# Standard library imports
+import inspect
+import random
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from Environment.ambiente import EnvironmentModel
+from Environment.ensemble import BurnProbability
+from Environment.heat import HeatField
+from Environment.result_cache import result_key
+from Environment.spread_engine import BACKENDS, spread_backend
+from Environment.spread_kernel import (
+    BURNED, BURNING, DANGERED, FORESTED, SpreadLayers, step_key,
+)
+
+# Argumentos do EnvironmentModel que escolhem o motor da propagação; aqui o
+# motor é o lote (os restantes, como spread_coefficients, passam ao modelo)
+_ENGINE_ARGS = ("spread_engine", "spread_workers", "spread_backend", "spread_seed")
+
+
+class BatchedEnsemble:
+    """
+    R réplicas de um cenário sem equipas (ver ensemble.make_scenario)
+    avançadas em
+    conjunto, com o estado numa pilha (R, W, H) e uma única chamada da regra
+    de propagação por iteração para todas as réplicas (sweep_batch, com a
+    ordem dos PatchAgent de SequentialSpread).
+
+    As réplicas partilham o terreno: o ``landscape`` dado ou o procedural
+    gerado com ``terrain_seed`` (por omissão a primeira semente). Cada
+    réplica tem o seu gerador (a ignição quando o cenário não a fixa, a
+    chuva e a deriva do vento, como em SimulationApp.simulation_step), a
+    sua chave dos sorteios da propagação e o seu campo de calor. É a
+    propagação livre do fogo: um cenário com equipas (num_firefighters > 0,
+    ou omitido, que no EnvironmentModel vale 4) dá ValueError. As réplicas
+    em que o fogo se apagou (sem células a arder nem fagulhas no ar)
+    deixam de avançar.
+
+    Com ``weather_drift=False`` o tempo fica fixo nos valores do cenário.
+    """
+
+    def __init__(self, scenario, seeds, backend=None, landscape=None, weather_drift=True,
+                 terrain_seed=None):
+        crews = scenario["model"].get(
+            "num_firefighters",
+            inspect.signature(EnvironmentModel).parameters["num_firefighters"].default,
+        )
+        if crews:
+            raise ValueError(
+                f"O cenário tem {crews} equipas; BatchedEnsemble só simula a propagação "
+                "livre do fogo (use num_firefighters=0 ou ensemble.run_ensemble)"
+            )
+        self.scenario = scenario
+        self.seeds = list(seeds)
+        self.terrain_seed = self.seeds[0] if terrain_seed is None else terrain_seed
+        self.backend = spread_backend(backend)
+        self.weather_drift = weather_drift
+        replicates = len(self.seeds)
+        width, height = scenario["width"], scenario["height"]
+        self.width, self.height = width, height
+
+        # Terreno partilhado, lido de um EnvironmentModel sem equipas
+        random.seed(self.terrain_seed)
+        model_kwargs = {
+            name: value for name, value in scenario["model"].items()
+            if name not in _ENGINE_ARGS
+        }
+        model_kwargs.update(spread_engine="sequential")
+        template = EnvironmentModel(width, height, landscape=landscape, **model_kwargs)
+        resolution = template.heat.resolution
+        coefficients = template.spread_coefficients
+
+        state = np.repeat(template.state_grid[None], replicates, axis=0)
+        self.heat_fields = [HeatField(width, height, resolution=resolution)
+                            for _ in range(replicates)]
+        heat = np.zeros((replicates,) + self.heat_fields[0].shape)
+        for field, excess in zip(self.heat_fields, heat):
+            field.excess = excess
+        self.batch = SpreadLayers(
+            state, np.zeros(state.shape, dtype=np.int8), np.zeros(state.shape, dtype=np.int8),
+            template.altitude_grid, template.tree_height_grid, template.fuel_grid,
+            template.species_grid, heat, resolution,
+        )
+        template.close()
+
+        # Gerador, chave e tempo de cada réplica
+        self.rngs = [random.Random(seed) for seed in self.seeds]
+        self.keys_seed = [rng.getrandbits(64) for rng in self.rngs]
+        weather = scenario["weather"]
+        self.weathers = [
+            {
+                "wind_speed": weather["wind_speed"],
+                "wind_direction": weather["wind_direction"],
+                "humidity": weather["humidity"],
+                "rain_level": weather["rain_level"],
+                "itsrain": False,
+                "ambient": weather["temperature"],
+                "coefficients": coefficients,
+            }
+            for _ in range(replicates)
+        ]
+
+        # Ignição
+        self.ignition = np.full(state.shape, -1, dtype=np.int32)
+        for r, rng in enumerate(self.rngs):
+            if scenario["ignition"] is not None:
+                x, y = scenario["ignition"]
+            else:
+                forested = np.argwhere(state[r] == FORESTED)
+                if not len(forested):
+                    continue
+                x, y = forested[rng.randrange(len(forested))].tolist()
+            state[r, x, y] = BURNING
+            self.ignition[r, x, y] = 0
+
+        self.iteration = 0
+        self.alive = (state == BURNING).any(axis=(1, 2))
+        self._pending = np.empty((0, 5), dtype=np.int64)
+
+    @property
+    def burned(self):
+        """Máscara (R, W, H) das células queimadas ou a arder."""
+        state = self.batch.state
+        return (state == BURNING) | (state == BURNED)
+
+    def _update_weather(self, r):
+        weather, rng = self.weathers[r], self.rngs[r]
+        if self.iteration % 20 == 0:
+            weather["itsrain"] = rng.random() < weather["rain_level"]
+        weather["wind_direction"] = (weather["wind_direction"] + rng.uniform(-1, 1)) % 360
+        weather["wind_speed"] = max(weather["wind_speed"] + rng.uniform(-0.3, 0.3), 0)
+
+    def step(self):
+        """Avança uma iteração em todas as réplicas com fogo."""
+        state = self.batch.state
+        kernel = BACKENDS[self.backend]
+        active = ((state == BURNING) | (state == DANGERED)).any(axis=2)
+        x_start = np.where(active.any(axis=1), active.argmax(axis=1), -1)
+        keys = [step_key(seed, self.iteration) for seed in self.keys_seed]
+        for r in range(len(self.seeds)):
+            if not self.alive[r]:
+                x_start[r] = -1
+                continue
+            if self.weather_drift:
+                self._update_weather(r)
+            self.heat_fields[r].update(
+                np.argwhere(state[r] == BURNING), self.weathers[r]["ambient"]
+            )
+
+        dropped = kernel.sweep_batch(self.batch, x_start, self.weathers, keys)
+
+        # As fagulhas da iteração anterior caem no fim desta
+        landing, self._pending = self._pending, dropped
+        for r in np.unique(landing[:, 0]).tolist():
+            layers = SpreadLayers(
+                state[r], self.batch.burn_time[r], self.batch.dangered_time[r],
+                None, None, None, None, None, self.batch.heat_resolution,
+            )
+            kernel.land_fragulhas(layers, landing[landing[:, 0] == r, 1:],
+                                  self.weathers[r], keys[r])
+
+        self.iteration += 1
+        on_fire = self.burned
+        self.ignition[on_fire & (self.ignition < 0)] = self.iteration
+        in_flight = np.zeros(len(self.seeds), dtype=bool)
+        in_flight[self._pending[:, 0]] = True
+        self.alive = (state == BURNING).any(axis=(1, 2)) | in_flight
+
+    def run(self, steps=None):
+        """Avança até ``steps`` iterações (as do cenário) ou até todos os fogos se apagarem."""
+        steps = self.scenario["steps"] if steps is None else steps
+        for _ in range(steps):
+            if not self.alive.any():
+                break
+            self.step()
+        return self
+
+    def aggregate(self, result=None):
+        """Junta as réplicas a um BurnProbability (um novo por omissão)."""
+        if result is None:
+            result = BurnProbability(self.width, self.height)
+        for burned, ignition in zip(self.burned, self.ignition):
+            result.add(burned, ignition)
+        return result
+
+
+def run_batched_ensemble(scenario, runs, batch_size=64, first_seed=0, backend=None,
+                         landscape=None, weather_drift=True, cache=None):
+    """
+    Corre ``runs`` réplicas da propagação livre do cenário (sem equipas,
+    ver BatchedEnsemble) em lotes de ``batch_size`` e devolve o
+    BurnProbability agregado (a memória depende só do tamanho do lote).
+
+    Ao contrário de ensemble.run_ensemble, em que a réplica da semente s
+    corre no terreno procedural de s, aqui as réplicas de um lote correm
+    todas no terreno da primeira semente do lote: o resultado varia com
+    ``batch_size`` e só tem ``runs / batch_size`` terrenos diferentes. Com
+    um ``landscape`` o terreno é o mesmo em todas as réplicas e o resultado
+    não depende do lote. Com ``cache`` (result_cache.ResultCache) cada
+    réplica é procurada na cache e o lote só corre as que faltam, com o
+    mesmo terreno.
+    """
+    result = BurnProbability(scenario["width"], scenario["height"])
+    for start in range(first_seed, first_seed + runs, batch_size):
+        seeds = list(range(start, min(start + batch_size, first_seed + runs)))
+        keys, missing = {}, []
+        if cache is not None:
+            config = {"scenario": scenario, "terrain_seed": start,
+                      "weather_drift": weather_drift}
+            for seed in seeds:
+                keys[seed] = result_key("batch", config, seed, landscape,
+                                        code=(BatchedEnsemble,))
+                cached = cache.get(keys[seed])
+                if cached is None:
+                    missing.append(seed)
+                else:
+                    result.add(cached["burned"], cached["ignition"])
+        else:
+            missing = seeds
+        if not missing:
+            continue
+        ensemble = BatchedEnsemble(scenario, missing, backend=backend, landscape=landscape,
+                                   weather_drift=weather_drift, terrain_seed=start)
+        ensemble.run().aggregate(result)
+        if cache is not None:
+            for seed, burned, ignition in zip(missing, ensemble.burned, ensemble.ignition):
+                cache.put(keys[seed], burned=burned, ignition=ignition)
+    return result
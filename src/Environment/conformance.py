@@ -0,0 +1,261 @@
+# conformance.py
+"""
+Teste estatístico de conformidade dos motores de propagação.
+
+Um motor em arrays não reproduz os PatchAgent sorteio a sorteio (os números
+aleatórios vêm de outra fonte), por isso é comparado com a referência pela
+distribuição de métricas do fogo em várias simulações com o mesmo tempo:
+área ardida, duração, deslocamento do centro no sentido do vento e
+alongamento. Cada métrica falha por qualquer de dois critérios: a diferença
+das médias passa a tolerância, ou o teste de Kolmogorov-Smirnov com
+tolerância rejeita que as distribuições difiram menos do que ela (ver
+compare_samples).
+
+O teste corre em cada regime de WEATHER_REGIMES (por omissão todos) e o
+motor só é conforme se passar em todos:
+
+    python -m Environment.conformance --engine sequential --runs 30
+    python -m Environment.conformance --engine sequential --regime cenario
+
+O "sequential" passa, e o "parallel" também (a ordem das faixas só muda os
+resultados junto às fronteiras delas).
+"""
+
+# Standard library imports
+import argparse
+import contextlib
+import io
+import math
+import random
+import sys
+import warnings
+
+# Third-party imports
+import numpy as np
+from scipy import stats
+
+# Local imports
+from Agents.agentes import STATE_CODES
+from Environment.ambiente import EnvironmentModel
+from Environment.ensemble import DEFAULT_SCENARIO
+
+
+METRICS = ("burned_area", "duration", "downwind_shift", "elongation")
+
+# Tempo fixo das simulações de conformidade
+DEFAULT_WEATHER = {
+    "wind_speed": 8,
+    "wind_direction": 45,
+    "humidity": 15,
+    "rain_level": 0.5,
+    "itsrain": False,
+    "temperature": 0,
+}
+
+# Regimes de tempo testados: a 0 °C as probabilidades de ignição não
+# saturam; o do cenário por omissão (25 °C) é o tempo realista da aplicação
+WEATHER_REGIMES = {
+    "frio": DEFAULT_WEATHER,
+    "cenario": dict(DEFAULT_SCENARIO["weather"], itsrain=False),
+}
+
+
+def spread_metrics(state_grid, origin, wind_direction, duration):
+    """Métricas de um fogo a partir da grelha de estados final."""
+    affected = np.argwhere(
+        (state_grid == STATE_CODES["burned"]) | (state_grid == STATE_CODES["burning"])
+    ).astype(float)
+    metrics = {"burned_area": float(len(affected)), "duration": float(duration)}
+    if len(affected) == 0:
+        metrics.update(downwind_shift=0.0, elongation=1.0)
+        return metrics
+
+    # Sentido do vento como nas fagulhas: (sin a, -cos a)
+    angle = math.radians(wind_direction)
+    shift = affected.mean(axis=0) - np.asarray(origin, dtype=float)
+    metrics["downwind_shift"] = float(shift[0] * math.sin(angle) - shift[1] * math.cos(angle))
+
+    # Razão entre os eixos principais da nuvem de células afetadas
+    if len(affected) < 3:
+        metrics["elongation"] = 1.0
+    else:
+        eigen = np.linalg.eigvalsh(np.cov(affected.T))
+        metrics["elongation"] = float(math.sqrt(eigen[-1] / max(eigen[0], 1e-9)))
+    return metrics
+
+
+def run_engine(engine, seeds, width=100, height=100, steps=25, weather=None,
+               **model_kwargs):
+    """
+    Corre uma simulação por semente com o motor ``engine`` e devolve as
+    métricas de cada uma ({métrica: array}). O fogo começa no centro do mapa
+    e não há equipas, para comparar só a propagação.
+    """
+    weather = dict(DEFAULT_WEATHER, **(weather or {}))
+    model_kwargs.setdefault("num_firefighters", 0)
+    samples = {name: [] for name in METRICS}
+    for seed in seeds:
+        random.seed(seed)
+        np.random.seed(seed % 2**32)
+        model = EnvironmentModel(width, height, spread_engine=engine, **model_kwargs)
+        try:
+            model.wind_speed = weather["wind_speed"]
+            model.wind_direction = weather["wind_direction"]
+            model.humidity = weather["humidity"]
+            model.rain_level = weather["rain_level"]
+            model.itsrain_ = weather["itsrain"]
+
+            origin = (width // 2, height // 2)
+            patch = model.patch_at(origin)
+            patch.state = "burning"
+            patch.pcolor = 15
+            patch.burn_time = None
+
+            duration = steps
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i in range(steps):
+                    # Como main.py: a temperatura volta ao valor do slider
+                    model.temperature = weather["temperature"]
+                    model.ambient_temperature = weather["temperature"]
+                    model.current_iteration = i
+                    model.step()
+                    if not (model.state_grid == STATE_CODES["burning"]).any():
+                        duration = i + 1
+                        break
+            metrics = spread_metrics(
+                model.state_grid, origin, weather["wind_direction"], duration
+            )
+        finally:
+            model.close()
+        for name in METRICS:
+            samples[name].append(metrics[name])
+    return {name: np.array(values) for name, values in samples.items()}
+
+
+def metric_scale(name, reference):
+    """
+    Escala das diferenças de uma métrica: a média da referência, ou, no
+    deslocamento no sentido do vento (que sem vento anda perto de 0), o raio
+    médio da área ardida da referência.
+    """
+    if name == "downwind_shift":
+        return max(math.sqrt(np.mean(reference["burned_area"]) / math.pi), 1e-9)
+    return max(abs(np.mean(reference[name])), 1e-9)
+
+
+def ks_tolerance(reference, candidate, delta):
+    """
+    Teste KS de duas amostras com tolerância ``delta``: a estatística é o
+    quanto a função de distribuição do motor sai da banda entre as da
+    referência deslocadas de -``delta`` e +``delta`` (com ``delta`` = 0 é o
+    teste KS habitual). Devolve (estatística, p assintótico).
+    """
+    ref = np.sort(reference)
+    cand = np.sort(candidate)
+    points = np.concatenate([cand, ref - delta, ref + delta])
+    cdf_cand = np.searchsorted(cand, points, side="right") / len(cand)
+    # Limite inferior da banda: referência deslocada para a direita
+    below = np.searchsorted(ref, points - delta, side="right") / len(ref) - cdf_cand
+    # Limite superior: referência deslocada para a esquerda
+    above = cdf_cand - np.searchsorted(ref, points + delta, side="right") / len(ref)
+    statistic = float(max(below.max(), above.max(), 0.0))
+    n, m = len(ref), len(cand)
+    pvalue = float(stats.kstwobign.sf(statistic * math.sqrt(n * m / (n + m))))
+    return statistic, min(pvalue, 1.0)
+
+
+def compare_samples(reference, candidate, alpha=0.01, tolerance=0.1):
+    """
+    Compara as métricas de dois motores. Uma métrica falha quando as médias
+    diferem mais do que ``tolerance`` ou quando o teste KS com tolerância
+    (ks_tolerance, banda de ``tolerance``) dá p < ``alpha``; as duas
+    diferenças são relativas à escala da métrica (metric_scale).
+    """
+    report = {"metrics": {}, "passed": True}
+    for name in METRICS:
+        ref = np.asarray(reference[name], dtype=float)
+        cand = np.asarray(candidate[name], dtype=float)
+        scale = metric_scale(name, reference)
+        relative = abs(cand.mean() - ref.mean()) / scale
+        statistic, pvalue = ks_tolerance(ref, cand, tolerance * scale)
+        passed = relative <= tolerance and pvalue >= alpha
+        report["metrics"][name] = {
+            "reference_mean": float(ref.mean()),
+            "candidate_mean": float(cand.mean()),
+            "relative_difference": float(relative),
+            "ks_statistic": statistic,
+            "p_value": pvalue,
+            "passed": passed,
+        }
+        report["passed"] = report["passed"] and passed
+    return report
+
+
+def check_engine(engine, runs=30, reference="patches", alpha=0.01, tolerance=0.1,
+                 first_seed=0, regimes=None, engine_kwargs=None, **kwargs):
+    """
+    Corre a referência e o motor com as mesmas sementes em cada regime de
+    tempo (nomes de WEATHER_REGIMES, por omissão todos) e compara-os.
+    ``kwargs`` passam a run_engine nos dois motores e ``engine_kwargs`` só no
+    motor testado (p.ex. spread_backend, que os PatchAgent não aceitam).
+    Devolve {regime: relatório de compare_samples}.
+    """
+    seeds = range(first_seed, first_seed + runs)
+    reports = {}
+    for name in regimes or WEATHER_REGIMES:
+        weather = WEATHER_REGIMES[name]
+        ref = run_engine(reference, seeds, weather=weather, **kwargs)
+        cand = run_engine(engine, seeds, weather=weather, **kwargs, **(engine_kwargs or {}))
+        reports[name] = compare_samples(ref, cand, alpha=alpha, tolerance=tolerance)
+    return reports
+
+
+def format_report(report, regime=None):
+    lines = [] if regime is None else [f"regime {regime}: {WEATHER_REGIMES[regime]}"]
+    lines.append(
+        f"{'métrica':<16}{'referência':>12}{'motor':>12}{'dif. rel.':>11}{'KS p':>10}  resultado"
+    )
+    for name, m in report["metrics"].items():
+        lines.append(
+            f"{name:<16}{m['reference_mean']:>12.2f}{m['candidate_mean']:>12.2f}"
+            f"{m['relative_difference']:>11.1%}{m['p_value']:>10.3g}  "
+            f"{'ok' if m['passed'] else 'FALHA'}"
+        )
+    lines.append("conforme" if report["passed"] else "NÃO conforme")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--engine", default="sequential", help="motor a testar")
+    parser.add_argument("--reference", default="patches", help="motor de referência")
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument("--height", type=int, default=100)
+    parser.add_argument("--steps", type=int, default=25)
+    parser.add_argument("--alpha", type=float, default=0.01)
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--backend", default=None, help="numpy ou jit (motores em arrays)")
+    parser.add_argument("--regime", action="append", choices=list(WEATHER_REGIMES),
+                        help="regime de tempo a testar (repetível; por omissão todos)")
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    engine_kwargs = {}
+    if args.backend is not None:
+        engine_kwargs["spread_backend"] = args.backend
+    reports = check_engine(
+        args.engine, runs=args.runs, reference=args.reference, alpha=args.alpha,
+        tolerance=args.tolerance, regimes=args.regime, engine_kwargs=engine_kwargs,
+        width=args.width, height=args.height, steps=args.steps,
+    )
+    for regime, report in reports.items():
+        print(format_report(report, regime))
+        print()
+    passed = all(report["passed"] for report in reports.values())
+    print("conforme em todos os regimes" if passed else "NÃO conforme")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,580 @@
+# ensemble.py
+"""
+Conjuntos de Monte Carlo de um cenário: N réplicas com sementes diferentes,
+agregadas em mapas de probabilidade de queima e de tempo de chegada.
+
+Cada réplica é reduzida à máscara final de células queimadas e à grelha das
+iterações de ignição, que entram logo nos agregados (BurnProbability) e são
+descartadas; a memória não depende do número de réplicas.
+
+    python -m Environment.ensemble --runs 1000 --workers 4 --output mapa.npz
+    python -m Environment.ensemble --target 20 --metric burned_area --workers 4
+"""
+
+# Standard library imports
+import argparse
+import contextlib
+import io
+import math
+import multiprocessing
+import random
+import sys
+import warnings
+
+# Third-party imports
+import numpy as np
+from scipy import stats
+
+# Local imports
+from Agents.agentes import STATE_CODES
+from Environment.ambiente import EnvironmentModel
+from Environment.result_cache import DEFAULT_DIRECTORY, ResultCache, result_key
+from Environment.results_store import ResultsStore
+from Environment.shared_landscape import SharedLandscape, init_worker, worker_landscape
+
+
+# Cenário por omissão: os valores iniciais dos sliders de main.py
+DEFAULT_SCENARIO = {
+    "width": 125,
+    "height": 108,
+    "steps": 100,
+    # Ponto de ignição (x, y) ou None para um ponto florestado ao acaso
+    "ignition": None,
+    "weather": {
+        "wind_direction": 4,
+        "wind_speed": 4,
+        "rain_level": 0.5,
+        "humidity": 15,
+        "temperature": 25,
+    },
+    # Restantes argumentos do EnvironmentModel
+    "model": {"density": 0.5, "num_firefighters": 4, "water_ratio": 0.5},
+}
+
+
+def make_scenario(**overrides):
+    """Cenário completo a partir de DEFAULT_SCENARIO e dos valores dados."""
+    scenario = dict(DEFAULT_SCENARIO, **overrides)
+    scenario["weather"] = dict(DEFAULT_SCENARIO["weather"], **overrides.get("weather", {}))
+    scenario["model"] = dict(DEFAULT_SCENARIO["model"], **overrides.get("model", {}))
+    return scenario
+
+
+# Fluxos aleatórios independentes de uma réplica (ver replicate_streams)
+STREAMS = ("ignition", "weather", "spread", "agents")
+
+
+def replicate_streams(seed):
+    """
+    Sementes independentes de cada fonte de aleatoriedade de uma réplica.
+
+    O terreno usa a própria ``seed``; a ignição, o tempo, a propagação (a
+    chave dos motores em arrays) e os restantes agentes têm cada um a sua.
+    Duas réplicas com a mesma semente e parâmetros diferentes (por exemplo
+    water_ratio) partilham assim o terreno, a ignição e o tempo, mesmo que
+    as equipas façam sorteios diferentes.
+    """
+    words = np.random.SeedSequence(seed).generate_state(len(STREAMS), dtype=np.uint64)
+    return dict(zip(STREAMS, (int(word) for word in words)))
+
+
+def update_weather(model, iteration, weather, rng=random):
+    """O tempo de cada iteração, como em SimulationApp.simulation_step."""
+    if iteration % 20 == 0:
+        model.itsrain_ = rng.random() < model.rain_level
+    model.current_iteration = iteration
+    model.wind_direction = (model.wind_direction + rng.uniform(-1, 1)) % 360
+    model.wind_speed = max(model.wind_speed + rng.uniform(-0.3, 0.3), 0)
+    model.rain_level = weather["rain_level"]
+    model.humidity = weather["humidity"]
+    model.temperature = weather["temperature"]
+    model.ambient_temperature = weather["temperature"]
+
+
+def ignite(model, position, rng):
+    """Põe a arder ``position`` ou, com None, uma célula florestada sorteada com ``rng``."""
+    if position is None:
+        forested = np.argwhere(model.state_grid == STATE_CODES["forested"])
+        if not len(forested):
+            return
+        position = forested[rng.randrange(len(forested))].tolist()
+    patch = model.patch_at(tuple(position))
+    patch.state = "burning"
+    patch.pcolor = 15
+    patch.burn_time = None
+    model.fire_start_iter.setdefault(patch.pos, model.current_iteration)
+
+
+def scenario_params(scenario):
+    """Parâmetros de um cenário num só nível, como colunas (ver results_store)."""
+    params = {"width": scenario["width"], "height": scenario["height"],
+              "steps": scenario["steps"]}
+    if scenario["ignition"] is not None:
+        params["ignition_x"], params["ignition_y"] = scenario["ignition"]
+    params.update(scenario["weather"])
+    model = dict(scenario["model"])
+    # Os coeficientes da propagação são uma coluna cada
+    params.update(model.pop("spread_coefficients", None) or {})
+    params.update(model)
+    return params
+
+
+def replicate_metrics(burned, ignition):
+    """Área ardida e última iteração em que uma célula começou a arder."""
+    return {
+        "burned_area": float(burned.sum()),
+        "duration": float(ignition.max()) if burned.any() else 0.0,
+    }
+
+
+def replicate_series(ignition, steps):
+    """Células já alcançadas pelo fogo no fim de cada iteração (0 a ``steps``)."""
+    reached = ignition[ignition >= 0]
+    return {"burned_area": np.bincount(reached, minlength=steps + 1).cumsum()}
+
+
+def record_replicate(writer, study, scenario, seed, burned, ignition):
+    """Acrescenta uma réplica a um results_store.ResultsWriter."""
+    writer.append(
+        study, seed, scenario_params(scenario), replicate_metrics(burned, ignition),
+        replicate_series(ignition, scenario["steps"]),
+    )
+
+
+def run_replicate(scenario, seed, landscape=None, cache=None):
+    """
+    Corre uma réplica do cenário e devolve a máscara (W, H) das células
+    queimadas (ou ainda a arder) no fim e a grelha (W, H) da iteração em
+    que cada uma começou a arder (-1 nas que não arderam; 0 na ignição).
+
+    Cada fonte de aleatoriedade tem o seu fluxo (ver replicate_streams).
+    Com o motor "patches" a propagação sorteia do mesmo gerador que as
+    equipas; com os motores em arrays tem a sua própria chave.
+
+    Com ``cache`` (result_cache.ResultCache) uma réplica que já correu com
+    o mesmo cenário, semente, terreno e código é lida da cache; as novas
+    são lá guardadas.
+    """
+    if cache is None:
+        return _simulate_replicate(scenario, seed, landscape)
+    key = result_key(
+        "replicate", scenario, seed, landscape,
+        code=(_simulate_replicate, update_weather, ignite, replicate_streams),
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        return cached["burned"], cached["ignition"]
+    burned, ignition = _simulate_replicate(scenario, seed, landscape)
+    cache.put(key, burned=burned, ignition=ignition)
+    return burned, ignition
+
+
+def _simulate_replicate(scenario, seed, landscape):
+    streams = replicate_streams(seed)
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+    width, height = scenario["width"], scenario["height"]
+    weather = scenario["weather"]
+    model_kwargs = dict(scenario["model"])
+    if model_kwargs.get("spread_engine", "patches") != "patches" or "spread_workers" in model_kwargs:
+        model_kwargs.setdefault("spread_seed", streams["spread"])
+    model = EnvironmentModel(width, height, landscape=landscape, **model_kwargs)
+    try:
+        model.wind_direction = weather["wind_direction"]
+        model.wind_speed = weather["wind_speed"]
+        model.rain_level = weather["rain_level"]
+        model.humidity = weather["humidity"]
+        model.temperature = weather["temperature"]
+        model.ambient_temperature = weather["temperature"]
+
+        ignite(model, scenario["ignition"], random.Random(streams["ignition"]))
+        weather_rng = random.Random(streams["weather"])
+        random.seed(streams["agents"])
+
+        burning_code, burned_code = STATE_CODES["burning"], STATE_CODES["burned"]
+        ignition = np.full((width, height), -1, dtype=np.int32)
+        ignition[model.state_grid == burning_code] = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(scenario["steps"]):
+                update_weather(model, i, weather, weather_rng)
+                model.step()
+                on_fire = (model.state_grid == burning_code) | (model.state_grid == burned_code)
+                ignition[on_fire & (ignition < 0)] = i + 1
+                if not model.fire_active():
+                    break
+        burned = (model.state_grid == burning_code) | (model.state_grid == burned_code)
+    finally:
+        model.close()
+    return burned, ignition
+
+
+class BurnProbability:
+    """
+    Agregados por célula de um conjunto de réplicas, atualizados em fluxo:
+    número de réplicas em que a célula ardeu e média e variância (Welford)
+    da iteração de chegada do fogo nessas réplicas. Guarda também a média e
+    a variância da área ardida por réplica (ver half_width).
+
+    Dois agregados do mesmo mapa juntam-se com ``merge`` (fórmula de Chan),
+    por isso cada processo de trabalho pode acumular o seu e enviar só o
+    resultado.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.runs = 0
+        self.burned = np.zeros((width, height), dtype=np.int64)
+        self.mean = np.zeros((width, height))
+        self.m2 = np.zeros((width, height))
+        self.area_mean = 0.0
+        self.area_m2 = 0.0
+
+    def add(self, burned, arrival):
+        """Junta uma réplica: máscara de células queimadas e tempos de chegada."""
+        self.runs += 1
+        area = float(np.count_nonzero(burned))
+        delta = area - self.area_mean
+        self.area_mean += delta / self.runs
+        self.area_m2 += delta * (area - self.area_mean)
+        xs, ys = np.nonzero(burned)
+        self.burned[xs, ys] += 1
+        value = arrival[xs, ys].astype(float)
+        delta = value - self.mean[xs, ys]
+        self.mean[xs, ys] += delta / self.burned[xs, ys]
+        self.m2[xs, ys] += delta * (value - self.mean[xs, ys])
+
+    def merge(self, other):
+        """Junta os agregados de outro conjunto de réplicas do mesmo mapa."""
+        if (other.width, other.height) != (self.width, self.height):
+            raise ValueError("Os agregados são de mapas com tamanhos diferentes")
+        total = self.burned + other.burned
+        seen = total > 0
+        delta = other.mean - self.mean
+        safe = np.where(seen, total, 1)
+        self.mean = np.where(seen, self.mean + delta * other.burned / safe, 0.0)
+        self.m2 = np.where(
+            seen, self.m2 + other.m2 + delta ** 2 * self.burned * other.burned / safe, 0.0
+        )
+        self.burned = total
+
+        runs = self.runs + other.runs
+        if runs:
+            delta = other.area_mean - self.area_mean
+            self.area_mean += delta * other.runs / runs
+            self.area_m2 += other.area_m2 + delta ** 2 * self.runs * other.runs / runs
+        self.runs = runs
+        return self
+
+    @property
+    def burn_probability(self):
+        """Fração das réplicas em que cada célula ardeu."""
+        return self.burned / max(self.runs, 1)
+
+    @property
+    def mean_arrival(self):
+        """Iteração média de chegada do fogo (NaN nas células que nunca arderam)."""
+        return np.where(self.burned > 0, self.mean, np.nan)
+
+    @property
+    def arrival_variance(self):
+        """Variância amostral da chegada (NaN com menos de duas réplicas queimadas)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.burned > 1, self.m2 / (self.burned - 1), np.nan)
+
+    def half_width(self, metric="burned_area", confidence=0.95):
+        """
+        Meia largura do intervalo de confiança de ``metric``:
+
+          - "burned_area": média da área ardida (intervalo t);
+          - "burn_probability": a maior, entre as células, do intervalo de
+            Wilson da probabilidade de queima.
+
+        Infinita com menos de duas réplicas.
+        """
+        n = self.runs
+        if n < 2:
+            return math.inf
+        if metric == "burned_area":
+            q = stats.t.ppf(0.5 + confidence / 2, n - 1)
+            return float(q * math.sqrt(self.area_m2 / (n - 1) / n))
+        if metric == "burn_probability":
+            z = stats.norm.ppf(0.5 + confidence / 2)
+            # O intervalo de Wilson é mais largo na célula com p mais perto de 1/2
+            probability = self.burned / n
+            p = float(probability.flat[np.abs(probability - 0.5).argmin()])
+            return float(
+                z / (1 + z ** 2 / n) * math.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2))
+            )
+        raise ValueError(f"Métrica desconhecida: {metric!r} (esperado 'burned_area' ou 'burn_probability')")
+
+    def save(self, path):
+        np.savez_compressed(
+            path, runs=self.runs, burned=self.burned, mean=self.mean, m2=self.m2,
+            area=np.array([self.area_mean, self.area_m2]),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            width, height = data["burned"].shape
+            result = cls(width, height)
+            result.runs = int(data["runs"])
+            result.burned = data["burned"]
+            result.mean = data["mean"]
+            result.m2 = data["m2"]
+            result.area_mean, result.area_m2 = (float(v) for v in data["area"])
+        return result
+
+
+def _run_chunk(task):
+    """Corre um lote de sementes (num processo de trabalho) e devolve o agregado."""
+    key, scenario, seeds, landscape, cache, store = task
+    warnings.filterwarnings("ignore", category=UserWarning)
+    if landscape is None:
+        landscape = worker_landscape()
+    result = BurnProbability(scenario["width"], scenario["height"])
+    writer = store.writer() if store is not None else None
+    for seed in seeds:
+        burned, ignition = run_replicate(scenario, seed, landscape, cache)
+        result.add(burned, ignition)
+        if writer is not None:
+            record_replicate(writer, key, scenario, seed, burned, ignition)
+    if writer is not None:
+        writer.close()
+    return key, result
+
+
+class _ReplicatePool:
+    """
+    Corre lotes de réplicas (_run_chunk) num pool de ``workers`` processos,
+    ou no próprio processo sem ``workers``. Um ``landscape`` é publicado uma
+    vez em memória partilhada (ver shared_landscape) em vez de ser copiado
+    para cada processo. Com ``cache`` as réplicas passam pela cache de
+    resultados (ver run_replicate); com ``store`` cada processo escreve as
+    suas no results_store.ResultsStore, com a chave do lote como estudo.
+    """
+
+    def __init__(self, workers=None, landscape=None, cache=None, store=None):
+        self.workers = workers if workers and workers > 1 else None
+        self.landscape = landscape
+        self.cache = cache
+        self.store = store
+        self._shared = None
+        self._pool = None
+
+    def __enter__(self):
+        if self.workers:
+            if self.landscape is not None:
+                self._shared = SharedLandscape(self.landscape)
+            initializer, initargs = (
+                (init_worker, (self._shared.spec,)) if self._shared else (None, ())
+            )
+            ctx = multiprocessing.get_context()
+            self._pool = ctx.Pool(self.workers, initializer=initializer, initargs=initargs)
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+        if self._shared is not None:
+            self._shared.close()
+
+    def run(self, chunks):
+        """Corre os lotes (chave, cenário, sementes); dá (chave, agregado) à medida que acabam."""
+        if self._pool is None:
+            for key, scenario, seeds in chunks:
+                yield _run_chunk((key, scenario, seeds, self.landscape, self.cache, self.store))
+        else:
+            tasks = [
+                (key, scenario, seeds, None, self.cache, self.store)
+                for key, scenario, seeds in chunks
+            ]
+            yield from self._pool.imap_unordered(_run_chunk, tasks)
+
+
+def _chunks(key, scenario, seeds, chunk_size):
+    return [(key, scenario, seeds[i:i + chunk_size]) for i in range(0, len(seeds), chunk_size)]
+
+
+def run_ensemble(scenario, runs, workers=None, first_seed=0, landscape=None,
+                 chunk_size=None, progress=None, cache=None, store=None, study=None):
+    """
+    Corre ``runs`` réplicas do cenário (sementes first_seed, first_seed + 1,
+    ...) e devolve o BurnProbability agregado.
+
+    Com ``workers`` as réplicas correm num pool de processos, em lotes de
+    ``chunk_size`` sementes; cada lote devolve só o seu agregado. Um
+    ``landscape`` (terrain.Landscape) é partilhado pelos processos (ver
+    _ReplicatePool). ``progress(feitas, total)`` é chamado a cada lote.
+    Com ``cache`` (result_cache.ResultCache) as réplicas já corridas são
+    lidas da cache. Com ``store`` (results_store.ResultsStore) cada réplica
+    é acrescentada à base de resultados com o nome ``study``.
+    """
+    seeds = list(range(first_seed, first_seed + runs))
+    result = BurnProbability(scenario["width"], scenario["height"])
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(runs / (workers * 4))) if workers and workers > 1 else 1
+    with _ReplicatePool(workers, landscape, cache, store) as pool:
+        for _, partial in pool.run(_chunks(study, scenario, seeds, chunk_size)):
+            result.merge(partial)
+            if progress is not None:
+                progress(result.runs, runs)
+    return result
+
+
+def run_ensembles(scenarios, runs, workers=None, first_seed=0, landscape=None,
+                  progress=None, cache=None, store=None):
+    """
+    run_ensemble de vários cenários {nome: cenário} com os lotes de todos
+    no mesmo pool. ``runs`` é o número de réplicas de cada cenário ou um
+    dicionário {nome: réplicas}. Devolve {nome: BurnProbability};
+    ``progress(nome, agregado)`` é chamado quando um cenário acaba.
+    ``cache`` e ``store`` como em run_until_precise.
+    """
+    counts = dict(runs) if isinstance(runs, dict) else dict.fromkeys(scenarios, runs)
+    results = {
+        name: BurnProbability(scenario["width"], scenario["height"])
+        for name, scenario in scenarios.items()
+    }
+    processes = workers if workers and workers > 1 else 1
+    chunks = []
+    for name, scenario in scenarios.items():
+        seeds = list(range(first_seed, first_seed + counts[name]))
+        chunks += _chunks(name, scenario, seeds, max(1, math.ceil(len(seeds) / (processes * 4))))
+    with _ReplicatePool(workers, landscape, cache, store) as pool:
+        for name, partial in pool.run(chunks):
+            results[name].merge(partial)
+            if progress is not None and results[name].runs == counts[name]:
+                progress(name, results[name])
+    return results
+
+
+def run_until_precise(scenarios, target, metric="burned_area", confidence=0.95,
+                      min_runs=10, max_runs=1000, batch_size=None, workers=None,
+                      first_seed=0, landscape=None, progress=None, cache=None,
+                      store=None):
+    """
+    Corre réplicas de cada cenário até a meia largura do intervalo de
+    confiança de ``metric`` (ver BurnProbability.half_width) ser no máximo
+    ``target``, com pelo menos ``min_runs`` e no máximo ``max_runs``
+    réplicas por cenário.
+
+    ``scenarios`` é um cenário ou um dicionário {nome: cenário}. As
+    réplicas correm por rondas: em cada uma, cada cenário ainda por
+    convergir recebe um lote de ``batch_size`` sementes (por omissão
+    ``min_runs`` na primeira ronda e depois o suficiente para ocupar os
+    processos) e os lotes de todos correm juntos no pool. Devolve
+    {nome: BurnProbability} (o número de réplicas de cada um está em
+    ``runs``); com um só cenário devolve o seu BurnProbability.
+    ``progress(nome, agregado)`` é chamado quando um cenário acaba.
+    ``cache`` como em run_ensemble: alargar um estudo só corre as réplicas
+    novas. ``store`` como em run_ensemble, com o nome de cada cenário como
+    estudo.
+    """
+    single = "width" in scenarios
+    named = {None: scenarios} if single else dict(scenarios)
+    results = {
+        name: BurnProbability(scenario["width"], scenario["height"])
+        for name, scenario in named.items()
+    }
+    pending = list(named)
+    processes = workers if workers and workers > 1 else 1
+    if batch_size is None:
+        batch_size = max(processes, math.ceil(min_runs / 2))
+
+    with _ReplicatePool(workers, landscape, cache, store) as pool:
+        while pending:
+            chunks = []
+            for name in pending:
+                done = results[name].runs
+                size = min_runs - done if done < min_runs else batch_size
+                size = min(size, max_runs - done)
+                seeds = list(range(first_seed + done, first_seed + done + size))
+                # Lotes pequenos para repartir o cenário pelos processos
+                chunk_size = max(1, math.ceil(size / processes))
+                chunks += _chunks(name, named[name], seeds, chunk_size)
+            for name, partial in pool.run(chunks):
+                results[name].merge(partial)
+
+            for name in list(pending):
+                result = results[name]
+                if (result.runs >= max_runs
+                        or result.half_width(metric, confidence) <= target):
+                    pending.remove(name)
+                    if progress is not None:
+                        progress(name, result)
+    return results[None] if single else results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=100,
+                        help="réplicas (com --target, o mínimo)")
+    parser.add_argument("--target", type=float, default=None,
+                        help="meia largura do IC a atingir; para quando a atinge")
+    parser.add_argument("--metric", default="burned_area",
+                        choices=("burned_area", "burn_probability"))
+    parser.add_argument("--max-runs", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--width", type=int, default=DEFAULT_SCENARIO["width"])
+    parser.add_argument("--height", type=int, default=DEFAULT_SCENARIO["height"])
+    parser.add_argument("--steps", type=int, default=DEFAULT_SCENARIO["steps"])
+    parser.add_argument("--ignition", type=int, nargs=2, default=None, metavar=("X", "Y"))
+    defaults = DEFAULT_SCENARIO["weather"]
+    parser.add_argument("--wind-direction", type=float, default=defaults["wind_direction"])
+    parser.add_argument("--wind-speed", type=float, default=defaults["wind_speed"])
+    parser.add_argument("--rain-level", type=float, default=defaults["rain_level"])
+    parser.add_argument("--humidity", type=float, default=defaults["humidity"])
+    parser.add_argument("--temperature", type=float, default=defaults["temperature"])
+    parser.add_argument("--firefighters", type=int,
+                        default=DEFAULT_SCENARIO["model"]["num_firefighters"])
+    parser.add_argument("--spread-engine", default=None)
+    parser.add_argument("--output", default="probabilidade_queima.npz")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_DIRECTORY, default=None,
+                        metavar="PASTA", help="reutiliza as réplicas já corridas")
+    parser.add_argument("--store", default=None, metavar="PASTA",
+                        help="acrescenta as réplicas a uma base de resultados")
+    parser.add_argument("--study", default=None, help="nome do estudo na base de resultados")
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    model = {"num_firefighters": args.firefighters}
+    if args.spread_engine is not None:
+        model["spread_engine"] = args.spread_engine
+    scenario = make_scenario(
+        width=args.width, height=args.height, steps=args.steps, ignition=args.ignition,
+        weather={
+            "wind_direction": args.wind_direction, "wind_speed": args.wind_speed,
+            "rain_level": args.rain_level, "humidity": args.humidity,
+            "temperature": args.temperature,
+        },
+        model=model,
+    )
+    cache = ResultCache(args.cache) if args.cache else None
+    store = ResultsStore(args.store) if args.store else None
+    if args.target is None:
+        result = run_ensemble(
+            scenario, args.runs, workers=args.workers, first_seed=args.first_seed,
+            progress=lambda done, total: print(f"{done}/{total} réplicas", file=sys.stderr),
+            cache=cache, store=store, study=args.study,
+        )
+    else:
+        result = run_until_precise(
+            {args.study: scenario}, args.target, metric=args.metric, min_runs=args.runs,
+            max_runs=args.max_runs, workers=args.workers, first_seed=args.first_seed,
+            cache=cache, store=store,
+        )[args.study]
+        print(f"{args.metric}: ± {result.half_width(args.metric):.3g} "
+              f"(alvo {args.target:g})", file=sys.stderr)
+    result.save(args.output)
+    probability = result.burn_probability
+    print(f"{result.runs} réplicas; área ardida esperada {probability.sum():.1f} células; "
+          f"guardado em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# fire_field.py
+
+# Standard library imports
+import math
+
+# Third-party imports
+import numpy as np
+from scipy import ndimage
+from scipy.spatial import cKDTree
+
+# Local imports
+from Agents.agentes import STATE_CODES
+
+
+BURNING = STATE_CODES["burning"]
+
+
+class FireField:
+    """
+    Campo de distância ao fogo partilhado por todas as equipas.
+
+    É recalculado uma vez por iteração (transformada de distância euclidiana
+    com múltiplas fontes a partir das células a arder), apenas na janela
+    ativa do modelo; depois cada equipa consulta distância, foco mais
+    próximo e direção em O(1). A janela contém sempre todas as células a
+    arder, por isso fora dela a resposta vem de uma árvore k-d dos focos
+    (construída só quando alguma equipa está fora da janela).
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.burning_count = 0
+        self.burning_positions = np.empty((0, 2), dtype=np.int64)
+        self.centroid = None
+        # Janela (x0, x1, y0, y1) onde o campo foi calculado
+        self.window = (0, 0, 0, 0)
+        self.distance = np.empty((0, 0))
+        self.nearest = None
+        self._integral = np.zeros((1, 1), dtype=np.int32)
+        self._tree = None
+
+    def update(self, state_grid, window=None):
+        """Recalcula o campo a partir da grelha de estados, dentro de ``window``."""
+        if window is None:
+            window = (0, self.width, 0, self.height)
+        self.window = window
+        x0, x1, y0, y1 = window
+        burning = state_grid[x0:x1, y0:y1] == BURNING
+        self.burning_positions = np.argwhere(burning) + (x0, y0)
+        self.burning_count = len(self.burning_positions)
+        self._tree = None
+
+        # Tabela de somas acumuladas para contar focos numa janela em O(1)
+        self._integral = np.zeros((x1 - x0 + 1, y1 - y0 + 1), dtype=np.int32)
+        self._integral[1:, 1:] = burning.cumsum(0).cumsum(1)
+
+        if self.burning_count == 0:
+            self.centroid = None
+            self.distance = np.full(burning.shape, np.inf)
+            self.nearest = None
+            return
+
+        self.centroid = tuple(self.burning_positions.mean(axis=0))
+        self.distance, self.nearest = ndimage.distance_transform_edt(
+            ~burning, return_indices=True
+        )
+
+    def _local(self, pos):
+        """Posição relativa à janela, ou None se estiver fora dela."""
+        x0, x1, y0, y1 = self.window
+        x, y = pos
+        if x0 <= x < x1 and y0 <= y < y1:
+            return (x - x0, y - y0)
+        return None
+
+    def _query(self, pos):
+        """(distância, foco mais próximo) para uma célula fora da janela."""
+        if self._tree is None:
+            self._tree = cKDTree(self.burning_positions)
+        distance, index = self._tree.query(pos)
+        x, y = self.burning_positions[index].tolist()
+        return float(distance), (x, y)
+
+    def distance_at(self, pos):
+        """Distância euclidiana da célula ao foco mais próximo (inf sem fogo)."""
+        local = self._local(pos)
+        if local is None:
+            if self.burning_count == 0:
+                return float("inf")
+            return self._query(pos)[0]
+        return float(self.distance[local])
+
+    def nearest_fire(self, pos):
+        """Posição do foco mais próximo, ou None se não houver fogo."""
+        if self.nearest is None:
+            return None
+        local = self._local(pos)
+        if local is None:
+            return self._query(pos)[1]
+        x, y = local
+        return (int(self.nearest[0, x, y]) + self.window[0],
+                int(self.nearest[1, x, y]) + self.window[2])
+
+    def nearest_fires(self, positions):
+        """Focos mais próximos (N, 2) de várias células de uma vez (-1 sem fogo)."""
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+        result = np.full_like(positions, -1)
+        if self.nearest is None:
+            return result
+        x0, x1, y0, y1 = self.window
+        inside = ((positions[:, 0] >= x0) & (positions[:, 0] < x1) &
+                  (positions[:, 1] >= y0) & (positions[:, 1] < y1))
+        lx, ly = positions[inside, 0] - x0, positions[inside, 1] - y0
+        result[inside, 0] = self.nearest[0, lx, ly] + x0
+        result[inside, 1] = self.nearest[1, lx, ly] + y0
+        if not inside.all():
+            if self._tree is None:
+                self._tree = cKDTree(self.burning_positions)
+            _, index = self._tree.query(positions[~inside])
+            result[~inside] = self.burning_positions[index]
+        return result
+
+    def direction_to_fire(self, pos):
+        """Vetor unitário da célula para o foco mais próximo ((0, 0) se não há)."""
+        fire = self.nearest_fire(pos)
+        if fire is None:
+            return (0.0, 0.0)
+        dx, dy = fire[0] - pos[0], fire[1] - pos[1]
+        length = math.hypot(dx, dy)
+        if length == 0:
+            return (0.0, 0.0)
+        return (dx / length, dy / length)
+
+    def count_within(self, pos, radius):
+        """Número de focos na janela quadrada de raio ``radius`` à volta de ``pos``."""
+        wx0, wx1, wy0, wy1 = self.window
+        x, y = pos[0] - wx0, pos[1] - wy0
+        x0, x1 = max(0, x - radius), min(wx1 - wx0, x + radius + 1)
+        y0, y1 = max(0, y - radius), min(wy1 - wy0, y + radius + 1)
+        if x1 <= x0 or y1 <= y0:
+            return 0
+        s = self._integral
+        return int(s[x1, y1] - s[x0, y1] - s[x1, y0] + s[x0, y0])
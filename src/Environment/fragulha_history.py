@@ -0,0 +1,149 @@
+# fragulha_history.py
+
+# Standard library imports
+import os
+import random
+import shutil
+import tempfile
+
+# Third-party imports
+import numpy as np
+
+
+# Cada fagulha fica reduzida a origem, ponto de queda e iteração
+FRAGULHA_DTYPE = np.dtype([
+    ("ox", np.int32), ("oy", np.int32),
+    ("lx", np.int32), ("ly", np.int32),
+    ("step", np.int32),
+])
+
+
+class FragulhaHistory:
+    """
+    Histórico compacto das fagulhas (origem, queda e iteração) em arrays numpy.
+
+    Modos de retenção:
+      - "all":       guarda todas as fagulhas em memória
+      - "reservoir": guarda uma amostra uniforme (reservoir sampling) de tamanho fixo
+      - "disk":      acrescenta blocos de ``chunk_size`` fagulhas a um ficheiro
+                     binário em ``spill_dir`` (uma pasta temporária por omissão),
+                     lido de volta por memory-map
+
+    close() apaga o ficheiro e a pasta temporária.
+    """
+
+    RETENTION_MODES = ("all", "reservoir", "disk")
+
+    def __init__(self, retention="all", sample_size=5000, spill_dir=None,
+                 chunk_size=4096, seed=None):
+        if retention not in self.RETENTION_MODES:
+            raise ValueError(
+                f"Modo de retenção inválido: {retention!r} "
+                f"(esperado um de {self.RETENTION_MODES})"
+            )
+        self.retention = retention
+        self.sample_size = int(sample_size)
+        self.chunk_size = int(chunk_size)
+        self.spill_dir = spill_dir
+        self.total_count = 0     # Fagulhas registadas desde o início
+        self._spill_path = None
+        self._spilled = 0        # Fagulhas já escritas no ficheiro
+        self._own_spill_dir = False
+
+        # RNG próprio: a amostragem não pode alterar a sequência da simulação
+        self._rng = random.Random(seed)
+
+        if retention == "reservoir":
+            capacity = self.sample_size
+        elif retention == "disk":
+            capacity = self.chunk_size
+        else:
+            capacity = 1024
+        self._buffer = np.empty(capacity, dtype=FRAGULHA_DTYPE)
+        self._size = 0
+
+    def __len__(self):
+        """Número de fagulhas retidas (memória + disco)."""
+        return self._size + self._spilled
+
+    def record(self, origin, landing, step):
+        """Regista uma fagulha que partiu de ``origin`` e caiu em ``landing``."""
+        row = (origin[0], origin[1], landing[0], landing[1], step)
+        self.total_count += 1
+
+        if self.retention == "reservoir":
+            if self._size < self.sample_size:
+                self._buffer[self._size] = row
+                self._size += 1
+            else:
+                # Algoritmo R: substitui com probabilidade sample_size / total
+                j = self._rng.randrange(self.total_count)
+                if j < self.sample_size:
+                    self._buffer[j] = row
+            return
+
+        if self._size == len(self._buffer):
+            if self.retention == "disk":
+                self._spill()
+            else:
+                self._buffer = np.resize(self._buffer, 2 * len(self._buffer))
+        self._buffer[self._size] = row
+        self._size += 1
+
+    def _spill(self):
+        """Acrescenta o buffer ao ficheiro em disco e esvazia-o."""
+        if self._spill_path is None:
+            if self.spill_dir is None:
+                self.spill_dir = tempfile.mkdtemp(prefix="fragulhas_")
+                self._own_spill_dir = True
+            os.makedirs(self.spill_dir, exist_ok=True)
+            fd, self._spill_path = tempfile.mkstemp(
+                prefix="fragulhas_", suffix=".bin", dir=self.spill_dir
+            )
+            os.close(fd)
+        with open(self._spill_path, "ab") as f:
+            self._buffer[:self._size].tofile(f)
+        self._spilled += self._size
+        self._size = 0
+
+    def records(self):
+        """
+        Devolve todas as fagulhas retidas como um array estruturado. No modo
+        "disk" o buffer é escrito primeiro e o array é um memory-map (só
+        leitura) do ficheiro: não é carregado para a memória.
+        """
+        if self.retention == "disk":
+            if self._size:
+                self._spill()
+            if not self._spilled:
+                return np.empty(0, dtype=FRAGULHA_DTYPE)
+            return np.memmap(self._spill_path, dtype=FRAGULHA_DTYPE, mode="r",
+                             shape=(self._spilled,))
+        return self._buffer[:self._size].copy()
+
+    def arrays(self):
+        """Devolve (origens (N, 2), quedas (N, 2), iterações (N,))."""
+        rec = self.records()
+        origins = np.column_stack((rec["ox"], rec["oy"]))
+        landings = np.column_stack((rec["lx"], rec["ly"]))
+        return origins, landings, np.asarray(rec["step"])
+
+    def clear(self):
+        """Esquece todas as fagulhas e apaga o ficheiro escrito em disco."""
+        if self._spill_path is not None:
+            try:
+                os.remove(self._spill_path)
+            except OSError:
+                pass
+        self._spill_path = None
+        self._spilled = 0
+        self._size = 0
+        self.total_count = 0
+
+    def close(self):
+        """Apaga o ficheiro em disco e a pasta temporária criada para ele."""
+        self.clear()
+        if self._own_spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+            self._own_spill_dir = False
@@ -0,0 +1,91 @@
+# heat.py
+
+# Third-party imports
+import numpy as np
+
+
+class HeatField:
+    """
+    Campo de temperatura numa grelha mais grossa do que a do terreno.
+
+    Guarda o aquecimento (excesso face à temperatura ambiente) de cada célula
+    grossa de ``resolution`` x ``resolution`` células. Por passo cada célula
+    relaxa para ``heating`` graus por célula a arder que contém (a mesma
+    regra que a temperatura global do modelo) e o calor difunde-se com um
+    estêncil de 5 pontos. Só é atualizada a janela ativa: a caixa das células
+    a arder e das células ainda quentes, alargada em uma célula; fora dela o
+    aquecimento é zero.
+    """
+
+    def __init__(self, width, height, resolution=4, diffusion=0.1, relaxation=0.1,
+                 heating=0.5, tolerance=1e-3, ambient=25.0):
+        self.width = width
+        self.height = height
+        self.resolution = resolution
+        self.diffusion = diffusion      # <= 0.25 para o estêncil ser estável
+        self.relaxation = relaxation
+        self.heating = heating
+        self.tolerance = tolerance      # Abaixo disto o aquecimento passa a zero
+        self.ambient = ambient
+        self.shape = (-(-width // resolution), -(-height // resolution))
+        self.excess = np.zeros(self.shape)
+        self.active = None              # Janela (x0, x1, y0, y1) com calor
+
+    def update(self, burning_positions, ambient):
+        """Avança um passo a partir das células a arder (N, 2) e do ambiente."""
+        self.ambient = ambient
+        cells = np.asarray(burning_positions, dtype=np.int64).reshape(-1, 2)
+        cells = cells // self.resolution
+
+        boxes = []
+        if len(cells):
+            boxes.append((cells[:, 0].min(), cells[:, 0].max() + 1,
+                          cells[:, 1].min(), cells[:, 1].max() + 1))
+        if self.active is not None:
+            boxes.append(self.active)
+        if not boxes:
+            return
+        cw, ch = self.shape
+        x0 = max(0, min(b[0] for b in boxes) - 1)
+        x1 = min(cw, max(b[1] for b in boxes) + 1)
+        y0 = max(0, min(b[2] for b in boxes) - 1)
+        y1 = min(ch, max(b[3] for b in boxes) + 1)
+        block = self.excess[x0:x1, y0:y1]
+
+        # Difusão (estêncil de 5 pontos; fora da janela o calor é ~0)
+        padded = np.pad(block, 1, mode="edge")
+        laplacian = (
+            padded[:-2, 1:-1] + padded[2:, 1:-1]
+            + padded[1:-1, :-2] + padded[1:-1, 2:]
+            - 4 * block
+        )
+        block += self.diffusion * laplacian
+
+        # Relaxação para o aquecimento das células a arder
+        counts = np.zeros(block.shape)
+        if len(cells):
+            np.add.at(counts, (cells[:, 0] - x0, cells[:, 1] - y0), 1)
+        block += (self.heating * counts - block) * self.relaxation
+        block[block < self.tolerance] = 0.0
+
+        hot = np.argwhere(block > 0)
+        if len(hot):
+            self.active = (int(x0 + hot[:, 0].min()), int(x0 + hot[:, 0].max() + 1),
+                           int(y0 + hot[:, 1].min()), int(y0 + hot[:, 1].max() + 1))
+        else:
+            self.active = None
+
+    def temperature_at(self, pos):
+        """Temperatura local na célula ``pos`` do terreno."""
+        r = self.resolution
+        return self.ambient + float(self.excess[pos[0] // r, pos[1] // r])
+
+    def temperature_map(self, window=None):
+        """Temperatura local nas células da janela (x0, x1, y0, y1) (o mapa por omissão)."""
+        if window is None:
+            window = (0, self.width, 0, self.height)
+        x0, x1, y0, y1 = window
+        r = self.resolution
+        xs = np.arange(x0, x1) // r
+        ys = np.arange(y0, y1) // r
+        return self.ambient + self.excess[np.ix_(xs, ys)]
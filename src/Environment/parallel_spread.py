@@ -0,0 +1,179 @@
+# parallel_spread.py
+
+# Standard library imports
+import multiprocessing
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from Environment.shared_arrays import SharedArray
+from Environment.spread_engine import BACKENDS, SequentialSpread
+from Environment.spread_kernel import BURNING, DANGERED, SpreadLayers, spread_radius
+
+
+def split_columns(width, parts):
+    """Divide as colunas 0..width em ``parts`` faixas contíguas (x0, x1)."""
+    parts = max(1, min(parts, width))
+    edges = np.linspace(0, width, parts + 1).round().astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+
+
+def _worker_main(conn, specs, heat_resolution, backend):
+    """Ciclo de um processo de trabalho: liga-se aos arrays partilhados e responde a comandos."""
+    shared = {name: SharedArray.attach(spec) for name, spec in specs.items()}
+    arrays = {name: s.array for name, s in shared.items()}
+    layers = SpreadLayers(
+        *(arrays[name] for name in SpreadLayers.DYNAMIC + SpreadLayers.STATIC),
+        arrays["heat"], heat_resolution,
+    )
+    kernel = BACKENDS[backend]
+    try:
+        while True:
+            command, payload = conn.recv()
+            if command == "sweep":
+                # A faixa avança diretamente no estado partilhado
+                conn.send(None if payload is None else kernel.sweep(layers, *payload))
+            else:
+                break
+    finally:
+        del layers, arrays
+        for s in shared.values():
+            s.close()
+        conn.close()
+
+
+class ParallelSpread(SequentialSpread):
+    """
+    SequentialSpread com o mapa dividido em ``2 * workers`` faixas de
+    colunas, percorridas em duas fases por ``workers`` processos.
+
+    Na primeira fase cada processo percorre uma faixa par (0, 2, 4, ...) e
+    na segunda uma faixa ímpar, sempre diretamente sobre o estado em
+    memória partilhada. Uma célula só lê e escreve até ``raio`` colunas de
+    distância, por isso duas faixas da mesma fase, separadas por uma faixa
+    de pelo menos ``2 * raio`` colunas, nunca tocam nas mesmas células: as
+    faixas da mesma fase correm em paralelo sem cópias, e o que uma fase
+    escreve no halo das faixas vizinhas é lido pela fase seguinte, também
+    sem cópias. Nenhuma faixa é repetida.
+
+    A ordem do percurso passa a ser a das fases (faixas pares e depois
+    ímpares) em vez da de SequentialSpread; os sorteios são os mesmos
+    (por célula, ver spread_kernel.uniform), por isso os resultados só
+    diferem junto às fronteiras das faixas, e as distribuições são as
+    mesmas (ver Environment.conformance). As fagulhas são juntas pela ordem
+    das faixas.
+
+    ``max_radius`` (metade da faixa mais estreita) é o maior raio que a
+    divisão aguenta; com vento mais forte (raio ``1 + round(vento / 10)``)
+    essa iteração corre como em SequentialSpread, no processo do modelo.
+
+    Com ``processes`` as faixas correm nos processos de trabalho, com o
+    estado e as camadas estáticas em memória partilhada; sem ele correm em
+    sequência no processo do modelo, pela mesma ordem e com os mesmos
+    resultados.
+    """
+
+    supports_tiles = False
+
+    def __init__(self, model, workers=2, seed=None, processes=None, backend=None):
+        super().__init__(model, seed=seed, backend=backend)
+        self.strips = split_columns(model.world_width, 2 * workers)
+        self.max_radius = min(x1 - x0 for x0, x1 in self.strips) // 2
+        self.processes = workers > 1 if processes is None else processes
+        self._shared = []
+        self._workers = []
+        if not self.processes:
+            return
+
+        # Estado e camadas em memória partilhada; a grelha de estados do
+        # modelo passa a ser a partilhada (as equipas escrevem lá)
+        def share(data):
+            s = SharedArray.from_array(data)
+            self._shared.append(s)
+            return s
+
+        layers = self.layers
+        arrays = {name: share(getattr(layers, name))
+                  for name in SpreadLayers.DYNAMIC + SpreadLayers.STATIC}
+        arrays["heat"] = share(model.heat.excess)
+        model.state_grid = arrays["state"].array
+        self._heat = arrays["heat"].array
+        self.layers = SpreadLayers(
+            *(arrays[name].array for name in SpreadLayers.DYNAMIC),
+            *(getattr(layers, name) for name in SpreadLayers.STATIC),
+            layers.heat, layers.heat_resolution,
+        )
+        specs = {name: s.spec for name, s in arrays.items()}
+        ctx = multiprocessing.get_context()
+        for _ in range(workers):
+            parent, child = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker_main,
+                args=(child, specs, layers.heat_resolution, self.backend),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self._workers.append((process, parent))
+
+    def _phase_windows(self, phase, window):
+        """Janelas (x0, x1, y0, y1) das faixas da fase (None sem células a avançar)."""
+        wx0, wx1, wy0, wy1 = window
+        state = self.layers.state
+        windows = []
+        for x0, x1 in self.strips[phase::2]:
+            x0, x1 = max(x0, wx0), min(x1, wx1)
+            part = state[x0:x1, wy0:wy1]
+            if x0 < x1 and ((part == BURNING) | (part == DANGERED)).any():
+                windows.append((x0, x1, wy0, wy1))
+            else:
+                windows.append(None)
+        return windows
+
+    def _sweep(self, window):
+        """Avança as faixas em duas fases e devolve as fagulhas pela ordem das faixas."""
+        weather = self.weather()
+        if spread_radius(weather["wind_speed"]) > self.max_radius:
+            # Faixas estreitas demais para este vento: percurso sequencial
+            return super()._sweep(window)
+
+        kernel = BACKENDS[self.backend]
+        if self.processes:
+            self._heat[...] = self.model.heat.excess
+        dropped = [None] * len(self.strips)
+        for phase in (0, 1):
+            windows = self._phase_windows(phase, window)
+            if self.processes:
+                for (_, conn), strip in zip(self._workers, windows):
+                    conn.send(("sweep", None if strip is None else (strip, weather, self._key)))
+                results = [conn.recv() for _, conn in self._workers[:len(windows)]]
+            else:
+                results = [None if strip is None else
+                           kernel.sweep(self.layers, strip, weather, self._key)
+                           for strip in windows]
+            dropped[phase::2] = results
+        dropped = [fragulhas for fragulhas in dropped if fragulhas is not None]
+        return np.concatenate(dropped or [np.empty((0, 4), dtype=np.int64)]).reshape(-1, 4)
+
+    def close(self):
+        """Termina os processos de trabalho e liberta a memória partilhada."""
+        for process, conn in self._workers:
+            try:
+                conn.send(("stop", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process, conn in self._workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            conn.close()
+        self._workers = []
+        if self._shared:
+            # O modelo continua a funcionar com uma cópia local do estado
+            for name in SpreadLayers.DYNAMIC:
+                setattr(self.layers, name, np.array(getattr(self.layers, name)))
+            self.model.state_grid = self.layers.state
+        for shared in self._shared:
+            shared.close()
+        self._shared = []
@@ -0,0 +1,151 @@
+# pollution.py
+
+# Standard library imports
+import math
+
+# Third-party imports
+import numpy as np
+from scipy import ndimage
+
+
+# Poluentes seguidos (mesma ordem em todos os arrays)
+SPECIES = ("co", "co2", "pm2_5", "pm10", "o2")
+# Valores de fundo e emissão por célula a arder (os do AirAgent)
+BACKGROUND = np.array([0.1, 400.0, 25.0, 10.0, 21000.0])
+EMISSION = np.array([2.0, 5.0, 1.0, 1.0, -10.0])
+MIN_O2 = 15000.0
+
+
+def air_status(levels):
+    """'Perigo' se algum poluente passar o limite; caso contrário, 'Seguro'."""
+    if (
+        levels["o2"] <= 15000
+        or levels["co"] >= 20
+        or levels["co2"] >= 2000
+        or levels["pm10"] >= 200
+        or levels["pm2_5"] >= 200
+    ):
+        return "Perigo"
+    return "Seguro"
+
+
+class PollutionField:
+    """
+    Campo de poluentes numa grelha mais grossa do que a do terreno.
+
+    Cada célula grossa agrupa ``resolution`` x ``resolution`` células do
+    terreno e guarda o excesso de cada poluente face ao valor de fundo. Por
+    passo o campo é transportado pelo vento (deslocamento com interpolação
+    bilinear), difundido com um estêncil de 5 pontos e relaxado para a
+    emissão das células a arder que contém, com a mesma taxa do AirAgent.
+    Como no HeatField, só é atualizada a janela ativa: a caixa das células
+    a arder e das que ainda têm fumo, alargada no que o vento e a difusão
+    levam num passo; abaixo de ``tolerance`` o excesso passa a zero. O fumo
+    continua a ser transportado e a dissipar-se depois de o fogo acabar. Os
+    sensores pontuais guardam a leitura de cada passo.
+    """
+
+    def __init__(self, width, height, resolution=4, diffusion=0.1, decay=0.1,
+                 advection_rate=0.5, tolerance=1e-3, sensors=()):
+        self.width = width
+        self.height = height
+        self.resolution = resolution
+        self.diffusion = diffusion          # <= 0.25 para o estêncil ser estável
+        self.decay = decay
+        self.advection_rate = advection_rate  # células do terreno por passo por m/s
+        self.tolerance = tolerance          # Abaixo disto o excesso passa a zero
+        self.shape = (-(-width // resolution), -(-height // resolution))
+        self.excess = np.zeros((len(SPECIES),) + self.shape)
+        self.active = None                  # Janela (x0, x1, y0, y1) com fumo
+        self.sensors = [tuple(p) for p in sensors]
+        self.sensor_history = []  # Uma leitura (N sensores, poluentes) por passo
+
+    def add_sensor(self, pos):
+        """Acrescenta um sensor pontual na célula ``pos`` do terreno."""
+        self.sensors.append(tuple(pos))
+
+    def update(self, burning_positions, wind_direction, wind_speed):
+        """Avança um passo a partir das células a arder (N, 2) e do vento."""
+        r = self.resolution
+        cells = np.asarray(burning_positions, dtype=np.int64).reshape(-1, 2) // r
+        angle = math.radians(wind_direction)
+        step = wind_speed * self.advection_rate / r
+
+        boxes = []
+        if len(cells):
+            boxes.append((cells[:, 0].min(), cells[:, 0].max() + 1,
+                          cells[:, 1].min(), cells[:, 1].max() + 1))
+        if self.active is not None:
+            boxes.append(self.active)
+        if boxes:
+            self._advance(cells, boxes, angle, step)
+
+        if self.sensors:
+            self.sensor_history.append(self.sample(self.sensors))
+
+    def _advance(self, cells, boxes, angle, step):
+        # Folga: o que o vento leva num passo, mais uma célula de difusão
+        reach = int(math.ceil(step)) + 1
+        cw, ch = self.shape
+        x0 = max(0, min(b[0] for b in boxes) - reach)
+        x1 = min(cw, max(b[1] for b in boxes) + reach)
+        y0 = max(0, min(b[2] for b in boxes) - reach)
+        y1 = min(ch, max(b[3] for b in boxes) + reach)
+        block = self.excess[:, x0:x1, y0:y1]
+
+        counts = np.zeros(block.shape[1:])
+        if len(cells):
+            np.add.at(counts, (cells[:, 0] - x0, cells[:, 1] - y0), 1)
+
+        # Transporte pelo vento (o fumo que sai do mapa perde-se)
+        shift = (0, math.sin(angle) * step, -math.cos(angle) * step)
+        if step > 0:
+            block = ndimage.shift(block, shift, order=1, mode="constant", cval=0.0)
+
+        # Difusão (estêncil de 5 pontos, bordas refletidas)
+        padded = np.pad(block, ((0, 0), (1, 1), (1, 1)), mode="edge")
+        laplacian = (
+            padded[:, :-2, 1:-1] + padded[:, 2:, 1:-1]
+            + padded[:, 1:-1, :-2] + padded[:, 1:-1, 2:]
+            - 4 * block
+        )
+        block += self.diffusion * laplacian
+
+        # Relaxação para a emissão local
+        target = EMISSION[:, None, None] * counts[None, :, :]
+        block += (target - block) * self.decay
+        block[np.abs(block) < self.tolerance] = 0.0
+        self.excess[:, x0:x1, y0:y1] = block
+
+        smoky = np.argwhere((block != 0).any(axis=0))
+        if len(smoky):
+            self.active = (int(x0 + smoky[:, 0].min()), int(x0 + smoky[:, 0].max() + 1),
+                           int(y0 + smoky[:, 1].min()), int(y0 + smoky[:, 1].max() + 1))
+        else:
+            self.active = None
+
+    def sample(self, positions):
+        """Níveis (N, poluentes) nas células ``positions`` (N, 2) do terreno."""
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+        cx = positions[:, 0] // self.resolution
+        cy = positions[:, 1] // self.resolution
+        levels = BACKGROUND[None, :] + self.excess[:, cx, cy].T
+        levels[:, -1] = np.maximum(levels[:, -1], MIN_O2)
+        return levels
+
+    def levels_at(self, pos):
+        """Dicionário poluente -> nível na célula ``pos``."""
+        return dict(zip(SPECIES, self.sample([pos])[0].tolist()))
+
+    def status_at(self, pos):
+        """Estado do ar ('Perigo' ou 'Seguro') na célula ``pos``."""
+        return air_status(self.levels_at(pos))
+
+    def status_map(self):
+        """Máscara (grelha grossa) das células onde o ar é perigoso."""
+        levels = BACKGROUND[:, None, None] + self.excess
+        return (
+            (np.maximum(levels[4], MIN_O2) <= 15000)
+            | (levels[0] >= 20) | (levels[1] >= 2000)
+            | (levels[3] >= 200) | (levels[2] >= 200)
+        )
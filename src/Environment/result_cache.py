@@ -0,0 +1,250 @@
+# result_cache.py
+"""
+Cache em disco dos resultados das réplicas, endereçada pelo conteúdo.
+
+Cada resultado (um conjunto de arrays, por exemplo a máscara queimada e a
+grelha das iterações de ignição de ensemble.run_replicate) é guardado num
+.npz cujo nome é o resumo SHA-256 de tudo o que o determina: o tipo de
+corrida, a configuração do cenário (argumentos do EnvironmentModel, tempo,
+número de iterações), a semente, o terreno dado e a versão do código do
+simulador. Uma réplica igual a uma já corrida é lida em vez de repetida;
+mudar o código da simulação muda as chaves, mas mudar só o código de
+análise (os módulos de ANALYSIS_MODULES) não.
+
+As entradas saem pela idade (desde o último uso) e, acima do tamanho
+máximo, as menos usadas recentemente primeiro.
+"""
+
+# Standard library imports
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import time
+import weakref
+import zipfile
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from Environment.shared_landscape import LAYERS
+
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "bolsa_investigacao")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+# Pasta src/, com os pacotes do simulador
+SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código do simulador que entra na versão (ver code_version)
+SIMULATION_SOURCES = ("Agents", "Environment", os.path.join("components", "settings"))
+
+# Módulos que só correm ou analisam simulações: não mudam os resultados
+ANALYSIS_MODULES = {
+    "batch_ensemble.py", "conformance.py", "ensemble.py", "result_cache.py",
+    "results_store.py", "scenarios.py", "sensitivity.py", "strategies.py",
+}
+
+# Ficheiros temporários de escritas interrompidas são apagados ao fim deste tempo
+STALE_TEMPORARY = 3600
+
+_code_version = None
+_function_sources = {}
+_landscape_digests = weakref.WeakKeyDictionary()
+
+
+def code_version():
+    """
+    Resumo do código do simulador (os .py de SIMULATION_SOURCES fora de
+    ANALYSIS_MODULES), calculado uma vez por processo.
+    """
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for source in SIMULATION_SOURCES:
+            directory = os.path.join(SOURCE_ROOT, source)
+            for name in sorted(os.listdir(directory)):
+                if not name.endswith(".py") or name in ANALYSIS_MODULES:
+                    continue
+                digest.update(os.path.join(source, name).encode())
+                with open(os.path.join(directory, name), "rb") as f:
+                    digest.update(f.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def _source_digest(function):
+    digest = _function_sources.get(function)
+    if digest is None:
+        digest = hashlib.sha256(inspect.getsource(function).encode()).hexdigest()
+        _function_sources[function] = digest
+    return digest
+
+
+def landscape_digest(landscape):
+    """Resumo das camadas de um terrain.Landscape (None sem terreno)."""
+    if landscape is None:
+        return None
+    digest = _landscape_digests.get(landscape)
+    if digest is None:
+        h = hashlib.sha256()
+        for name in LAYERS:
+            layer = getattr(landscape, name)
+            h.update(name.encode())
+            if layer is not None:
+                layer = np.ascontiguousarray(layer)
+                h.update(f"{layer.dtype.str}{layer.shape}".encode())
+                h.update(layer.data)
+        digest = h.hexdigest()
+        _landscape_digests[landscape] = digest
+    return digest
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Valor sem representação na chave da cache: {value!r}")
+
+
+def result_key(kind, config, seed, landscape=None, code=()):
+    """
+    Chave de um resultado: ``kind`` (o tipo de corrida), ``config`` (um
+    dicionário serializável em JSON, por exemplo um cenário), a semente, o
+    terreno e a versão do código. ``code`` são as funções ou classes que
+    fazem a corrida fora do simulador (por exemplo run_replicate), cujo
+    código também entra na chave.
+    """
+    payload = {
+        "kind": kind,
+        "config": config,
+        "seed": seed,
+        "landscape": landscape_digest(landscape),
+        "code": code_version(),
+        "runner": [_source_digest(function) for function in code],
+    }
+    text = json.dumps(payload, sort_keys=True, default=_json_default)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Resultados guardados em ``directory``, um .npz por chave (ver
+    result_key), em subpastas pelos dois primeiros caracteres da chave.
+
+    As escritas vão para um ficheiro temporário que depois substitui o
+    final, por isso vários processos podem usar a mesma cache ao mesmo
+    tempo; na pior das hipóteses uma réplica é calculada duas vezes. Cada
+    leitura atualiza a data da entrada, que conta para ``max_age`` e para a
+    ordem em que ``evict`` apaga quando a cache passa de ``max_bytes``.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.directory = directory or DEFAULT_DIRECTORY
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._written = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".npz")
+
+    def get(self, key):
+        """Arrays guardados com ``key`` ({nome: array}) ou None."""
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                self._remove(path)
+                return None
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zipfile.BadZipFile):
+            # Entrada corrompida: é apagada e o resultado recalculado
+            self._remove(path)
+            return None
+        return arrays
+
+    def put(self, key, **arrays):
+        """Guarda os arrays com ``key``."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(temporary, path)
+        except BaseException:
+            self._remove(temporary)
+            raise
+        # Limpeza de vez em quando, não a cada escrita
+        self._written += os.path.getsize(path)
+        if self._written > self.max_bytes // 16:
+            self.evict()
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def entries(self):
+        """(caminho, tamanho, data do último uso) de cada entrada."""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        now = time.time()
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith(".npz"):
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+                elif entry.name.endswith(".tmp") and now - stat.st_mtime > STALE_TEMPORARY:
+                    self._remove(entry.path)
+        return entries
+
+    def size(self):
+        """Espaço ocupado pelas entradas, em bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """
+        Apaga as entradas mais velhas do que ``max_age`` e depois, pela ordem
+        do último uso, as necessárias para ficar abaixo de ``max_bytes``.
+        Devolve o número de entradas apagadas.
+        """
+        self._written = 0
+        now = time.time()
+        removed = 0
+        kept = []
+        for path, size, used in self.entries():
+            if now - used > self.max_age:
+                removed += self._remove(path)
+            else:
+                kept.append((used, size, path))
+        total = sum(size for _, size, _ in kept)
+        for used, size, path in sorted(kept):
+            if total <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            total -= size
+        return removed
+
+    def clear(self):
+        """Apaga todas as entradas."""
+        return sum(self._remove(path) for path, _, _ in self.entries())
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return 0
+        return 1
@@ -0,0 +1,305 @@
+# results_store.py
+"""
+Base de resultados local e só de acréscimo para conjuntos de réplicas e
+estudos.
+
+Cada corrida é guardada com o estudo, a semente, os parâmetros do cenário,
+as métricas finais e séries por iteração. Os processos escrevem blocos
+(.npz) nunca mais alterados, cada um nos seus ficheiros, por isso vários
+processos escrevem ao mesmo tempo sem se bloquearem. As consultas passam
+por um índice SQLite (WAL) com uma coluna por parâmetro e por métrica e um
+índice por parâmetro; os blocos novos entram no índice antes de cada
+consulta. As séries ficam em colunas nos blocos e são lidas a pedido.
+
+    python -m Environment.results_store resultados \\
+        "SELECT wind_speed, avg(burned_area) FROM runs WHERE study GLOB 'Quente_*' GROUP BY wind_speed"
+"""
+
+# Standard library imports
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+
+# Third-party imports
+import numpy as np
+import pandas as pd
+
+
+# Colunas fixas da tabela runs
+RESERVED_COLUMNS = ("id", "chunk", "row", "study", "seed")
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def _check_names(names, what):
+    for name in names:
+        if not _IDENTIFIER.fullmatch(name) or name in RESERVED_COLUMNS:
+            raise ValueError(f"Nome inválido para {what}: {name!r}")
+
+
+def _plain(value):
+    """Valor guardável em JSON e em SQLite."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, bool):
+        return int(value)
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    raise TypeError(f"Valor sem coluna possível: {value!r}")
+
+
+class ResultsWriter:
+    """
+    Acumula corridas e escreve-as em blocos de ``chunk_rows`` no
+    ResultsStore. Cada processo usa o seu (ver ResultsStore.writer); os
+    blocos são escritos num ficheiro temporário e renomeados, por isso um
+    leitor nunca vê um bloco a meio.
+    """
+
+    def __init__(self, store, chunk_rows=256):
+        self.store = store
+        self.chunk_rows = chunk_rows
+        self._records = []
+        self._series = []
+
+    def append(self, study, seed, params, metrics, series=None):
+        """
+        Acrescenta uma corrida: ``params`` e ``metrics`` são dicionários de
+        valores simples (números, texto, booleanos) e ``series`` um
+        dicionário {nome: array 1D} (por exemplo por iteração).
+        """
+        _check_names(params, "parâmetro")
+        _check_names(metrics, "métrica")
+        series = series or {}
+        _check_names(series, "série")
+        if set(params) & set(metrics):
+            raise ValueError(f"Nomes em parâmetros e métricas: {sorted(set(params) & set(metrics))}")
+        self._records.append({
+            "study": study,
+            "seed": _plain(seed),
+            "params": {name: _plain(value) for name, value in params.items()},
+            "metrics": {name: _plain(value) for name, value in metrics.items()},
+        })
+        self._series.append({name: np.asarray(values) for name, values in series.items()})
+        if len(self._records) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """Escreve as corridas acumuladas num bloco novo."""
+        if not self._records:
+            return None
+        arrays = {"records": np.array(json.dumps(self._records))}
+        for name in sorted({name for row in self._series for name in row}):
+            dtype = np.result_type(*(row[name] for row in self._series if name in row))
+            parts = [row.get(name, np.empty(0, dtype=dtype)) for row in self._series]
+            offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(part) for part in parts])
+            arrays[f"series/{name}/values"] = np.concatenate(parts)
+            arrays[f"series/{name}/offsets"] = offsets
+
+        directory = self.store.chunk_directory
+        os.makedirs(directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:8]}.npz"
+        fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(temporary, os.path.join(directory, name))
+        except BaseException:
+            os.remove(temporary)
+            raise
+        self._records, self._series = [], []
+        return name
+
+    close = flush
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+
+class ResultsStore:
+    """
+    Resultados em ``directory``: os blocos em ``chunks/`` e o índice em
+    ``index.sqlite``.
+
+    A tabela ``runs`` tem uma linha por corrida (id, chunk, row, study,
+    seed e uma coluna por parâmetro e por métrica); a tabela ``columns``
+    diz o tipo de cada coluna ("param", "metric" ou "series"). Os
+    parâmetros e o estudo têm índices, por isso filtrar e agrupar por eles
+    é rápido mesmo com muitas corridas.
+
+    O objeto só guarda a pasta: pode ser enviado para processos de
+    trabalho, que escrevem com ``writer()``.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.chunk_directory = os.path.join(directory, "chunks")
+        self.index_path = os.path.join(directory, "index.sqlite")
+
+    def writer(self, chunk_rows=256):
+        return ResultsWriter(self, chunk_rows)
+
+    def _connect(self):
+        os.makedirs(self.directory, exist_ok=True)
+        db = sqlite3.connect(self.index_path, timeout=60, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS chunks (name TEXT PRIMARY KEY, rows INTEGER)")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS columns (name TEXT, kind TEXT, PRIMARY KEY (name, kind))"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, chunk TEXT NOT NULL,"
+            " row INTEGER NOT NULL, study TEXT, seed INTEGER)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS runs_study ON runs (study)")
+        return db
+
+    def refresh(self):
+        """Junta ao índice os blocos escritos desde a última vez; devolve quantos."""
+        if not os.path.isdir(self.chunk_directory):
+            return 0
+        names = sorted(n for n in os.listdir(self.chunk_directory) if n.endswith(".npz"))
+        db = self._connect()
+        try:
+            known = {row[0] for row in db.execute("SELECT name FROM chunks")}
+            added = 0
+            for name in names:
+                if name in known:
+                    continue
+                # Um bloco por transação; outro leitor pode tê-lo juntado entretanto
+                db.execute("BEGIN IMMEDIATE")
+                try:
+                    if db.execute("SELECT 1 FROM chunks WHERE name = ?", (name,)).fetchone():
+                        db.execute("ROLLBACK")
+                        continue
+                    self._ingest(db, name)
+                    db.execute("COMMIT")
+                    added += 1
+                except BaseException:
+                    db.execute("ROLLBACK")
+                    raise
+        finally:
+            db.close()
+        return added
+
+    def _ingest(self, db, name):
+        with np.load(os.path.join(self.chunk_directory, name)) as data:
+            records = json.loads(str(data["records"]))
+            series = {key.split("/")[1] for key in data.files if key.startswith("series/")}
+
+        # As séries não são colunas de runs e podem ter o nome de uma métrica
+        known = {kind: set() for kind in ("param", "metric", "series")}
+        for column, kind in db.execute("SELECT name, kind FROM columns"):
+            known[kind].add(column)
+        wanted = {}
+        for record in records:
+            wanted.update(dict.fromkeys(record["params"], "param"))
+            wanted.update(dict.fromkeys(record["metrics"], "metric"))
+        for column, kind in [*wanted.items(), *((column, "series") for column in series)]:
+            if column in known[kind]:
+                continue
+            other = "metric" if kind == "param" else "param"
+            if kind != "series" and column in known[other]:
+                raise ValueError(f"Coluna {column!r} já existe como {other}, não {kind}")
+            db.execute("INSERT INTO columns (name, kind) VALUES (?, ?)", (column, kind))
+            known[kind].add(column)
+            if kind != "series":
+                db.execute(f'ALTER TABLE runs ADD COLUMN "{column}"')
+            if kind == "param":
+                db.execute(f'CREATE INDEX "runs_{column}" ON runs ("{column}")')
+
+        for row, record in enumerate(records):
+            values = dict(record["params"], **record["metrics"])
+            columns = ", ".join(f'"{c}"' for c in ["chunk", "row", "study", "seed", *values])
+            db.execute(
+                f"INSERT INTO runs ({columns}) VALUES ({', '.join('?' * (len(values) + 4))})",
+                [name, row, record["study"], record["seed"], *values.values()],
+            )
+        db.execute("INSERT INTO chunks (name, rows) VALUES (?, ?)", (name, len(records)))
+
+    def columns(self, kind=None):
+        """Nomes das colunas de parâmetros, métricas ou séries (todas sem ``kind``)."""
+        self.refresh()
+        db = self._connect()
+        try:
+            if kind is None:
+                return [row[0] for row in db.execute("SELECT name FROM columns ORDER BY name")]
+            return [row[0] for row in db.execute(
+                "SELECT name FROM columns WHERE kind = ? ORDER BY name", (kind,)
+            )]
+        finally:
+            db.close()
+
+    def query(self, sql, params=()):
+        """Resultado de uma consulta SQL ao índice, num DataFrame."""
+        self.refresh()
+        db = self._connect()
+        try:
+            return pd.read_sql_query(sql, db, params=params)
+        finally:
+            db.close()
+
+    def runs(self, study=None, **equals):
+        """
+        Corridas de ``study`` (padrão GLOB, por exemplo "Quente_*") com os
+        parâmetros iguais aos dados: ``store.runs("Quente_*", water_ratio=0.5)``.
+        """
+        _check_names(equals, "parâmetro")
+        where, params = [], []
+        if study is not None:
+            where.append("study GLOB ?")
+            params.append(study)
+        for column, value in equals.items():
+            where.append(f'"{column}" = ?')
+            params.append(_plain(value))
+        sql = "SELECT * FROM runs" + (" WHERE " + " AND ".join(where) if where else "")
+        return self.query(sql + " ORDER BY id", params)
+
+    def series(self, run_ids, name):
+        """Série ``name`` das corridas ``run_ids``: {id: array}."""
+        run_ids = [int(i) for i in np.atleast_1d(run_ids)]
+        rows = self.query(
+            f"SELECT id, chunk, row FROM runs WHERE id IN ({', '.join('?' * len(run_ids))})",
+            run_ids,
+        )
+        result = {}
+        for chunk, group in rows.groupby("chunk"):
+            with np.load(os.path.join(self.chunk_directory, chunk)) as data:
+                key = f"series/{name}/values"
+                if key not in data.files:
+                    continue
+                values, offsets = data[key], data[f"series/{name}/offsets"]
+            for run_id, row in zip(group["id"], group["row"]):
+                result[int(run_id)] = values[offsets[row]:offsets[row + 1]]
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory", help="pasta da base de resultados")
+    parser.add_argument("sql", nargs="?", default=None,
+                        help="consulta (sem ela, lista as colunas)")
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.directory)
+    if args.sql is None:
+        for kind in ("param", "metric", "series"):
+            print(f"{kind}: {', '.join(store.columns(kind))}")
+        return 0
+    with pd.option_context("display.max_rows", 200, "display.width", 160):
+        print(store.query(args.sql))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
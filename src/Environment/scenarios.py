@@ -0,0 +1,391 @@
+# scenarios.py
+"""
+Cenários descritos em ficheiros "Estado Inicial.txt" e execução em lote,
+sem interface, de uma pasta de cenários.
+
+O formato é o dos estudos em Simulações/: uma linha "Rótulo -> valor" por
+campo, com as unidades como a interface as escreve:
+
+    Estado Inicial
+    Temperatura-> 25º
+    Vento Direção -> Norte
+    Vento Velocidade -> 4m/s
+    Humidade-> 15%
+    Precipitação-> 17%
+    Nº Iterações -> 200
+    Nº Bombeiros -> 100
+    Bombeiros de ataque direto -> 85
+    Bombeiros de ataque indireto -> 15
+
+Além destes, um cenário pode fixar Ambiente (Árvores, Estrada ou Rio),
+Densidade, Largura, Altura, Ignição ("x, y") e Réplicas. Os campos que não
+são de entrada (por exemplo "Areas Queimadas" ou "Bombeiros de ataque
+direto (FIM)") são resultados registados na corrida original e ficam em
+``observed``. Os resultados de cada cenário são escritos numa pasta ao lado
+do ficheiro (ver write_outputs).
+
+    python -m Environment.scenarios ../Simulações --runs 20
+"""
+
+# Standard library imports
+import argparse
+import math
+import os
+import re
+import sys
+import unicodedata
+import warnings
+
+# Third-party imports
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Local imports
+from Environment.ensemble import make_scenario, run_ensembles
+from Environment.result_cache import DEFAULT_DIRECTORY, ResultCache
+from Environment.results_store import ResultsStore
+
+
+SPEC_FILENAME = "Estado Inicial.txt"
+OUTPUT_FOLDER = "Reexecucao"
+DEFAULT_RUNS = 10
+
+# Pasta Simulações/ do repositório
+SIMULATIONS_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "Simulações"
+)
+
+# Direção do vento em graus, como o slider da interface (0° = Norte)
+COMPASS = {
+    "norte": 0, "nordeste": 45, "este": 90, "leste": 90, "sudeste": 135,
+    "sul": 180, "sudoeste": 225, "oeste": 270, "noroeste": 315,
+}
+
+# Tipos de terreno (env_type do EnvironmentModel), como os botões da interface
+ENVIRONMENTS = {"Árvores": "only_trees", "Estrada": "road_trees", "Rio": "river_trees"}
+
+_NUMBER = re.compile(r"[-+]?\d+(?:[.,]\d+)?")
+
+
+def _normalize(label):
+    """Rótulo sem acentos, em minúsculas e com os espaços normalizados."""
+    text = unicodedata.normalize("NFKD", label)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+
+def _number(text):
+    match = _NUMBER.search(text)
+    if match is None:
+        raise ValueError(f"Sem valor numérico: {text!r}")
+    return float(match.group().replace(",", "."))
+
+
+def _integer(text):
+    return int(round(_number(text)))
+
+
+def _fraction(text):
+    """Percentagem ("17%") como fração."""
+    return _number(text) / 100
+
+
+def _position(text):
+    values = _NUMBER.findall(text)
+    if len(values) != 2:
+        raise ValueError(f"Posição inválida: {text!r} (esperado 'x, y')")
+    return tuple(int(v) for v in values)
+
+
+def compass_degrees(text):
+    """
+    Direção em graus a partir de "Norte", "Este/Sudeste" (a meio das duas)
+    ou de um número de graus.
+    """
+    if _NUMBER.search(text):
+        return _number(text) % 360
+    angles = []
+    for part in text.split("/"):
+        name = _normalize(part)
+        if name not in COMPASS:
+            raise ValueError(f"Direção desconhecida: {part.strip()!r}")
+        angles.append(math.radians(COMPASS[name]))
+    mean = math.atan2(sum(map(math.sin, angles)), sum(map(math.cos, angles)))
+    return round(math.degrees(mean), 6) % 360
+
+
+def compass_name(degrees):
+    """Nome do rumo quando ``degrees`` é um dos oito, senão "Nº"."""
+    for name, value in COMPASS.items():
+        if name != "leste" and math.isclose(degrees % 360, value):
+            return name.capitalize()
+    return f"{degrees:g}º"
+
+
+def environment(text):
+    names = {_normalize(label): env for label, env in ENVIRONMENTS.items()}
+    name = _normalize(text)
+    if name in names:
+        return names[name]
+    if text.strip() in ENVIRONMENTS.values():
+        return text.strip()
+    raise ValueError(f"Ambiente desconhecido: {text!r} (esperado um de {tuple(ENVIRONMENTS)})")
+
+
+# Campos de entrada: rótulo -> (secção do cenário, chave, conversão)
+FIELDS = {
+    "Temperatura": ("weather", "temperature", _number),
+    "Vento Direção": ("weather", "wind_direction", compass_degrees),
+    "Vento Velocidade": ("weather", "wind_speed", _number),
+    "Humidade": ("weather", "humidity", _number),
+    "Precipitação": ("weather", "rain_level", _fraction),
+    "Nº Iterações": (None, "steps", _integer),
+    "Nº Bombeiros": ("model", "num_firefighters", _integer),
+    "Ambiente": ("model", "env_type", environment),
+    "Densidade": ("model", "density", _fraction),
+    "Largura": (None, "width", _integer),
+    "Altura": (None, "height", _integer),
+    "Ignição": (None, "ignition", _position),
+}
+DIRECT = "Bombeiros de ataque direto"
+INDIRECT = "Bombeiros de ataque indireto"
+RUNS = "Réplicas"
+
+_LABELS = {_normalize(label): label for label in [*FIELDS, DIRECT, INDIRECT, RUNS]}
+
+
+def parse_spec(text, name=None):
+    """
+    Cenário de um texto no formato de "Estado Inicial.txt". Devolve
+    {"name", "scenario" (completo, ver ensemble.make_scenario), "runs"
+    (None sem o campo Réplicas), "observed" ({rótulo: valor} dos campos que
+    não são de entrada)}.
+    """
+    overrides = {"weather": {}, "model": {}}
+    crews = {}
+    runs = None
+    observed = {}
+    for number, line in enumerate(text.splitlines(), 1):
+        label, arrow, value = line.partition("->")
+        if not arrow:
+            continue
+        label, value = label.strip(), value.strip()
+        key = _LABELS.get(_normalize(label))
+        try:
+            if key in FIELDS:
+                section, field, convert = FIELDS[key]
+                target = overrides if section is None else overrides[section]
+                target[field] = convert(value)
+            elif key in (DIRECT, INDIRECT):
+                crews[key] = _integer(value)
+            elif key == RUNS:
+                runs = _integer(value)
+            else:
+                try:
+                    observed[label] = _number(value)
+                except ValueError:
+                    observed[label] = value
+        except ValueError as error:
+            raise ValueError(f"{name or 'cenário'}, linha {number}: {error}") from None
+
+    # Proporção de equipas de ataque direto (jato de água)
+    if DIRECT in crews:
+        total = crews[DIRECT] + crews.get(
+            INDIRECT, overrides["model"].get("num_firefighters", crews[DIRECT]) - crews[DIRECT]
+        )
+        overrides["model"]["water_ratio"] = crews[DIRECT] / total if total else 0.0
+    elif INDIRECT in crews:
+        total = overrides["model"].get("num_firefighters", crews[INDIRECT])
+        overrides["model"]["water_ratio"] = 1 - crews[INDIRECT] / total if total else 0.0
+
+    return {
+        "name": name,
+        "scenario": make_scenario(**overrides),
+        "runs": runs,
+        "observed": observed,
+    }
+
+
+def load_spec(path):
+    """
+    Lê um "Estado Inicial.txt". O nome do cenário é o da sua pasta; sem o
+    campo Ambiente, uma pasta Rio_* usa o terreno com rio, como nesses
+    estudos.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    name = os.path.basename(directory)
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    spec = parse_spec(text, name)
+    spec["directory"] = directory
+    has_environment = any(
+        _LABELS.get(_normalize(line.partition("->")[0])) == "Ambiente"
+        for line in text.splitlines() if "->" in line
+    )
+    if not has_environment and name.startswith("Rio_"):
+        spec["scenario"]["model"]["env_type"] = "river_trees"
+    return spec
+
+
+def format_spec(spec):
+    """Texto de um cenário no formato de "Estado Inicial.txt" (ver parse_spec)."""
+    scenario = spec["scenario"]
+    weather, model = scenario["weather"], scenario["model"]
+    lines = [
+        "Estado Inicial",
+        f"Temperatura-> {weather['temperature']:g}º",
+        f"Vento Direção -> {compass_name(weather['wind_direction'])}",
+        f"Vento Velocidade -> {weather['wind_speed']:g}m/s",
+        f"Humidade-> {weather['humidity']:g}%",
+        f"Precipitação-> {weather['rain_level'] * 100:g}%",
+        f"Nº Iterações -> {scenario['steps']}",
+        f"Nº Bombeiros -> {model['num_firefighters']}",
+    ]
+    if "water_ratio" in model:
+        direct = round(model["water_ratio"] * model["num_firefighters"])
+        lines.append(f"{DIRECT} -> {direct}")
+        lines.append(f"{INDIRECT} -> {model['num_firefighters'] - direct}")
+    if "env_type" in model:
+        label = {env: label for label, env in ENVIRONMENTS.items()}.get(
+            model["env_type"], model["env_type"]
+        )
+        lines.append(f"Ambiente -> {label}")
+    if "density" in model:
+        lines.append(f"Densidade -> {model['density'] * 100:g}%")
+    lines.append(f"Largura -> {scenario['width']}")
+    lines.append(f"Altura -> {scenario['height']}")
+    if scenario["ignition"] is not None:
+        lines.append(f"Ignição -> {scenario['ignition'][0]}, {scenario['ignition'][1]}")
+    if spec.get("runs") is not None:
+        lines.append(f"{RUNS} -> {spec['runs']}")
+    for label, value in spec.get("observed", {}).items():
+        lines.append(f"{label}-> {value:g}" if isinstance(value, float) else f"{label}-> {value}")
+    return "\n".join(lines) + "\n"
+
+
+def find_specs(root):
+    """Caminhos dos "Estado Inicial.txt" em ``root`` e nas suas subpastas."""
+    paths = []
+    for directory, folders, files in os.walk(root):
+        folders[:] = sorted(f for f in folders if f != OUTPUT_FOLDER)
+        if SPEC_FILENAME in files:
+            paths.append(os.path.join(directory, SPEC_FILENAME))
+    return sorted(paths)
+
+
+def run_specs(specs, runs=DEFAULT_RUNS, workers=None, first_seed=0, cache=None,
+              store=None, progress=None):
+    """
+    Corre as réplicas de todos os cenários no mesmo pool (ver
+    ensemble.run_ensembles): as do campo Réplicas de cada um, ou ``runs``.
+    Devolve {nome: BurnProbability}; com ``store`` cada cenário é um estudo
+    com o seu nome.
+    """
+    names = [spec["name"] for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("Há cenários com o mesmo nome")
+    return run_ensembles(
+        {spec["name"]: spec["scenario"] for spec in specs},
+        {spec["name"]: spec["runs"] or runs for spec in specs},
+        workers=workers, first_seed=first_seed, progress=progress, cache=cache, store=store,
+    )
+
+
+def write_outputs(spec, result, folder=OUTPUT_FOLDER, confidence=0.95):
+    """
+    Escreve os resultados de um cenário em ``folder``, ao lado do seu
+    ficheiro: os agregados (probabilidade_queima.npz), o mapa de
+    probabilidade de queima e de chegada média (Probabilidade_Queima.png)
+    e um resumo (Resumo.txt) com os resultados registados na corrida
+    original. Devolve a pasta.
+    """
+    directory = os.path.join(spec["directory"], folder)
+    os.makedirs(directory, exist_ok=True)
+    result.save(os.path.join(directory, "probabilidade_queima.npz"))
+
+    fig = Figure(figsize=(11, 5), dpi=100)
+    FigureCanvasAgg(fig)
+    ax_prob, ax_time = fig.add_subplot(121), fig.add_subplot(122)
+    image = ax_prob.imshow(result.burn_probability.T, cmap="YlOrRd", origin="upper",
+                           interpolation="nearest", vmin=0, vmax=1)
+    fig.colorbar(image, ax=ax_prob, label="Probabilidade")
+    ax_prob.set_title(f"Probabilidade de Queima ({result.runs} réplicas)", size=11)
+    image = ax_time.imshow(np.ma.masked_invalid(result.mean_arrival).T, cmap="viridis",
+                           origin="upper", interpolation="nearest")
+    fig.colorbar(image, ax=ax_time, label="Iteração")
+    ax_time.set_title("Chegada Média do Fogo", size=11)
+    for ax in (ax_prob, ax_time):
+        ax.set_xlabel("Posição X"); ax.set_ylabel("Posição Y")
+    fig.suptitle(spec["name"])
+    fig.savefig(os.path.join(directory, "Probabilidade_Queima.png"))
+
+    deviation = math.sqrt(result.area_m2 / (result.runs - 1)) if result.runs > 1 else 0.0
+    lines = [
+        "Reexecução",
+        f"Réplicas-> {result.runs}",
+        f"Área ardida média-> {result.area_mean:.1f} "
+        f"(IC {confidence:.0%} ± {result.half_width('burned_area', confidence):.1f})",
+        f"Área ardida desvio padrão-> {deviation:.1f}",
+        f"Células com probabilidade de queima > 50%-> "
+        f"{int((result.burn_probability > 0.5).sum())}",
+    ]
+    if spec["observed"]:
+        lines.append("")
+        lines.append("Registo original")
+        lines += [f"{label}-> {value:g}" if isinstance(value, float) else f"{label}-> {value}"
+                  for label, value in spec["observed"].items()]
+    with open(os.path.join(directory, "Resumo.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return directory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory", nargs="?", default=SIMULATIONS_DIRECTORY,
+                        help="pasta com os cenários (por omissão Simulações/)")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS,
+                        help="réplicas dos cenários sem o campo Réplicas")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="processos (por omissão todos os núcleos)")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--spread-engine", default=None)
+    parser.add_argument("--output-folder", default=OUTPUT_FOLDER)
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_DIRECTORY, default=None,
+                        metavar="PASTA", help="reutiliza as réplicas já corridas")
+    parser.add_argument("--store", default=None, metavar="PASTA",
+                        help="acrescenta as réplicas a uma base de resultados")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="só lê e mostra os cenários")
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    specs = [load_spec(path) for path in find_specs(args.directory)]
+    if not specs:
+        print(f"Nenhum {SPEC_FILENAME} em {args.directory}", file=sys.stderr)
+        return 1
+    for spec in specs:
+        if args.spread_engine is not None:
+            spec["scenario"]["model"]["spread_engine"] = args.spread_engine
+    if args.dry_run:
+        for spec in specs:
+            print(f"{spec['name']}: {spec['scenario']}")
+        return 0
+
+    by_name = {spec["name"]: spec for spec in specs}
+
+    def finished(name, result):
+        folder = write_outputs(by_name[name], result, args.output_folder)
+        print(f"{name}: {result.runs} réplicas, área ardida média {result.area_mean:.1f}"
+              f" -> {folder}", file=sys.stderr)
+
+    run_specs(
+        specs, runs=args.runs, workers=args.workers, first_seed=args.first_seed,
+        cache=ResultCache(args.cache) if args.cache else None,
+        store=ResultsStore(args.store) if args.store else None, progress=finished,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
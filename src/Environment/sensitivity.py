@@ -0,0 +1,365 @@
+# sensitivity.py
+"""
+Análise de sensibilidade global dos coeficientes da propagação (os alfas de
+Agents.agentes.SPREAD_COEFFICIENTS).
+
+Cada coeficiente varia num intervalo (por omissão ±50% do valor atual) e
+o simulador é avaliado num plano de pontos desse espaço; cada ponto corre
+as mesmas sementes (números aleatórios comuns), por isso as diferenças
+entre pontos vêm dos coeficientes e não do terreno ou da ignição. Há dois
+métodos:
+
+- Morris (efeitos elementares): poucas corridas, ordena os coeficientes
+  pela influência (mu*) e mostra efeitos não lineares ou interações
+  (sigma). Bom para uma primeira triagem.
+- Sobol (Saltelli/Jansen): índices de primeira ordem (S1) e totais (ST),
+  a fração da variância das métricas devida a cada coeficiente, com
+  intervalos de confiança por bootstrap. Precisa de N·(k + 2) pontos.
+
+As réplicas passam pela cache de resultados (result_cache), por isso
+aumentar o número de trajetórias ou de amostras reaproveita os pontos já
+corridos: os planos de Morris e de Sobol começam sempre pelos mesmos
+pontos para a mesma semente.
+
+    python -m Environment.sensitivity morris --trajectories 10 --replicates 4 --workers 4
+    python -m Environment.sensitivity sobol --samples 64 --replicates 4 --workers 4
+
+O cenário é o de ensemble.DEFAULT_SCENARIO ou o de um "Estado Inicial.txt"
+(--spec), com o tempo alterável por opções. A 25 ºC a probabilidade de
+ignição satura e os alfas da propagação quase não mexem nas métricas; para
+os estudar convém um tempo em que o fogo não arde tudo:
+
+    python -m Environment.sensitivity morris --temperature 5 --humidity 40
+    python -m Environment.sensitivity morris --spec "../Simulações/Frio_Int/Estado Inicial.txt"
+"""
+
+# Standard library imports
+import argparse
+import multiprocessing
+import sys
+import warnings
+
+# Third-party imports
+import numpy as np
+from scipy.stats import qmc
+
+# Local imports
+from Agents.agentes import SPREAD_COEFFICIENTS
+from Environment.ensemble import make_scenario, replicate_metrics, run_replicate
+from Environment.result_cache import DEFAULT_DIRECTORY, ResultCache
+from Environment.scenarios import load_spec
+from Environment.shared_landscape import SharedLandscape, init_worker, worker_landscape
+
+
+METRICS = ("burned_area", "duration")
+
+# Variação relativa de cada coeficiente por omissão (±50%)
+DEFAULT_RANGE = 0.5
+
+# Valores do tempo do cenário que a linha de comandos pode mudar
+WEATHER_OPTIONS = ("temperature", "humidity", "wind_speed", "wind_direction", "rain_level")
+
+
+def parameter_bounds(names=None, spread=DEFAULT_RANGE):
+    """
+    Intervalos {nome: (mínimo, máximo)} dos coeficientes ``names`` (todos
+    por omissão), ``spread`` abaixo e acima do valor de SPREAD_COEFFICIENTS.
+    """
+    names = list(SPREAD_COEFFICIENTS) if names is None else list(names)
+    unknown = set(names) - set(SPREAD_COEFFICIENTS)
+    if unknown:
+        raise ValueError(
+            f"Coeficientes desconhecidos: {sorted(unknown)} "
+            f"(esperado de {tuple(SPREAD_COEFFICIENTS)})"
+        )
+    if not 0 <= spread < 1:
+        raise ValueError("A variação relativa deve estar em [0, 1)")
+    return {
+        name: (SPREAD_COEFFICIENTS[name] * (1 - spread), SPREAD_COEFFICIENTS[name] * (1 + spread))
+        for name in names
+    }
+
+
+def scale(unit, bounds):
+    """Pontos em [0, 1]^k (uma linha por ponto) nos intervalos de ``bounds``."""
+    low, high = np.array(list(bounds.values()), dtype=float).T
+    return low + np.asarray(unit, dtype=float) * (high - low)
+
+
+def point_scenario(scenario, names, values):
+    """O cenário com os coeficientes ``names`` nos valores dados."""
+    coefficients = dict(scenario["model"].get("spread_coefficients") or {})
+    coefficients.update((name, float(value)) for name, value in zip(names, values))
+    return dict(scenario, model=dict(scenario["model"], spread_coefficients=coefficients))
+
+
+def _run_point(task):
+    """Uma réplica de um ponto; devolve (índice, semente, métricas)."""
+    index, scenario, seed, landscape, cache = task
+    warnings.filterwarnings("ignore", category=UserWarning)
+    if landscape is None:
+        landscape = worker_landscape()
+    burned, ignition = run_replicate(scenario, seed, landscape, cache)
+    return index, seed, replicate_metrics(burned, ignition)
+
+
+def evaluate(scenario, bounds, unit_points, replicates, workers=None, first_seed=0,
+             landscape=None, cache=None):
+    """
+    Média das métricas em cada ponto de ``unit_points`` (em [0, 1]^k, pela
+    ordem de ``bounds``) sobre as sementes ``first_seed`` a
+    ``first_seed + replicates - 1``: {métrica: array por ponto}.
+    """
+    names = list(bounds)
+    values = scale(unit_points, bounds)
+    seeds = range(first_seed, first_seed + replicates)
+    tasks = [
+        (index, point_scenario(scenario, names, point), seed, None, cache)
+        for index, point in enumerate(values) for seed in seeds
+    ]
+    if workers and workers > 1:
+        # O terreno é publicado uma vez em memória partilhada (ver ensemble)
+        shared = SharedLandscape(landscape) if landscape is not None else None
+        try:
+            ctx = multiprocessing.get_context()
+            initializer, initargs = (init_worker, (shared.spec,)) if shared else (None, ())
+            with ctx.Pool(workers, initializer=initializer, initargs=initargs) as pool:
+                rows = list(pool.imap_unordered(_run_point, tasks, chunksize=replicates))
+        finally:
+            if shared is not None:
+                shared.close()
+    else:
+        rows = [_run_point(task[:3] + (landscape, cache)) for task in tasks]
+
+    totals = {name: np.zeros(len(values)) for name in METRICS}
+    for index, _, metrics in rows:
+        for name in METRICS:
+            totals[name][index] += metrics[name]
+    return {name: total / replicates for name, total in totals.items()}
+
+
+def morris_design(k, trajectories, levels=4, seed=0):
+    """
+    Plano de Morris em [0, 1]^k: ``trajectories`` trajetórias de k + 1
+    pontos numa grelha de ``levels`` níveis, cada uma a mudar um fator de
+    cada vez de delta = levels / (2 (levels - 1)).
+
+    Devolve os pontos (trajectories·(k + 1), k), a ordem em que os fatores
+    mudam (trajectories, k) e o sentido de cada mudança (+1 ou -1). A
+    trajetória i só depende de ``seed`` e de i, por isso um plano com mais
+    trajetórias começa pelas mesmas.
+    """
+    if levels < 2 or levels % 2:
+        raise ValueError("O número de níveis de Morris deve ser par")
+    delta = levels / (2 * (levels - 1))
+    grid = np.arange(levels) / (levels - 1)
+    points = np.empty((trajectories, k + 1, k))
+    orders = np.empty((trajectories, k), dtype=np.int64)
+    signs = np.empty((trajectories, k))
+    for i in range(trajectories):
+        rng = np.random.default_rng([seed, i])
+        # Valores de partida nos níveis de onde se pode subir delta
+        start = rng.choice(grid[grid <= 1 - delta + 1e-12], size=k)
+        sign = rng.choice((-1.0, 1.0), size=k)
+        x = np.where(sign > 0, start, start + delta)
+        order = rng.permutation(k)
+        points[i, 0] = x
+        for m, j in enumerate(order):
+            x = x.copy()
+            x[j] += sign[j] * delta
+            points[i, m + 1] = x
+        orders[i], signs[i] = order, sign
+    return points.reshape(-1, k), orders, signs
+
+
+def morris_indices(outputs, orders, signs, delta):
+    """
+    Efeitos elementares das saídas de um plano de Morris (por ponto, pela
+    ordem de morris_design): mu, mu* (média dos valores absolutos) e sigma
+    de cada fator, em unidades da saída por todo o intervalo do fator.
+    """
+    trajectories, k = orders.shape
+    y = np.asarray(outputs, dtype=float).reshape(trajectories, k + 1)
+    effects = np.empty((trajectories, k))
+    for i in range(trajectories):
+        steps = np.diff(y[i]) / (signs[i, orders[i]] * delta)
+        effects[i, orders[i]] = steps
+    return {
+        "mu": effects.mean(axis=0),
+        "mu_star": np.abs(effects).mean(axis=0),
+        "sigma": effects.std(axis=0, ddof=1) if trajectories > 1 else np.full(k, np.nan),
+    }
+
+
+def run_morris(scenario, bounds, trajectories, replicates, levels=4, seed=0, workers=None,
+               first_seed=0, landscape=None, cache=None):
+    """
+    Método de Morris: {métrica: {coeficiente: {"mu", "mu_star", "sigma"}}},
+    com trajectories·(k + 1) pontos de ``replicates`` réplicas cada.
+    """
+    names = list(bounds)
+    points, orders, signs = morris_design(len(names), trajectories, levels, seed)
+    outputs = evaluate(scenario, bounds, points, replicates, workers, first_seed,
+                       landscape, cache)
+    delta = levels / (2 * (levels - 1))
+    result = {}
+    for metric in METRICS:
+        indices = morris_indices(outputs[metric], orders, signs, delta)
+        result[metric] = {
+            name: {key: float(values[j]) for key, values in indices.items()}
+            for j, name in enumerate(names)
+        }
+    return result
+
+
+def sobol_design(k, samples, seed=0):
+    """
+    Matrizes A e B (samples, k) de uma sequência de Sobol embaralhada em
+    [0, 1]^2k. Para a mesma semente, as primeiras linhas não dependem de
+    ``samples``.
+    """
+    sampler = qmc.Sobol(2 * k, scramble=True, seed=seed)
+    with warnings.catch_warnings():
+        # Potências de 2 têm melhor equilíbrio, mas qualquer tamanho serve
+        warnings.simplefilter("ignore", UserWarning)
+        u = sampler.random(samples)
+    return u[:, :k], u[:, k:]
+
+
+def _half_width(samples, q):
+    """Meia largura do intervalo [1 - q, q] dos quantis de bootstrap."""
+    low, high = np.nanquantile(samples, [1 - q, q], axis=0)
+    return (high - low) / 2
+
+
+def sobol_indices(f_a, f_b, f_ab, bootstrap=200, confidence=0.95, seed=0):
+    """
+    Índices de primeira ordem (Saltelli 2010) e totais (Jansen) a partir de
+    f(A), f(B) e f(AB_j) (k, N), com intervalos de confiança por bootstrap
+    das N linhas: {"S1", "S1_conf", "ST", "ST_conf"} por fator.
+    """
+    f_a, f_b, f_ab = (np.asarray(f, dtype=float) for f in (f_a, f_b, f_ab))
+
+    def estimate(rows):
+        a, b, ab = f_a[rows], f_b[rows], f_ab[:, rows]
+        both = np.concatenate((a, b))
+        variance = both.var()
+        if variance == 0:
+            nan = np.full(len(ab), np.nan)
+            return nan, nan
+        # Centrar f(B) não muda a média do estimador e reduz a sua variância
+        first = ((b - both.mean()) * (ab - a)).mean(axis=1) / variance
+        total = 0.5 * ((a - ab) ** 2).mean(axis=1) / variance
+        return first, total
+
+    n = len(f_a)
+    first, total = estimate(np.arange(n))
+    rng = np.random.default_rng(seed)
+    samples = [estimate(rng.integers(0, n, n)) for _ in range(bootstrap)]
+    q = 0.5 + confidence / 2
+    if samples:
+        first_conf = _half_width(np.array([s[0] for s in samples]), q)
+        total_conf = _half_width(np.array([s[1] for s in samples]), q)
+    else:
+        first_conf = total_conf = np.full(len(first), np.nan)
+    return {"S1": first, "S1_conf": first_conf, "ST": total, "ST_conf": total_conf}
+
+
+def run_sobol(scenario, bounds, samples, replicates, seed=0, bootstrap=200, confidence=0.95,
+              workers=None, first_seed=0, landscape=None, cache=None):
+    """
+    Índices de Sobol: {métrica: {coeficiente: {"S1", "S1_conf", "ST",
+    "ST_conf"}}}, com samples·(k + 2) pontos de ``replicates`` réplicas.
+    """
+    names = list(bounds)
+    k = len(names)
+    a, b = sobol_design(k, samples, seed)
+    # A, B e, para cada fator j, A com a coluna j de B
+    blocks = [a, b]
+    for j in range(k):
+        ab = a.copy()
+        ab[:, j] = b[:, j]
+        blocks.append(ab)
+    outputs = evaluate(scenario, bounds, np.concatenate(blocks), replicates, workers,
+                       first_seed, landscape, cache)
+    result = {}
+    for metric in METRICS:
+        y = outputs[metric].reshape(k + 2, samples)
+        indices = sobol_indices(y[0], y[1], y[2:], bootstrap, confidence, seed)
+        result[metric] = {
+            name: {key: float(values[j]) for key, values in indices.items()}
+            for j, name in enumerate(names)
+        }
+    return result
+
+
+def format_indices(result, sort_by):
+    """Tabela por métrica, com os coeficientes por ordem decrescente de ``sort_by``."""
+    lines = []
+    for metric, indices in result.items():
+        keys = list(next(iter(indices.values())))
+        lines.append(f"{metric}:")
+        lines.append(f"  {'coeficiente':<24}" + "".join(f"{key:>12}" for key in keys))
+        ranked = sorted(indices.items(), key=lambda item: -np.nan_to_num(abs(item[1][sort_by])))
+        for name, values in ranked:
+            lines.append(f"  {name:<24}" + "".join(f"{values[key]:>12.4g}" for key in keys))
+        lines.append("")
+    return "\n".join(lines).rstrip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("method", choices=("morris", "sobol"))
+    parser.add_argument("--parameters", nargs="+", default=None,
+                        choices=list(SPREAD_COEFFICIENTS), metavar="COEFICIENTE",
+                        help="coeficientes a variar (todos por omissão)")
+    parser.add_argument("--range", type=float, default=DEFAULT_RANGE,
+                        help="variação relativa de cada coeficiente")
+    parser.add_argument("--trajectories", type=int, default=10, help="trajetórias de Morris")
+    parser.add_argument("--levels", type=int, default=4, help="níveis da grelha de Morris")
+    parser.add_argument("--samples", type=int, default=64, help="amostras base de Sobol")
+    parser.add_argument("--bootstrap", type=int, default=200)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--replicates", type=int, default=4, help="sementes por ponto")
+    parser.add_argument("--seed", type=int, default=0, help="semente do plano")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--spec", default=None, metavar="FICHEIRO",
+                        help='cenário de um "Estado Inicial.txt" (o de omissão sem ele)')
+    parser.add_argument("--steps", type=int, default=None,
+                        help="iterações (as do cenário por omissão)")
+    for name in WEATHER_OPTIONS:
+        parser.add_argument("--" + name.replace("_", "-"), type=float, default=None,
+                            help="valor do tempo no cenário")
+    parser.add_argument("--spread-engine", default="sequential")
+    parser.add_argument("--cache", default=DEFAULT_DIRECTORY, metavar="PASTA",
+                        help="pasta da cache de réplicas")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="corre todas as réplicas de novo")
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    scenario = make_scenario() if args.spec is None else load_spec(args.spec)["scenario"]
+    if args.steps is not None:
+        scenario["steps"] = args.steps
+    scenario["weather"].update({
+        name: getattr(args, name) for name in WEATHER_OPTIONS
+        if getattr(args, name) is not None
+    })
+    scenario["model"]["spread_engine"] = args.spread_engine
+    bounds = parameter_bounds(args.parameters, args.range)
+    cache = None if args.no_cache else ResultCache(args.cache)
+    common = {"workers": args.workers, "first_seed": args.first_seed, "cache": cache}
+    if args.method == "morris":
+        result = run_morris(scenario, bounds, args.trajectories, args.replicates,
+                            levels=args.levels, seed=args.seed, **common)
+        print(format_indices(result, "mu_star"))
+    else:
+        result = run_sobol(scenario, bounds, args.samples, args.replicates, seed=args.seed,
+                           bootstrap=args.bootstrap, confidence=args.confidence, **common)
+        print(format_indices(result, "ST"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+# shared_arrays.py
+
+# Standard library imports
+from multiprocessing import shared_memory
+
+# Third-party imports
+import numpy as np
+
+
+class SharedArray:
+    """
+    Array numpy guardado num bloco de memória partilhada.
+
+    O processo que o cria (``create``) é o dono e apaga o bloco em ``close``;
+    os processos de trabalho ligam-se pelo nome com ``attach`` e só fecham a
+    sua ligação. ``spec`` (nome, forma, tipo) é o que se envia aos processos.
+    """
+
+    def __init__(self, shm, shape, dtype, owner):
+        self._shm = shm
+        self.owner = owner
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, shape, dtype, fill=None):
+        dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(shape)) * dtype.itemsize)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        shared = cls(shm, tuple(shape), dtype, owner=True)
+        if fill is not None:
+            shared.array[...] = fill
+        return shared
+
+    @classmethod
+    def from_array(cls, data):
+        """Cópia de ``data`` para um bloco partilhado novo."""
+        data = np.asarray(data)
+        return cls.create(data.shape, data.dtype, fill=data)
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype = spec
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, shape, np.dtype(dtype), owner=False)
+
+    @property
+    def spec(self):
+        return (self._shm.name, self.array.shape, self.array.dtype.str)
+
+    def close(self):
+        if self._shm is None:
+            return
+        self.array = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+        self._shm = None
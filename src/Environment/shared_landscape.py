@@ -0,0 +1,74 @@
+# shared_landscape.py
+
+# Local imports
+from Environment.shared_arrays import SharedArray
+from Environment.terrain import Landscape
+
+
+LAYERS = ("altitude", "fuel", "tree_height", "water", "road")
+
+
+class SharedLandscape:
+    """
+    Camadas estáticas de um terreno publicadas uma vez em memória partilhada.
+
+    O processo principal cria-o a partir de um Landscape (por exemplo
+    ``Landscape.from_model``) e passa ``spec`` aos processos de trabalho,
+    que chamam ``attach`` e recebem um Landscape só de leitura sobre a
+    mesma memória. Com as camadas na forma final o EnvironmentModel usa-as
+    diretamente como grelhas estáticas; com um motor em arrays também não
+    cria os PatchAgent de início (só os que forem pedidos), por isso cada
+    processo só guarda o seu estado dinâmico.
+    """
+
+    def __init__(self, landscape):
+        self._shared = {}
+        for name in LAYERS:
+            layer = getattr(landscape, name)
+            if layer is not None:
+                self._shared[name] = SharedArray.from_array(layer)
+        self.spec = {name: shared.spec for name, shared in self._shared.items()}
+
+    @staticmethod
+    def attach(spec):
+        """Landscape só de leitura sobre as camadas publicadas em ``spec``."""
+        shared = {name: SharedArray.attach(s) for name, s in spec.items()}
+        layers = {}
+        for name, s in shared.items():
+            s.array.flags.writeable = False
+            layers[name] = s.array
+        landscape = Landscape(
+            layers["altitude"], fuel=layers.get("fuel"),
+            tree_height=layers.get("tree_height"), water=layers.get("water"),
+            road=layers.get("road"),
+        )
+        # Mantém a memória partilhada ligada enquanto o terreno existir
+        landscape.shared = list(shared.values())
+        return landscape
+
+    def close(self):
+        """Liberta a memória partilhada (os processos já não a devem usar)."""
+        for shared in self._shared.values():
+            shared.close()
+        self._shared = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Terreno ligado por cada processo de trabalho de um pool (ver init_worker)
+_worker_landscape = None
+
+
+def init_worker(spec):
+    """Inicializador de pool: liga o processo ao terreno partilhado uma única vez."""
+    global _worker_landscape
+    _worker_landscape = SharedLandscape.attach(spec)
+
+
+def worker_landscape():
+    """Terreno partilhado do processo atual (None fora de um pool inicializado)."""
+    return _worker_landscape
@@ -0,0 +1,266 @@
+# spread_engine.py
+
+# Standard library imports
+import random
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from Agents.agentes import FragulhaAgent, PATCH_STATES, STATE_CODES
+from Environment import spread_jit, spread_kernel
+from Environment.spread_kernel import (
+    BURNING, DANGERED, SpreadLayers, spread_radius, step_key,
+)
+
+
+# Cor de cada estado escrito pela propagação em bloco (as de PatchAgent.step)
+STATE_COLORS = {"burning": 15, "burned": 5, "dangered": 45, "forested": 55}
+
+
+# Estados em que um patch ainda faz alguma coisa no seu passo
+ACTIVE_PATCH_CODES = np.array([
+    STATE_CODES["burning"], STATE_CODES["dangered"], STATE_CODES["firebreak"]
+])
+
+
+# Implementações das regras em arrays (iguais nos resultados)
+BACKENDS = {"numpy": spread_kernel, "jit": spread_jit}
+
+
+def spread_backend(name=None):
+    """
+    Nome da implementação a usar: a compilada ("jit", com Numba) quando está
+    disponível, senão a de referência em numpy.
+    """
+    if name is None:
+        return "jit" if spread_jit.AVAILABLE else "numpy"
+    if name not in BACKENDS:
+        raise ValueError(f"Implementação desconhecida: {name!r} (esperado uma de {tuple(BACKENDS)})")
+    if name == "jit" and not spread_jit.AVAILABLE:
+        raise ValueError("A implementação 'jit' precisa do Numba")
+    return name
+
+
+class SpreadEngine:
+    """
+    Interface dos motores de propagação do fogo.
+
+    O modelo chama ``step`` no início de cada iteração (antes do ar e das
+    equipas), ``end_step`` no fim (depois do scheduler) e ``close`` ao
+    terminar. ``uses_patches`` diz se o motor avança os próprios PatchAgent
+    (que então ficam no scheduler); os restantes escrevem em ``state_grid``
+    e copiam as mudanças para os patches com ``_sync_patches``, para a
+    interface e para as equipas. ``supports_tiles`` diz se o motor funciona
+    no modo em blocos (tile_size), só na zona com fogo.
+    """
+
+    uses_patches = False
+    supports_tiles = False
+
+    def __init__(self, model):
+        self.model = model
+
+    def weather(self):
+        """
+        Estado do tempo da iteração atual, no formato de spread_kernel, com
+        os coeficientes da propagação do modelo.
+        """
+        model = self.model
+        return {
+            "wind_speed": model.wind_speed,
+            "wind_direction": model.wind_direction,
+            "humidity": model.humidity,
+            "rain_level": model.rain_level,
+            "itsrain": bool(model.itsrain_),
+            "ambient": model.heat.ambient,
+            "coefficients": model.spread_coefficients,
+        }
+
+    def step(self):
+        raise NotImplementedError
+
+    def end_step(self):
+        pass
+
+    def fragulhas_in_flight(self):
+        """Há fagulhas largadas que ainda não caíram."""
+        return False
+
+    def close(self):
+        pass
+
+    def _sync_patches(self, changed, codes):
+        """
+        Copia os estados novos para os PatchAgent (usados pela interface). As
+        células sem patch ficam de fora: o patch é criado com o estado da
+        grelha quando for pedido (ver EnvironmentModel.patch_at).
+        """
+        height = self.model.world_height
+        for cell, code in zip(changed.tolist(), codes.tolist()):
+            patch = self.model.created_patch((cell // height, cell % height))
+            if patch is None:
+                continue
+            name = PATCH_STATES[code]
+            patch._state = name
+            patch.pcolor = STATE_COLORS[name]
+            if name == "burning":
+                patch.burn_time = None
+
+
+class PatchSpreadEngine(SpreadEngine):
+    """
+    Motor de referência: a propagação é a de PatchAgent.step.
+
+    No modo denso os patches avançam na sua vez no scheduler; no modo em
+    blocos só avançam os dos blocos com fogo, células em perigo ou linhas
+    de corte.
+    """
+
+    uses_patches = True
+    supports_tiles = True
+
+    def step(self):
+        model = self.model
+        if model.tile_size is None:
+            return
+        for tile in model.tiles.active(model.state_grid, ACTIVE_PATCH_CODES):
+            for patch in model.tile_patches[tile]:
+                patch.step()
+
+    def fragulhas_in_flight(self):
+        # As fagulhas são acrescentadas ao fim do scheduler e saem ao cair
+        schedule = self.model.schedule
+        return bool(schedule) and isinstance(schedule[-1], FragulhaAgent)
+
+
+class SequentialSpread(SpreadEngine):
+    """
+    Propagação em arrays com a mesma ordem dos PatchAgent no scheduler.
+
+    As células são percorridas por colunas e uma célula incendiada mais à
+    frente no percurso ainda propaga na mesma iteração, como na referência
+    (ver spread_kernel.sweep_cells). As fagulhas largadas numa iteração caem
+    no fim da seguinte, depois das equipas, como os FragulhaAgent.
+
+    Os sorteios vêm de spread_kernel.uniform, por isso os resultados não são
+    os mesmos, sorteio a sorteio, dos PatchAgent; as distribuições sim (ver
+    Environment.conformance).
+
+    No modo em blocos só avançam as células da caixa com fogo ou células em
+    perigo, alargada aos blocos que toca, como os PatchAgent dos blocos
+    ativos em PatchSpreadEngine; os blocos ao alcance da propagação são
+    criados antes de cada iteração.
+    """
+
+    supports_tiles = True
+
+    def __init__(self, model, seed=None, backend=None):
+        super().__init__(model)
+        width, height = model.world_width, model.world_height
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.steps = 0
+        self.backend = spread_backend(backend)
+        self.layers = SpreadLayers(
+            model.state_grid, np.zeros((width, height), dtype=np.int8),
+            np.zeros((width, height), dtype=np.int8), model.altitude_grid,
+            model.tree_height_grid, model.fuel_grid, model.species_grid,
+            model.heat.excess, model.heat.resolution,
+        )
+        self._pending = np.empty((0, 4), dtype=np.int64)
+        self._landing = self._pending
+        # Modo em blocos: caixa (x0, x1, y0, y1) das células a arder ou em perigo
+        self._box = None
+
+    def _window(self):
+        """
+        Células que avançam nesta iteração (x0, x1, y0, y1), ou None sem
+        células a arder nem em perigo: no modo denso todas a partir da
+        primeira coluna com alguma; no modo em blocos a caixa do fogo
+        alargada aos blocos que toca.
+        """
+        model = self.model
+        state = self.layers.state
+        if model.tile_size is None:
+            active = ((state == BURNING) | (state == DANGERED)).any(axis=1)
+            if not active.any():
+                return None
+            return (int(np.argmax(active)), state.shape[0], 0, state.shape[1])
+
+        # As ignições de fora do motor (início do fogo) entram por fire_box
+        box = _union(self._box, model.fire_box)
+        if box is None:
+            return None
+        m = model.tile_size
+        x0, x1, y0, y1 = box
+        return (x0 // m * m, min(state.shape[0], -(-x1 // m) * m),
+                y0 // m * m, min(state.shape[1], -(-y1 // m) * m))
+
+    def step(self):
+        state = self.layers.state
+        self._landing = self._pending
+        self._key = step_key(self.seed, self.steps)
+        self.steps += 1
+        window = self._window()
+        if window is None:
+            self._pending = np.empty((0, 4), dtype=np.int64)
+            return
+
+        # Os alvos ficam a até um raio das células que avançam
+        width, height = state.shape
+        radius = spread_radius(self.model.wind_speed)
+        x0, x1, y0, y1 = window
+        x0, x1 = max(0, x0 - radius), min(width, x1 + radius)
+        y0, y1 = max(0, y0 - radius), min(height, y1 + radius)
+        self.model.ensure_window((x0, x1, y0, y1))
+        before = state[x0:x1, y0:y1].copy()
+        self._pending = self._sweep(window)
+        dx, dy = np.nonzero(state[x0:x1, y0:y1] != before)
+        changed = (dx + x0) * height + dy + y0
+        self._sync_patches(changed, state[dx + x0, dy + y0])
+
+        if self.model.tile_size is not None:
+            area = state[x0:x1, y0:y1]
+            self._box = _bounds(np.argwhere((area == BURNING) | (area == DANGERED)), x0, y0)
+            burning = _bounds(np.argwhere(area == BURNING), x0, y0)
+            self.model.fire_box = _union(self.model.fire_box, burning)
+
+    def _sweep(self, window):
+        """Avança as células da janela (x0, x1, y0, y1); devolve as fagulhas largadas."""
+        return BACKENDS[self.backend].sweep(self.layers, window, self.weather(), self._key)
+
+    def fragulhas_in_flight(self):
+        return len(self._pending) > 0 or len(self._landing) > 0
+
+    def end_step(self):
+        fragulhas = self._landing
+        if len(fragulhas) == 0:
+            return
+        self._landing = np.empty((0, 4), dtype=np.int64)
+        # As fagulhas podem cair em blocos ainda por criar
+        self.model.ensure_tiles(fragulhas[:, 2:])
+        ignited = BACKENDS[self.backend].land_fragulhas(
+            self.layers, fragulhas, self.weather(), self._key
+        )
+        history = self.model.fragulha_history
+        for ox, oy, lx, ly in fragulhas.tolist():
+            history.record((ox, oy), (lx, ly), self.model.current_iteration)
+        self._sync_patches(ignited, np.full(len(ignited), BURNING, dtype=np.int8))
+        if self.model.tile_size is not None:
+            cells = np.stack(np.divmod(ignited, self.layers.height), axis=1)
+            self.model.fire_box = _union(self.model.fire_box, _bounds(cells, 0, 0))
+
+
+def _bounds(cells, x0, y0):
+    """Caixa (x0, x1, y0, y1) das células (N, 2) de uma janela com origem (x0, y0), ou None."""
+    if len(cells) == 0:
+        return None
+    return (x0 + int(cells[:, 0].min()), x0 + int(cells[:, 0].max()) + 1,
+            y0 + int(cells[:, 1].min()), y0 + int(cells[:, 1].max()) + 1)
+
+
+def _union(a, b):
+    """Menor caixa (x0, x1, y0, y1) que contém as caixas ``a`` e ``b`` (None = vazia)."""
+    if a is None or b is None:
+        return b if a is None else a
+    return (min(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3]))
@@ -0,0 +1,61 @@
+# spread_jit.py
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from Environment.spread_kernel import (
+    _GOLDEN, land_fragulhas, sweep_batch_cells, sweep_cells, uniform_scalar,
+)
+from Environment import spread_kernel
+
+# Numba é opcional: sem ele fica disponível apenas a versão numpy
+try:
+    from numba import njit
+    from numba.extending import overload, register_jitable
+except ImportError:  # pragma: no cover - depende do ambiente
+    njit = None
+
+AVAILABLE = njit is not None
+
+__all__ = ["AVAILABLE", "land_fragulhas", "sweep", "sweep_batch"]
+
+
+if AVAILABLE:
+    _G = np.uint64(_GOLDEN)
+    _M1 = np.uint64(0xBF58476D1CE4E5B9)
+    _M2 = np.uint64(0x94D049BB133111EB)
+    _S11 = np.uint64(11)
+    _S27 = np.uint64(27)
+    _S30 = np.uint64(30)
+    _S31 = np.uint64(31)
+    _SCALE = 1.0 / (1 << 53)
+
+    # As funções de spread_kernel chamam-se umas às outras pelo nome (e não
+    # recebem funções como argumento), para a compilação ficar em cache e
+    # não se repetir em cada processo
+    @overload(uniform_scalar, jit_options={"cache": True})
+    def _uniform(base, cell):
+        def impl(base, cell):
+            # O mesmo que spread_kernel.uniform para uma única célula
+            z = np.uint64(cell) * _G + base
+            z = (z ^ (z >> _S30)) * _M1
+            z = (z ^ (z >> _S27)) * _M2
+            z = z ^ (z >> _S31)
+            return (z >> _S11) * _SCALE
+        return impl
+
+    # O percurso sequencial é a mesma função de spread_kernel, compilada
+    register_jitable(sweep_cells)
+    _sweep_cells = njit(cache=True)(sweep_cells)
+    _sweep_batch_cells = njit(cache=True)(sweep_batch_cells)
+
+
+def sweep(layers, window, weather, key):
+    """Versão compilada de spread_kernel.sweep (mesmos resultados)."""
+    return spread_kernel.sweep(layers, window, weather, key, kernel=_sweep_cells)
+
+
+def sweep_batch(batch, x_start, weathers, keys):
+    """Versão compilada de spread_kernel.sweep_batch (mesmos resultados)."""
+    return spread_kernel.sweep_batch(batch, x_start, weathers, keys, kernel=_sweep_batch_cells)
@@ -0,0 +1,397 @@
+# spread_kernel.py
+
+# Standard library imports
+import math
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from Agents.agentes import SPREAD_COEFFICIENTS, STATE_CODES
+
+
+FORESTED = STATE_CODES["forested"]
+BURNING = STATE_CODES["burning"]
+BURNED = STATE_CODES["burned"]
+DANGERED = STATE_CODES["dangered"]
+
+# Coeficientes por omissão de PatchAgent.step (cada modelo pode ter os seus,
+# que chegam às funções deste módulo em weather["coefficients"])
+ALFA_ALTITUDE = SPREAD_COEFFICIENTS["alfa_altitude"]
+ALFA_HUMIDADE = SPREAD_COEFFICIENTS["alfa_humidade"]
+ALFA_PRECIP = SPREAD_COEFFICIENTS["alfa_precip"]
+ALFA_VENTO = SPREAD_COEFFICIENTS["alfa_vento"]
+ALFA_ALTURA = SPREAD_COEFFICIENTS["alfa_altura"]
+ALFA_TEMPERATURA = SPREAD_COEFFICIENTS["alfa_temperatura"]
+
+# Coeficientes por omissão de FragulhaAgent.step
+ALFA_FRAGULHA_HUMIDADE = SPREAD_COEFFICIENTS["alfa_fragulha_humidade"]
+ALFA_FRAGULHA_PRECIP = SPREAD_COEFFICIENTS["alfa_fragulha_precip"]
+ALFA_FRAGULHA_QUEDA = SPREAD_COEFFICIENTS["alfa_fragulha_queda"]
+FRAGULHA_CHANCE = 0.20       # Probabilidade de uma célula a arder largar uma fagulha
+
+DANGER_STEPS = 10            # Iterações até uma célula em perigo voltar a floresta
+
+# Fluxos de números aleatórios (um por tipo de sorteio)
+STREAM_BURN_TIME = 1
+STREAM_PRECIP = 2
+STREAM_IGNITE = 3
+STREAM_FRAGULHA = 4
+STREAM_FRAGULHA_DIST = 5
+STREAM_FRAGULHA_QUEDA = 6
+
+_MASK = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+
+def _mix_int(z):
+    """Função de mistura do SplitMix64 sobre inteiros de Python."""
+    z &= _MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+    return z ^ (z >> 31)
+
+
+def _mix(z):
+    """Função de mistura do SplitMix64 sobre arrays uint64."""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def step_key(seed, step):
+    """Chave dos sorteios de uma iteração."""
+    return _mix_int(seed + step * _GOLDEN)
+
+
+def stream_base(key, stream, k=0):
+    """Semente (uint64) do fluxo ``stream`` e do deslocamento ``k`` numa iteração."""
+    return _mix_int(key ^ (stream << 56) ^ (k << 24))
+
+
+def uniform(key, stream, cells, k=0):
+    """
+    Números uniformes em [0, 1) para as células ``cells`` (índices planos
+    x * altura + y), determinados só por (chave, fluxo, célula, k).
+
+    Cada sorteio depende apenas da célula e não da ordem em que as células
+    são percorridas, por isso o resultado é o mesmo qualquer que seja a
+    divisão do mapa entre processos.
+    """
+    base = np.uint64(stream_base(key, stream, k))
+    z = np.asarray(cells, dtype=np.uint64) * np.uint64(_GOLDEN) + base
+    return (_mix(z) >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+def coefficients(weather):
+    """Coeficientes da propagação de ``weather`` (SPREAD_COEFFICIENTS sem eles)."""
+    return weather.get("coefficients", SPREAD_COEFFICIENTS)
+
+
+def source_coefficients(weather):
+    """
+    Coeficientes do fator da célula a arder e da chuva, pela ordem dos
+    argumentos ``alfa`` de sweep_cells: altitude, altura, humidade,
+    temperatura e precipitação.
+    """
+    c = coefficients(weather)
+    return np.array([
+        c["alfa_altitude"], c["alfa_altura"], c["alfa_humidade"],
+        c["alfa_temperatura"], c["alfa_precip"],
+    ])
+
+
+def spread_radius(wind_speed):
+    """Raio de propagação por passo (como em PatchAgent.step)."""
+    return 1 + round(wind_speed / 10)
+
+
+def spread_offsets(radius, wind_speed, wind_direction, alfa_vento=ALFA_VENTO):
+    """
+    Vizinhos (k, dx, dy, probabilidade base, fator do vento) dentro do raio,
+    sem a própria célula. ``k`` identifica o deslocamento nos sorteios.
+    """
+    wind_r = wind_speed * 0.0666667
+    math_wind_angle = math.radians(90 - wind_direction)
+    offsets = []
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            distancia = math.sqrt(dx ** 2 + dy ** 2)
+            if distancia == 0 or distancia > radius:
+                continue
+            wind = math.cos(math.atan2(dy, dx) - math_wind_angle) * wind_r * alfa_vento
+            k = (dx + 128) * 257 + (dy + 128)
+            offsets.append((k, dx, dy, 1 / distancia, wind))
+    return offsets
+
+
+def fragulha_chance(rain_level, humidity, coefficients=SPREAD_COEFFICIENTS):
+    """Probabilidade de uma fagulha incendiar a floresta onde cai."""
+    return (
+        coefficients["alfa_fragulha_queda"]
+        + (1 - rain_level) * coefficients["alfa_fragulha_precip"]
+        + (1 / max(humidity, 1)) * coefficients["alfa_fragulha_humidade"]
+    )
+
+
+class SpreadLayers:
+    """
+    Arrays [x, y] lidos e escritos pela propagação em bloco.
+
+    Dinâmicos: ``state`` (a grelha de estados do modelo), ``burn_time`` (0 =
+    ainda por sortear) e ``dangered_time``. Estáticos: ``altitude``,
+    ``tree_height``, ``fuel`` (fator do tipo de árvore) e ``species``.
+    ``heat`` é o aquecimento da grelha grossa do HeatField, com resolução
+    ``heat_resolution``.
+
+    Num lote de réplicas (ver sweep_batch) os arrays dinâmicos e ``heat``
+    têm um primeiro eixo com a réplica; os estáticos são partilhados.
+    """
+
+    DYNAMIC = ("state", "burn_time", "dangered_time")
+    STATIC = ("altitude", "tree_height", "fuel", "species")
+
+    def __init__(self, state, burn_time, dangered_time, altitude, tree_height,
+                 fuel, species, heat, heat_resolution):
+        self.state = state
+        self.burn_time = burn_time
+        self.dangered_time = dangered_time
+        self.altitude = altitude
+        self.tree_height = tree_height
+        self.fuel = fuel
+        self.species = species
+        self.heat = heat
+        self.heat_resolution = heat_resolution
+        self.width, self.height = state.shape[-2:]
+
+
+def land_fragulhas(layers, fragulhas, weather, key):
+    """
+    Aplica a queda das fagulhas (N, 4): cada uma incendeia a floresta onde
+    cai com a probabilidade de FragulhaAgent. Devolve as células incendiadas.
+    """
+    height = layers.height
+    if len(fragulhas) == 0:
+        return np.empty(0, dtype=np.int64)
+    origin = fragulhas[:, 0] * height + fragulhas[:, 1]
+    lx, ly = fragulhas[:, 2], fragulhas[:, 3]
+    chance = fragulha_chance(weather["rain_level"], weather["humidity"], coefficients(weather))
+    hit = (layers.state[lx, ly] == FORESTED) & (
+        uniform(key, STREAM_FRAGULHA_QUEDA, origin) < chance
+    )
+    layers.state[lx[hit], ly[hit]] = BURNING
+    layers.burn_time[lx[hit], ly[hit]] = 0
+    return np.unique(lx[hit] * height + ly[hit])
+
+
+def uniform_scalar(base, cell):
+    """O mesmo que ``uniform`` para uma única célula, com a semente de ``stream_base``."""
+    z = (int(cell) * _GOLDEN + int(base)) & _MASK
+    return (_mix_int(z) >> 11) * (1.0 / (1 << 53))
+
+
+def sweep_cells(state, burn_time, dangered_time, altitude, tree_height, fuel,
+                species, heat, heat_resolution, x_start, x_end, y_start, y_end,
+                offsets_dx, offsets_dy, offsets_base, offsets_wind, precip_bases,
+                ignite_bases, burn_base, spawn_base, dist_base, itsrain, humidity_factor,
+                ambient, wind_speed, sin_a, neg_cos_a, alfa):
+    """
+    Uma iteração com a ordem de PatchAgent.step: as células são percorridas
+    por colunas (a ordem do scheduler) e uma célula incendiada mais à frente
+    no percurso ainda arde e propaga na mesma iteração. Escreve diretamente
+    nos arrays e devolve as fagulhas largadas (N, 4). ``alfa`` são os
+    coeficientes de source_coefficients (o do vento já está em
+    ``offsets_wind``).
+
+    Só avançam as células da janela [x_start, x_end) x [y_start, y_end); os
+    alvos da propagação podem ficar fora dela (e aí só avançam na iteração
+    seguinte).
+
+    Escrita só com ciclos e operações escalares, para poder ser compilada
+    tal e qual pelo Numba (ver spread_jit).
+    """
+    width, height = state.shape
+    fragulhas = np.empty((16, 4), np.int64)
+    n_fragulhas = 0
+    r = heat_resolution
+    alfa_altitude, alfa_altura, alfa_humidade, alfa_temperatura, alfa_precip = (
+        alfa[0], alfa[1], alfa[2], alfa[3], alfa[4]
+    )
+    for x in range(x_start, x_end):
+        for y in range(y_start, y_end):
+            s = state[x, y]
+            if s == DANGERED:
+                waited = np.int64(dangered_time[x, y]) + 1
+                if waited >= DANGER_STEPS:
+                    waited = 0
+                    state[x, y] = FORESTED
+                dangered_time[x, y] = waited
+                continue
+            if s != BURNING:
+                continue
+
+            cell = x * height + y
+            t = np.int64(burn_time[x, y])
+            if t == 0:
+                t = (2 if species[x, y] == 2 else 4) + np.int64(uniform_scalar(burn_base, cell) * 3)
+
+            alt = altitude[x, y]
+            if alt <= 0:
+                altitude_factor = alfa_altitude
+            else:
+                altitude_factor = alfa_altitude / max(alt, 1e-9)
+            temperature = ambient + heat[x // r, y // r]
+            source_factor = (
+                altitude_factor
+                + tree_height[x, y] * alfa_altura
+                + humidity_factor * alfa_humidade
+                + temperature * alfa_temperatura
+            )
+            source_fuel = fuel[x, y]
+
+            for o in range(offsets_dx.shape[0]):
+                tx = x + offsets_dx[o]
+                ty = y + offsets_dy[o]
+                if tx < 0 or tx >= width or ty < 0 or ty >= height:
+                    continue
+                target = state[tx, ty]
+                if target != FORESTED and target != DANGERED:
+                    continue
+                combined = source_factor + offsets_wind[o]
+                if not itsrain:
+                    combined = combined + uniform_scalar(precip_bases[o], cell) * alfa_precip
+                final_prob = offsets_base[o] * combined * source_fuel
+                if uniform_scalar(ignite_bases[o], cell) < final_prob:
+                    state[tx, ty] = BURNING
+                    burn_time[tx, ty] = 0
+                else:
+                    state[tx, ty] = DANGERED
+
+            if uniform_scalar(spawn_base, cell) < FRAGULHA_CHANCE:
+                if n_fragulhas == fragulhas.shape[0]:
+                    grown = np.empty((2 * n_fragulhas, 4), np.int64)
+                    grown[:n_fragulhas] = fragulhas[:n_fragulhas]
+                    fragulhas = grown
+                dist = (2 + 4 * uniform_scalar(dist_base, cell)) * max(wind_speed, 1.0)
+                lx = x + np.int64(np.rint(sin_a * dist))
+                ly = y + np.int64(np.rint(neg_cos_a * dist))
+                fragulhas[n_fragulhas, 0] = x
+                fragulhas[n_fragulhas, 1] = y
+                fragulhas[n_fragulhas, 2] = min(max(lx, 0), width - 1)
+                fragulhas[n_fragulhas, 3] = min(max(ly, 0), height - 1)
+                n_fragulhas += 1
+
+            t -= 1
+            burn_time[x, y] = t
+            if t <= 0:
+                state[x, y] = BURNED
+    return fragulhas[:n_fragulhas].copy()
+
+
+def sweep_arguments(weather, key):
+    """Deslocamentos, sementes, fatores do tempo e coeficientes de uma iteração de sweep_cells."""
+    offsets = spread_offsets(
+        spread_radius(weather["wind_speed"]), weather["wind_speed"], weather["wind_direction"],
+        coefficients(weather)["alfa_vento"],
+    )
+    k, dx, dy, base, wind = (np.array(column) for column in zip(*offsets))
+    angle = math.radians(weather["wind_direction"])
+    return (
+        dx.astype(np.int64), dy.astype(np.int64), base, wind,
+        np.array([stream_base(key, STREAM_PRECIP, int(i)) for i in k], dtype=np.uint64),
+        np.array([stream_base(key, STREAM_IGNITE, int(i)) for i in k], dtype=np.uint64),
+        np.uint64(stream_base(key, STREAM_BURN_TIME)),
+        np.uint64(stream_base(key, STREAM_FRAGULHA)),
+        np.uint64(stream_base(key, STREAM_FRAGULHA_DIST)),
+        bool(weather["itsrain"]), 1 / max(weather["humidity"], 1),
+        float(weather["ambient"]), float(weather["wind_speed"]),
+        math.sin(angle), -math.cos(angle), source_coefficients(weather),
+    )
+
+
+def sweep(layers, window, weather, key, kernel=sweep_cells):
+    """
+    Avança uma iteração com ``sweep_cells`` nas células da janela ``window``
+    (x0, x1, y0, y1); fora dela não há células a arder nem em perigo, ou
+    não avançam nesta iteração. Devolve as fagulhas largadas (N, 4).
+    """
+    x0, x1, y0, y1 = window
+    return kernel(
+        layers.state, layers.burn_time, layers.dangered_time, layers.altitude,
+        layers.tree_height, layers.fuel, layers.species, layers.heat,
+        layers.heat_resolution, x0, x1, y0, y1, *sweep_arguments(weather, key),
+    )
+
+
+def sweep_batch_cells(state, burn_time, dangered_time, altitude, tree_height, fuel,
+                      species, heat, heat_resolution, x_start, offsets_count,
+                      offsets_dx, offsets_dy, offsets_base, offsets_wind, precip_bases,
+                      ignite_bases, scalar_bases, itsrain, humidity_factor, ambient,
+                      wind_speed, sin_a, neg_cos_a, alfa):
+    """
+    sweep_cells em cada réplica do lote (primeiro eixo dos
+    arrays dinâmicos, de ``heat`` e dos argumentos por réplica). As réplicas
+    com ``x_start`` negativo não avançam. Devolve as fagulhas (N, 5), com a
+    réplica na primeira coluna.
+    """
+    fragulhas = np.empty((16, 5), np.int64)
+    n_fragulhas = 0
+    for r in range(state.shape[0]):
+        if x_start[r] < 0:
+            continue
+        n = offsets_count[r]
+        dropped = sweep_cells(
+            state[r], burn_time[r], dangered_time[r], altitude, tree_height, fuel,
+            species, heat[r], heat_resolution, x_start[r], state.shape[1], 0,
+            state.shape[2], offsets_dx[r, :n], offsets_dy[r, :n], offsets_base[r, :n],
+            offsets_wind[r, :n], precip_bases[r, :n], ignite_bases[r, :n], scalar_bases[r, 0],
+            scalar_bases[r, 1], scalar_bases[r, 2], itsrain[r], humidity_factor[r],
+            ambient[r], wind_speed[r], sin_a[r], neg_cos_a[r], alfa[r],
+        )
+        m = dropped.shape[0]
+        if n_fragulhas + m > fragulhas.shape[0]:
+            grown = np.empty((2 * (n_fragulhas + m), 5), np.int64)
+            grown[:n_fragulhas] = fragulhas[:n_fragulhas]
+            fragulhas = grown
+        fragulhas[n_fragulhas:n_fragulhas + m, 0] = r
+        fragulhas[n_fragulhas:n_fragulhas + m, 1:] = dropped
+        n_fragulhas += m
+    return fragulhas[:n_fragulhas].copy()
+
+
+def sweep_batch(batch, x_start, weathers, keys, kernel=sweep_batch_cells):
+    """
+    Uma iteração de sweep_cells em todas as réplicas de ``batch`` (um
+    SpreadLayers com o eixo das réplicas), cada uma com o seu tempo e a sua
+    chave. ``x_start[r] < 0`` deixa a réplica parada. Devolve as fagulhas
+    (N, 5): réplica, origem e queda.
+    """
+    replicates = len(x_start)
+    per_replicate = [
+        sweep_arguments(weathers[r], keys[r]) if x_start[r] >= 0 else None
+        for r in range(replicates)
+    ]
+    width = max([len(a[0]) for a in per_replicate if a is not None], default=1)
+    count = np.zeros(replicates, dtype=np.int64)
+    offsets = [np.zeros((replicates, width), dtype=dtype) for dtype in
+               (np.int64, np.int64, float, float, np.uint64, np.uint64)]
+    scalar_bases = np.zeros((replicates, 3), dtype=np.uint64)
+    scalars = [np.zeros(replicates, dtype=dtype) for dtype in
+               (np.bool_, float, float, float, float, float)]
+    alfa = np.zeros((replicates, 5))
+    for r, arguments in enumerate(per_replicate):
+        if arguments is None:
+            continue
+        count[r] = len(arguments[0])
+        for column, values in zip(offsets, arguments[:6]):
+            column[r, :count[r]] = values
+        scalar_bases[r] = arguments[6:9]
+        for column, value in zip(scalars, arguments[9:15]):
+            column[r] = value
+        alfa[r] = arguments[15]
+    return kernel(
+        batch.state, batch.burn_time, batch.dangered_time, batch.altitude,
+        batch.tree_height, batch.fuel, batch.species, batch.heat,
+        batch.heat_resolution, np.asarray(x_start, dtype=np.int64), count,
+        *offsets, scalar_bases, *scalars, alfa,
+    )
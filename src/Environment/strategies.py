@@ -0,0 +1,203 @@
+# strategies.py
+"""
+Comparação de estratégias de combate (proporção de equipas com jato de
+água, ``water_ratio``) com números aleatórios comuns.
+
+Cada semente corre todas as estratégias com o mesmo terreno, a mesma
+ignição, o mesmo tempo e a mesma chave da propagação (ver
+ensemble.replicate_streams); as diferenças entre estratégias são medidas
+par a par dentro de cada semente, o que tira grande parte do ruído entre
+réplicas e estreita os intervalos de confiança para o mesmo número de
+corridas.
+
+    python -m Environment.strategies --ratios 0.85 0.5 0.15 --runs 30 --workers 4
+"""
+
+# Standard library imports
+import argparse
+import math
+import multiprocessing
+import sys
+import warnings
+
+# Third-party imports
+import numpy as np
+from scipy import stats
+
+# Local imports
+from Environment.ensemble import (
+    make_scenario, record_replicate, replicate_metrics, run_replicate,
+)
+from Environment.result_cache import DEFAULT_DIRECTORY, ResultCache
+from Environment.results_store import ResultsStore
+from Environment.shared_landscape import SharedLandscape, init_worker, worker_landscape
+
+
+# Estudos Simulações/Bombeiros_*: equipas de ataque direto (água) em 100
+BOMBEIROS_RATIOS = {"Diretos": 0.85, "Equilibrado": 0.5, "Indiretos": 0.15}
+
+# Estado inicial comum aos estudos Simulações/Bombeiros_*
+BOMBEIROS_SCENARIO = {
+    "steps": 200,
+    "weather": {
+        "wind_direction": 0, "wind_speed": 4, "rain_level": 0.17,
+        "humidity": 15, "temperature": 25,
+    },
+    "model": {"num_firefighters": 100, "spread_engine": "sequential"},
+}
+
+METRICS = ("burned_area", "duration")
+
+
+def _run_seed(task):
+    """Todas as estratégias com uma semente; devolve {water_ratio: métricas}."""
+    scenario, ratios, seed, landscape, cache, store, study = task
+    warnings.filterwarnings("ignore", category=UserWarning)
+    if landscape is None:
+        landscape = worker_landscape()
+    results = {}
+    writer = store.writer() if store is not None else None
+    for ratio in ratios:
+        variant = dict(scenario, model=dict(scenario["model"], water_ratio=ratio))
+        burned, ignition = run_replicate(variant, seed, landscape, cache)
+        results[ratio] = replicate_metrics(burned, ignition)
+        if writer is not None:
+            record_replicate(writer, study, variant, seed, burned, ignition)
+    if writer is not None:
+        writer.close()
+    return seed, results
+
+
+def run_strategies(scenario, ratios, runs, workers=None, first_seed=0, landscape=None,
+                   cache=None, store=None, study=None):
+    """
+    Corre ``runs`` sementes com cada ``water_ratio`` e devolve
+    {water_ratio: {métrica: array por semente}}, com as sementes pela mesma
+    ordem em todas as estratégias. Com ``cache`` (result_cache.ResultCache)
+    as réplicas já corridas não se repetem; com ``store``
+    (results_store.ResultsStore) são acrescentadas à base de resultados
+    com o nome ``study``.
+    """
+    ratios = list(ratios)
+    seeds = range(first_seed, first_seed + runs)
+    if workers and workers > 1:
+        # O terreno é publicado uma vez em memória partilhada (ver ensemble)
+        tasks = [(scenario, ratios, seed, None, cache, store, study) for seed in seeds]
+        shared = SharedLandscape(landscape) if landscape is not None else None
+        try:
+            ctx = multiprocessing.get_context()
+            initializer, initargs = (init_worker, (shared.spec,)) if shared else (None, ())
+            with ctx.Pool(workers, initializer=initializer, initargs=initargs) as pool:
+                rows = sorted(pool.imap_unordered(_run_seed, tasks))
+        finally:
+            if shared is not None:
+                shared.close()
+    else:
+        rows = [
+            _run_seed((scenario, ratios, seed, landscape, cache, store, study))
+            for seed in seeds
+        ]
+    return {
+        ratio: {name: np.array([row[ratio][name] for _, row in rows]) for name in METRICS}
+        for ratio in ratios
+    }
+
+
+def paired_difference(a, b, confidence=0.95):
+    """
+    Diferença média ``a - b`` entre amostras emparelhadas, com o intervalo
+    t emparelhado e, para comparação, o de Welch (amostras independentes).
+    """
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    n = len(a)
+    d = a - b
+    q = stats.t.ppf(0.5 + confidence / 2, max(n - 1, 1))
+    paired_se = d.std(ddof=1) / math.sqrt(n) if n > 1 else math.nan
+    var_a = a.var(ddof=1) / n if n > 1 else math.nan
+    var_b = b.var(ddof=1) / n if n > 1 else math.nan
+    welch_se = math.sqrt(var_a + var_b)
+    if n > 1 and (var_a + var_b) > 0:
+        dof = (var_a + var_b) ** 2 / (var_a ** 2 / (n - 1) + var_b ** 2 / (n - 1))
+    else:
+        dof = max(n - 1, 1)
+    q_welch = stats.t.ppf(0.5 + confidence / 2, dof)
+    return {
+        "mean": float(d.mean()),
+        "half_width": float(q * paired_se),
+        "independent_half_width": float(q_welch * welch_se),
+        # Quantas vezes mais corridas seriam precisas sem emparelhar
+        "efficiency": float(welch_se ** 2 / paired_se ** 2) if paired_se > 0 else math.inf,
+        "runs": n,
+    }
+
+
+def compare_strategies(samples, baseline=None, confidence=0.95):
+    """
+    Diferenças emparelhadas de cada estratégia face a ``baseline`` (a
+    primeira por omissão): {water_ratio: {métrica: paired_difference}}.
+    """
+    ratios = list(samples)
+    baseline = ratios[0] if baseline is None else baseline
+    return {
+        ratio: {
+            name: paired_difference(samples[ratio][name], samples[baseline][name], confidence)
+            for name in METRICS
+        }
+        for ratio in ratios if ratio != baseline
+    }
+
+
+def format_comparison(samples, comparison, baseline, confidence=0.95):
+    lines = [f"{'water_ratio':<12}" + "".join(f"{name:>16}" for name in METRICS)]
+    for ratio, metrics in samples.items():
+        lines.append(f"{ratio:<12}" + "".join(f"{metrics[name].mean():>16.1f}" for name in METRICS))
+    lines.append("")
+    lines.append(f"Diferenças face a water_ratio={baseline} (IC {confidence:.0%}):")
+    for ratio, metrics in comparison.items():
+        for name, d in metrics.items():
+            lines.append(
+                f"  {ratio:<6} {name:<12} {d['mean']:>+10.1f} ± {d['half_width']:<8.1f}"
+                f" (sem emparelhar ± {d['independent_half_width']:.1f};"
+                f" eficiência x{d['efficiency']:.1f})"
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ratios", type=float, nargs="+",
+                        default=list(BOMBEIROS_RATIOS.values()))
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--steps", type=int, default=BOMBEIROS_SCENARIO["steps"])
+    parser.add_argument("--firefighters", type=int,
+                        default=BOMBEIROS_SCENARIO["model"]["num_firefighters"])
+    parser.add_argument("--spread-engine", default="sequential")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_DIRECTORY, default=None,
+                        metavar="PASTA", help="reutiliza as réplicas já corridas")
+    parser.add_argument("--store", default=None, metavar="PASTA",
+                        help="acrescenta as réplicas a uma base de resultados")
+    parser.add_argument("--study", default="estrategias",
+                        help="nome do estudo na base de resultados")
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    scenario = make_scenario(
+        steps=args.steps, weather=BOMBEIROS_SCENARIO["weather"],
+        model={"num_firefighters": args.firefighters, "spread_engine": args.spread_engine},
+    )
+    samples = run_strategies(scenario, args.ratios, args.runs, workers=args.workers,
+                             first_seed=args.first_seed,
+                             cache=ResultCache(args.cache) if args.cache else None,
+                             store=ResultsStore(args.store) if args.store else None,
+                             study=args.study)
+    baseline = args.ratios[0]
+    comparison = compare_strategies(samples, baseline, args.confidence)
+    print(format_comparison(samples, comparison, baseline, args.confidence))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
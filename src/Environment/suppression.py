@@ -0,0 +1,70 @@
+# suppression.py
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from Agents.agentes import STATE_CODES
+
+
+BURNING = STATE_CODES["burning"]
+
+# Vizinhança de Moore com o centro (raio 1)
+NEIGHBOR_OFFSETS = np.array(
+    [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype=np.int64
+)
+
+
+class SuppressionField:
+    """
+    Esforço de supressão partilhado por todas as equipas.
+
+    Cada equipa contribui, por passo, com ``1 / capacidade`` em cada célula a
+    arder da sua vizinhança; o esforço de várias equipas na mesma célula
+    soma-se e a célula fica apagada quando o total chega a 1. Tudo é
+    resolvido numa só passagem por iteração. Para análise (ver
+    SuppressionHeatmapWindow), ``cumulative`` guarda o esforço total
+    aplicado em cada célula ao longo da simulação e ``extinguished`` marca
+    as células que as equipas apagaram.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.effort = np.zeros((width, height), dtype=np.float32)
+        self.cumulative = np.zeros((width, height), dtype=np.float32)
+        self.extinguished = np.zeros((width, height), dtype=bool)
+
+    def apply(self, positions, rates, state_grid):
+        """
+        Aplica o esforço das equipas em ``positions`` (N, 2) com ``rates`` (N,).
+
+        Devolve a máscara (N,) das equipas que trabalharam numa célula apagada
+        neste passo e o array (M, 2) dessas células.
+        """
+        n = len(positions)
+        hit = np.zeros(n, dtype=bool)
+        if n == 0:
+            return hit, np.empty((0, 2), dtype=np.int64)
+
+        cells = (positions[:, None, :] + NEIGHBOR_OFFSETS[None, :, :]).reshape(-1, 2)
+        crew = np.repeat(np.arange(n), len(NEIGHBOR_OFFSETS))
+        inside = ((cells[:, 0] >= 0) & (cells[:, 0] < self.width) &
+                  (cells[:, 1] >= 0) & (cells[:, 1] < self.height))
+        crew, cells = crew[inside], cells[inside]
+        burning = state_grid[cells[:, 0], cells[:, 1]] == BURNING
+        crew, cells = crew[burning], cells[burning]
+        if len(crew) == 0:
+            return hit, np.empty((0, 2), dtype=np.int64)
+
+        x, y = cells[:, 0], cells[:, 1]
+        np.add.at(self.effort, (x, y), rates[crew])
+        np.add.at(self.cumulative, (x, y), rates[crew])
+
+        # Tolerância para somas como 3 x 1/3
+        done = self.effort[x, y] >= 1.0 - 1e-6
+        hit[crew[done]] = True
+        done_cells = np.unique(cells[done], axis=0)
+        self.effort[done_cells[:, 0], done_cells[:, 1]] = 0.0
+        self.extinguished[done_cells[:, 0], done_cells[:, 1]] = True
+        return hit, done_cells
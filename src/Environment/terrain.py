@@ -0,0 +1,195 @@
+# terrain.py
+
+# Standard library imports
+import os
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from Agents.agentes import STATE_CODES
+
+
+# Códigos das rasters de combustível -> (tipo de árvore, fator, cor)
+FUEL_TYPES = {
+    0: ("NA", 0.0, 0),
+    1: ("pine", 0.5, 55),
+    2: ("eucalyptus", 0.8, 75),
+}
+# Tipo de árvore -> código (o mesmo das rasters)
+SPECIES_CODES = {name: code for code, (name, _, _) in FUEL_TYPES.items()}
+# Código -> fator do tipo de árvore
+FUEL_FACTORS = np.array([FUEL_TYPES[code][1] for code in range(len(FUEL_TYPES))])
+
+ASCII_HEADER_KEYS = (
+    "ncols", "nrows", "xllcorner", "yllcorner", "xllcenter", "yllcenter",
+    "cellsize", "nodata_value",
+)
+
+
+def read_ascii_header(path):
+    """Lê o cabeçalho de uma grelha ESRI ASCII; devolve (header, nº de linhas)."""
+    header = {}
+    with open(path, "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) != 2 or parts[0].lower() not in ASCII_HEADER_KEYS:
+                break
+            header[parts[0].lower()] = float(parts[1])
+    return header, len(header)
+
+
+def _ascii_to_npy(path):
+    """
+    Converte a grelha ASCII para um .npy ao lado do ficheiro (uma só vez) e
+    devolve o caminho do .npy. A cache é refeita se o ASCII for mais recente.
+    """
+    cache = path + ".npy"
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+        return cache
+    header, skip = read_ascii_header(path)
+    data = np.loadtxt(path, skiprows=skip, dtype=np.float32, ndmin=2)
+    expected = (int(header["nrows"]), int(header["ncols"]))
+    if data.shape != expected:
+        raise ValueError(f"{path}: esperava {expected} células, li {data.shape}")
+    if "nodata_value" in header:
+        data[data == header["nodata_value"]] = np.nan
+    np.save(cache, data)
+    return cache
+
+
+def _read_hdr(path):
+    """Lê o .hdr (nrows, ncols, nbits, byteorder) que acompanha uma raster binária."""
+    hdr = os.path.splitext(path)[0] + ".hdr"
+    if not os.path.exists(hdr):
+        return {}
+    values = {}
+    with open(hdr, "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 2:
+                values[parts[0].lower()] = parts[1]
+    return values
+
+
+def open_raster(path, shape=None, dtype=None):
+    """
+    Abre uma raster (linhas, colunas) com mapeamento em memória.
+
+    Aceita ``.npy``, grelhas ESRI ASCII (``.asc``, convertidas uma vez para
+    ``.npy``) e binário cru (``.raw``, ``.bin``, ``.flt``), cuja forma e tipo
+    vêm de ``shape``/``dtype`` ou do ``.hdr`` ao lado. Nada é lido do disco
+    até uma janela ser acedida.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".asc":
+        path, ext = _ascii_to_npy(path), ".npy"
+    if ext == ".npy":
+        return np.load(path, mmap_mode="r")
+
+    hdr = _read_hdr(path)
+    if shape is None:
+        if "nrows" not in hdr or "ncols" not in hdr:
+            raise ValueError(f"{path}: indique shape ou forneça um .hdr")
+        shape = (int(hdr["nrows"]), int(hdr["ncols"]))
+    if dtype is None:
+        if ext == ".flt":
+            dtype = np.float32
+        elif "nbits" in hdr:
+            dtype = {8: np.uint8, 16: np.int16, 32: np.float32}[int(hdr["nbits"])]
+        else:
+            raise ValueError(f"{path}: indique dtype ou forneça um .hdr com nbits")
+    dtype = np.dtype(dtype)
+    if hdr.get("byteorder", "").upper() in ("M", "MSBFIRST"):
+        dtype = dtype.newbyteorder(">")
+    return np.memmap(path, dtype=dtype, mode="r", shape=tuple(shape))
+
+
+def read_window(raster, window=None):
+    """
+    Janela de uma raster como array [x, y] do modelo.
+
+    ``window`` é (coluna, linha, largura, altura); sem janela usa a raster
+    inteira. As rasters são (linhas, colunas) com a linha 0 a norte, que é a
+    linha de cima da grelha da simulação, por isso basta transpor (a vista
+    continua mapeada em disco; nada é copiado).
+    """
+    if window is not None:
+        col, row, width, height = window
+        raster = raster[row:row + height, col:col + width]
+    return raster.T
+
+
+class Landscape:
+    """
+    Camadas do terreno lidas de rasters: altitude, tipo de combustível,
+    altura das árvores e máscaras de água e estrada, todas indexadas [x, y].
+
+    As camadas podem ser vistas de rasters mapeadas em memória; só as
+    janelas pedidas com ``window`` são lidas do disco e convertidas.
+    """
+
+    def __init__(self, altitude, fuel=None, tree_height=None, water=None, road=None):
+        self.altitude = altitude
+        self.width, self.height = altitude.shape
+        self.fuel = self._check(fuel)
+        self.tree_height = self._check(tree_height)
+        self.water = self._check(water)
+        self.road = self._check(road)
+
+    def _check(self, data):
+        if data is not None and data.shape != self.altitude.shape:
+            raise ValueError(
+                f"Camada com forma {data.shape}, esperava {self.altitude.shape}"
+            )
+        return data
+
+    @property
+    def shape(self):
+        return (self.width, self.height)
+
+    def window(self, x0, x1, y0, y1):
+        """
+        Camadas limpas (sem NaN, tipos finais) das células [x0:x1, y0:y1].
+        As camadas que já estão limpas são devolvidas como vistas, sem cópia.
+        """
+        def clean(data, dtype):
+            if data is None:
+                return None
+            data = data[x0:x1, y0:y1]
+            if data.dtype == dtype and not (data.dtype.kind == "f" and np.isnan(data).any()):
+                return data
+            return np.nan_to_num(np.asarray(data)).astype(dtype)
+
+        return Landscape(
+            clean(self.altitude, float), fuel=clean(self.fuel, np.uint8),
+            tree_height=clean(self.tree_height, float),
+            water=clean(self.water, bool), road=clean(self.road, bool),
+        )
+
+    @classmethod
+    def from_model(cls, model):
+        """
+        Fotografia das camadas estáticas de um modelo já criado (por exemplo
+        um terreno procedural), para repetir o mesmo cenário noutros modelos.
+        """
+        state = np.asarray(model.state_grid)
+        return cls(
+            np.array(model.altitude_grid), fuel=np.array(model.species_grid),
+            tree_height=np.array(model.tree_height_grid),
+            water=state == STATE_CODES["river"], road=state == STATE_CODES["road"],
+        )
+
+    @classmethod
+    def from_files(cls, altitude, fuel=None, tree_height=None, water=None,
+                   road=None, window=None, shape=None, dtype=None):
+        """Abre as camadas dos ficheiros dados, recortadas à ``window`` (col, linha, largura, altura)."""
+        def load(path):
+            if path is None:
+                return None
+            return read_window(open_raster(path, shape=shape, dtype=dtype), window)
+
+        return cls(
+            load(altitude), fuel=load(fuel), tree_height=load(tree_height),
+            water=load(water), road=load(road),
+        )
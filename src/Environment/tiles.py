@@ -0,0 +1,83 @@
+# tiles.py
+
+# Third-party imports
+import numpy as np
+
+
+class TileSet:
+    """
+    Índice dos blocos (tiles) de ``tile_size`` x ``tile_size`` células já
+    materializados num terreno em blocos.
+
+    Guarda a ordem de materialização dos blocos; só os blocos criados são
+    percorridos, o resto do mapa nunca é tocado. Os blocos onde alguma
+    célula mudou de estado (ver touch) são os candidatos de ``active``, por
+    isso o custo de cada iteração acompanha a zona com fogo e não o número
+    de blocos criados.
+    """
+
+    def __init__(self, width, height, tile_size):
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.order = []            # Blocos pela ordem em que foram criados
+        self._known = {}           # Bloco -> posição em ``order``
+        self._touched = set()      # Blocos com mudanças de estado desde o último active
+
+    def __len__(self):
+        return len(self.order)
+
+    def __contains__(self, tile):
+        return tile in self._known
+
+    def tile_of(self, pos):
+        """Bloco (tx, ty) que contém a célula ``pos``."""
+        return (pos[0] // self.tile_size, pos[1] // self.tile_size)
+
+    def tiles_in(self, window):
+        """Blocos (lista de tuplos) que se sobrepõem à janela (x0, x1, y0, y1)."""
+        x0, x1, y0, y1 = window
+        s = self.tile_size
+        return [(tx, ty)
+                for tx in range(max(0, x0) // s, (min(self.width, x1) - 1) // s + 1)
+                for ty in range(max(0, y0) // s, (min(self.height, y1) - 1) // s + 1)]
+
+    def tiles_of(self, cells):
+        """Blocos distintos (lista de tuplos) que contêm as células (N, 2)."""
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        if len(cells) == 0:
+            return []
+        tiles = np.unique(cells // self.tile_size, axis=0)
+        return [tuple(t) for t in tiles.tolist()]
+
+    def cell_bounds(self, tile):
+        """Intervalo de células (x0, x1, y0, y1) do bloco, cortado ao mapa."""
+        tx, ty = tile
+        s = self.tile_size
+        return (tx * s, min(self.width, (tx + 1) * s),
+                ty * s, min(self.height, (ty + 1) * s))
+
+    def add(self, tile):
+        """Regista um bloco novo."""
+        self._known[tile] = len(self.order)
+        self.order.append(tile)
+
+    def touch(self, pos):
+        """Marca o bloco da célula ``pos``, que mudou de estado."""
+        self._touched.add(self.tile_of(pos))
+
+    def active(self, state_grid, codes):
+        """
+        Blocos criados que têm alguma célula com um dos estados ``codes``,
+        pela ordem de criação. Só procura nos blocos ativos da última vez e
+        nos marcados com touch desde então.
+        """
+        found = []
+        candidates = sorted((t for t in self._touched if t in self._known),
+                            key=self._known.__getitem__)
+        for tile in candidates:
+            x0, x1, y0, y1 = self.cell_bounds(tile)
+            if np.isin(state_grid[x0:x1, y0:y1], codes).any():
+                found.append(tile)
+        self._touched = set(found)
+        return found
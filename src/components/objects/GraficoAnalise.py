@@ -77,8 +77,8 @@ def plot_trajectories(model):
     plt.figure(figsize=(6, 6))
 
     for ag in model.schedule:
-        if hasattr(ag, "history"):
-            xs, ys = zip(*ag.history)
+        if hasattr(ag, "trajectory"):
+            xs, ys = ag.trajectory.positions.T
 
             # bombeiros "alternative" em laranja; os de água em azul‑escuro
             cor = "orange" if getattr(ag, "technique", "water") == "alternative" else "navy"
@@ -238,31 +238,20 @@ class FragulhaArrowsWindow(BaseGraphWindow):
         self.axes = self.fig.add_subplot(111)
         layout.addWidget(self.canvas)
 
-        all_x = []
-        all_y = []
+        origins, landings, steps = fragulha_history.arrays()
 
-        for frag_id, path in fragulha_history.items():
-            if len(path) > 1:
-                x_coords, y_coords = zip(*path)
+        # Translada para a origem e inverte Y para corrigir espelhamento
+        x_shifted = landings[:, 0] - origins[:, 0]
+        y_shifted = origins[:, 1] - landings[:, 1]
 
-                # Ponto inicial absoluto
-                x0, y0 = x_coords[0], y_coords[0]
+        if len(x_shifted):
+            # Apenas início (0,0) e fim
+            self.axes.plot(0, 0, 'go')
+            self.axes.plot(x_shifted, y_shifted, 'ro', linestyle='none')
 
-                # Translada e inverte Y para corrigir espelhamento
-                x_shifted = [x - x0 for x in x_coords]
-                y_shifted = [y0 - y for y in y_coords]
-
-                # Apenas início e fim
-                self.axes.plot(x_shifted[0],  y_shifted[0],  'go')  # início (0,0)
-                self.axes.plot(x_shifted[-1], y_shifted[-1], 'ro')  # fim
-
-                all_x.extend([x_shifted[0], x_shifted[-1]])
-                all_y.extend([y_shifted[0], y_shifted[-1]])
-
-        # Ajusta limites do gráfico
-        if all_x and all_y:
-            min_x, max_x = min(all_x), max(all_x)
-            min_y, max_y = min(all_y), max(all_y)
+            # Ajusta limites do gráfico
+            min_x, max_x = min(0, x_shifted.min()), max(0, x_shifted.max())
+            min_y, max_y = min(0, y_shifted.min()), max(0, y_shifted.max())
             self.axes.set_xlim(min_x - 1, max_x + 1)
             self.axes.set_ylim(min_y - 1, max_y + 1)
 
@@ -274,25 +263,16 @@ class FragulhaArrowsWindow(BaseGraphWindow):
         self.axes.set_title("Trajetórias das Fragulhas (início em (0,0) e fim)")
 
         # Prepara dados para CSV
-        csv_data = []
-        for frag_id, path in fragulha_history.items():
-            if len(path) > 1:
-                x_coords, y_coords = zip(*path)
-                x0, y0 = x_coords[0], y_coords[0]
-                x_shifted = [x - x0 for x in x_coords]
-                y_shifted = [y0 - y for y in y_coords]
-                
-                csv_data.append({
-                    'Fragulha_ID': frag_id,
-                    'X_Inicio': x_shifted[0],
-                    'Y_Inicio': y_shifted[0],
-                    'X_Fim': x_shifted[-1],
-                    'Y_Fim': y_shifted[-1],
-                    'Distancia': ((x_shifted[-1] - x_shifted[0])**2 + (y_shifted[-1] - y_shifted[0])**2)**0.5
-                })
-        
-        if csv_data:
-            self.data_for_csv = pd.DataFrame(csv_data)
+        if len(x_shifted):
+            self.data_for_csv = pd.DataFrame({
+                'Fragulha_ID': np.arange(1, len(x_shifted) + 1),
+                'Iteracao': steps,
+                'X_Inicio': 0,
+                'Y_Inicio': 0,
+                'X_Fim': x_shifted,
+                'Y_Fim': y_shifted,
+                'Distancia': np.hypot(x_shifted, y_shifted)
+            })
 
         self.canvas.draw()
         
@@ -427,3 +407,99 @@ class FirebreakMapWindow(BaseGraphWindow):
         
         # Adiciona botões de download
         self.add_download_buttons(layout)
+
+
+class SuppressionHeatmapWindow(BaseGraphWindow):
+    """
+    Mapa de calor do esforço de supressão acumulado em cada célula, com as
+    células apagadas pelas equipas (``extinguished``) assinaladas por cima.
+    """
+
+    def __init__(self, cumulative_effort, extinguished=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Esforço de Supressão")
+        layout = QVBoxLayout(); self.setLayout(layout)
+        self.fig = Figure(figsize=(7, 6), dpi=100)
+        self.canvas = FigureCanvas(self.fig); layout.addWidget(self.canvas)
+        ax = self.fig.add_subplot(111)
+
+        # A grelha é indexada [x, y]; transpõe para desenhar Y nas linhas
+        image = ax.imshow(cumulative_effort.T, cmap="hot_r", origin="upper",
+                          interpolation="nearest")
+        self.fig.colorbar(image, ax=ax, label="Esforço acumulado")
+        if extinguished is not None and extinguished.any():
+            ex, ey = np.nonzero(extinguished)
+            ax.scatter(ex, ey, s=6, marker="s", facecolors="none",
+                       edgecolors="tab:blue", linewidths=0.6,
+                       label=f"Apagadas ({len(ex)})")
+            ax.legend(loc='center left', bbox_to_anchor=(1.25, 0.5))
+        ax.set_xlabel("Posição X"); ax.set_ylabel("Posição Y")
+        ax.set_title("Esforço de Supressão Acumulado", pad=20, size=12)
+
+        # Prepara dados para CSV (apenas células trabalhadas)
+        xs, ys = np.nonzero(cumulative_effort)
+        if len(xs):
+            self.data_for_csv = pd.DataFrame({
+                'Posicao_X': xs,
+                'Posicao_Y': ys,
+                'Esforco': cumulative_effort[xs, ys]
+            })
+            if extinguished is not None:
+                self.data_for_csv['Apagada'] = extinguished[xs, ys]
+
+        self.fig.tight_layout(); self.canvas.draw()
+
+        # Adiciona botões de download
+        self.add_download_buttons(layout)
+
+
+class BurnProbabilityWindow(BaseGraphWindow):
+    """
+    Mapa de probabilidade de queima de um conjunto de réplicas
+    (Environment.ensemble.BurnProbability), com a chegada média do fogo.
+    """
+
+    def __init__(self, ensemble, fire_start_positions=(), parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Probabilidade de Queima")
+        layout = QVBoxLayout(); self.setLayout(layout)
+        self.fig = Figure(figsize=(11, 5), dpi=100)
+        self.canvas = FigureCanvas(self.fig); layout.addWidget(self.canvas)
+        ax_prob = self.fig.add_subplot(121)
+        ax_time = self.fig.add_subplot(122)
+
+        # A grelha é indexada [x, y]; transpõe para desenhar Y nas linhas
+        probability = ensemble.burn_probability
+        image = ax_prob.imshow(probability.T, cmap="YlOrRd", origin="upper",
+                               interpolation="nearest", vmin=0, vmax=1)
+        self.fig.colorbar(image, ax=ax_prob, label="Probabilidade")
+        ax_prob.set_title(f"Probabilidade de Queima ({ensemble.runs} réplicas)", size=11)
+
+        arrival = ensemble.mean_arrival
+        image = ax_time.imshow(np.ma.masked_invalid(arrival).T, cmap="viridis",
+                               origin="upper", interpolation="nearest")
+        self.fig.colorbar(image, ax=ax_time, label="Iteração")
+        ax_time.set_title("Chegada Média do Fogo", size=11)
+
+        for ax in (ax_prob, ax_time):
+            if fire_start_positions:
+                x_coords, y_coords = zip(*fire_start_positions)
+                ax.scatter(x_coords, y_coords, color='blue', marker='x', s=60,
+                           label="Início do Incêndio")
+            ax.set_xlabel("Posição X"); ax.set_ylabel("Posição Y")
+
+        # Prepara dados para CSV (apenas células que arderam nalguma réplica)
+        xs, ys = np.nonzero(ensemble.burned)
+        if len(xs):
+            self.data_for_csv = pd.DataFrame({
+                'Posicao_X': xs,
+                'Posicao_Y': ys,
+                'Probabilidade': probability[xs, ys],
+                'Chegada_Media': arrival[xs, ys],
+                'Chegada_Variancia': ensemble.arrival_variance[xs, ys],
+            })
+
+        self.fig.tight_layout(); self.canvas.draw()
+
+        # Adiciona botões de download
+        self.add_download_buttons(layout)
@@ -6,7 +6,7 @@ import random
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QGridLayout, QHBoxLayout, QVBoxLayout,
     QLabel, QSlider, QPushButton, QTextEdit, QGraphicsScene, QGraphicsView,
-    QFormLayout, QRadioButton, QButtonGroup, QToolTip
+    QFormLayout, QRadioButton, QButtonGroup, QToolTip, QFileDialog
 )
 from PySide6.QtCore import Qt, Slot, QTimer, QEvent
 from PySide6.QtGui import QBrush, QColor, QGuiApplication, QPixmap, QCursor
@@ -14,11 +14,13 @@ from PySide6.QtGui import QBrush, QColor, QGuiApplication, QPixmap, QCursor
 # Local imports
 from components.objects.bossula import CompassWidget
 from Environment.ambiente import EnvironmentModel
+from Environment.ensemble import BurnProbability
 from Agents.firefighter_agent import FirefighterAgent
 from components.settings.MapColor import EncontrarCor
 from components.objects.GraficoAnalise import (
     GraphWindow, FragulhaArrowsWindow, FireStartWindow, 
-    FirebreakMapWindow, plot_trajectories
+    FirebreakMapWindow, SuppressionHeatmapWindow, BurnProbabilityWindow,
+    plot_trajectories
 )
 
 class HoverValueSlider(QSlider):
@@ -250,6 +252,10 @@ class SimulationApp(QMainWindow):
         self.graph_button.clicked.connect(self.show_graph_window)
         row1.addWidget(self.graph_button)
 
+        self.burn_probability_button = QPushButton("Probabilidade de Queima")
+        self.burn_probability_button.clicked.connect(self.show_burn_probability_window)
+        row1.addWidget(self.burn_probability_button)
+
         self.fire_status_label = QLabel("Incêndio: Inativo (Temp: -- °C)")
         row1.addWidget(self.fire_status_label)
 
@@ -405,6 +411,7 @@ class SimulationApp(QMainWindow):
         self.precip_evol.clear()
 
         # Reinicia modelo
+        self.model.close()
         self.model = EnvironmentModel(
             self.world_width,
             self.world_height,
@@ -419,6 +426,7 @@ class SimulationApp(QMainWindow):
         self.model.rain_level = self.precip_slider.value() / 100.0
         basehumidity = self.humid_slider.value()
         self.model.temperature = self.temp_slider.value()
+        self.model.ambient_temperature = self.temp_slider.value()
 
         if chosen_env == "river_trees":
              self.model.humidity = basehumidity * 1.5
@@ -529,6 +537,7 @@ class SimulationApp(QMainWindow):
         self.model.rain_level = self.precip_slider.value() / 100.0
         self.model.humidity = self.humid_slider.value()
         self.model.temperature = self.temp_slider.value()
+        self.model.ambient_temperature = self.temp_slider.value()
 
         self.model.step()
 
@@ -767,6 +776,36 @@ class SimulationApp(QMainWindow):
             firebreak_dialog.setWindowTitle("Mapa de Linhas de Corte")
             firebreak_dialog.show()
 
+        # 9) Esforço de supressão acumulado
+        if self.model.suppression.cumulative.any():
+            suppression_dialog = SuppressionHeatmapWindow(
+                self.model.suppression.cumulative,
+                self.model.suppression.extinguished,
+                parent=self
+            )
+            suppression_dialog.show()
+
+    def show_burn_probability_window(self):
+        """
+        Abre um conjunto de réplicas guardado (o probabilidade_queima.npz de
+        Environment.ensemble ou de Environment.scenarios) e mostra o mapa de
+        probabilidade de queima.
+        """
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Abrir Probabilidade de Queima", "probabilidade_queima.npz",
+            "NumPy Files (*.npz)"
+        )
+        if not file_path:
+            return
+        try:
+            ensemble = BurnProbability.load(file_path)
+        except (OSError, KeyError, ValueError) as e:
+            self.add_log(f"Erro ao abrir {file_path}: {e}")
+            return
+        self.add_log(f"Probabilidade de queima de {ensemble.runs} réplicas: {file_path}")
+        burn_probability_dialog = BurnProbabilityWindow(ensemble, parent=self)
+        burn_probability_dialog.show()
+
 
 def main():
     app = QApplication(sys.argv)